@@ -0,0 +1,117 @@
+"""Mede as ações em lote da pasta contra reabrir a pasta do zero.
+
+Uma pasta com N livros, rolada algumas telas: seleciona tudo (os N, não só
+os cards montados) e marca como lido, como não lido, zera o progresso, move
+para outra pasta e, nessa outra, remove da biblioteca. Para cada ação: tempo
+até a tela estar atualizada, controles novos e bytes enviados. A referência
+é reabrir a pasta com um route_change, que recriava tudo.
+
+Uso: python benchmarks/bench_bulk.py [--books 5000] [--scrolls 3]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+FOLDER = "Escolar"
+TARGET = "Drama"
+
+
+def measure(page, label, action):
+    connection = page.headless
+    connection.reset()
+    start = time.perf_counter()
+    action()
+    elapsed = (time.perf_counter() - start) * 1000
+    print(
+        f"{label:<30} {elapsed:9.1f} ms  {connection.added_controls:7d} controles"
+        f"  {connection.payload_bytes:10d} bytes  {connection.updates:3d} updates"
+    )
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--books", type=int, default=5000)
+    parser.add_argument("--scrolls", type=int, default=3)
+    args = parser.parse_args()
+
+    os.environ["FLET_APP_STORAGE_DATA"] = tempfile.mkdtemp(prefix="blreader-bench-")
+
+    import flet as ft
+    import main as app_main
+    from headless import HeadlessPage, click, find_control, find_folder_card, scroll_to_end, walk
+
+    app_main.load_library()
+    library = app_main.my_library
+    library.add_books([
+        app_main.BLBook(f"Volume Sintético {i}", FOLDER, "#7986CB", 100 + i % 300) for i in range(args.books)
+    ])
+
+    page = HeadlessPage("/")
+    # Diálogos abertos pela tela, para tocar nos botões deles
+    opened = []
+    open_control = page.open
+    page.open = lambda control: (opened.append(control), open_control(control))
+
+    def grid():
+        return find_control(page.views[-1], ft.GridView)
+
+    def tooltip(name):
+        return next(c for c in walk(page.views[-1]) if getattr(c, "tooltip", None) == name)
+
+    def menu_item(text):
+        return next(i for i in find_control(page.views[-1], ft.PopupMenuButton).items if i.text == text)
+
+    def scroll():
+        for _ in range(args.scrolls):
+            scroll_to_end(grid())
+
+    def batch(text):
+        click(tooltip("Selecionar tudo"))
+        click(menu_item(text))
+
+    def move():
+        click(tooltip("Selecionar tudo"))
+        click(menu_item("Mover para pasta"))
+        tile = next(c for c in walk(opened[-1]) if isinstance(c, ft.ListTile) and c.title.value == TARGET)
+        click(tile)
+
+    def delete():
+        click(tooltip("Selecionar tudo"))
+        click(menu_item("Remover da biblioteca"))
+        click(next(c for c in opened[-1].actions if c.text == "Remover"))
+
+    page.run(app_main.main(page))
+    click(find_folder_card(page.views[0], FOLDER))
+    scroll()
+    print(f"Pasta {FOLDER}: {library.category_count(FOLDER)} livros, {len(grid().controls)} cards no grid\n")
+
+    rebuild = measure(page, "reabrir a pasta (route_change)", lambda: page.go("/category"))
+    scroll()
+    slowest = 0
+    for text in ("Marcar como lido", "Marcar como não lido", "Zerar progresso"):
+        slowest = max(slowest, measure(page, text.lower(), lambda: batch(text)))
+    book = library.by_category(FOLDER, 1)[0]
+    assert app_main.library_store.by_ids([book.id])[0][5] == 0, "progresso não gravado"
+
+    slowest = max(slowest, measure(page, f"mover para {TARGET}", move))
+    assert library.category_count(FOLDER) == 0 and not grid().controls
+    page.go("/")
+    click(find_folder_card(page.views[0], TARGET))
+    scroll()
+    moved = library.category_count(TARGET)
+    remaining = len(library) - moved
+    slowest = max(slowest, measure(page, f"remover {moved} livros", delete))
+    assert library.category_count(TARGET) == 0 and len(library) == remaining
+
+    print(f"\nação mais lenta: {slowest:.0f} ms (reabrir a pasta: {rebuild:.0f} ms)")
+
+
+if __name__ == "__main__":
+    main()
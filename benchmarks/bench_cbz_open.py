@@ -0,0 +1,84 @@
+"""Abre um CBZ grande com o zipfile e com o MappedZip e compara.
+
+Mede abrir o arquivo (primeira vez e reabertura, quando o índice do diretório
+central já está em cache), ler páginas espalhadas e achar a proporção de uma
+página, além da memória alocada pelo Python em cada caminho.
+
+Uso: python benchmarks/bench_cbz_open.py [--pages 2000] [--page-kb 64]
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+import zipfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from render import CbzSource  # noqa: E402
+from zipindex import MappedZip  # noqa: E402
+
+
+def make_cbz(path, pages, page_bytes):
+    # Cabeçalho PNG válido seguido de bytes aleatórios: imagens já comprimidas
+    header = b"\x89PNG\r\n\x1a\n" + b"\x00\x00\x00\rIHDR" + (800).to_bytes(4, "big") + (1200).to_bytes(4, "big")
+    with zipfile.ZipFile(path, "w", zipfile.ZIP_STORED) as archive:
+        for i in range(pages):
+            archive.writestr(f"vol/cap{i // 50:03d}/{i:05d}.png", header + os.urandom(page_bytes - len(header)))
+
+
+def run(open_archive, path, sample):
+    start = time.perf_counter()
+    archive = open_archive(path)
+    opened = (time.perf_counter() - start) * 1000
+    names = sorted(archive.namelist())
+    start = time.perf_counter()
+    for index in sample:
+        archive.read(names[index])
+    reading = (time.perf_counter() - start) * 1000 / len(sample)
+    archive.close()
+    start = time.perf_counter()
+    open_archive(path).close()
+    reopened = (time.perf_counter() - start) * 1000
+    return opened, reopened, reading
+
+
+def measure(label, open_archive, path, sample):
+    opened, reopened, reading = run(open_archive, path, sample)
+    # Memória numa segunda passada: o tracemalloc distorce os tempos
+    import zipindex
+
+    zipindex._indexes.clear()
+    tracemalloc.start()
+    run(open_archive, path, sample)
+    peak = tracemalloc.get_traced_memory()[1] / 1024
+    tracemalloc.stop()
+    zipindex._indexes.clear()
+    print(f"  {label:<10} abrir {opened:7.2f} ms  reabrir {reopened:7.2f} ms  página {reading:6.3f} ms  pico {peak:8.0f} KB")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--pages", type=int, default=2000)
+    parser.add_argument("--page-kb", type=int, default=64)
+    args = parser.parse_args()
+
+    path = os.path.join(tempfile.mkdtemp(prefix="blreader-cbz-"), "omnibus.cbz")
+    make_cbz(path, args.pages, args.page_kb * 1024)
+    print(f"{args.pages} páginas, {os.path.getsize(path) / 1024 / 1024:.0f} MB")
+    sample = random.Random(1).sample(range(args.pages), min(200, args.pages))
+
+    measure("zipfile", zipfile.ZipFile, path, sample)
+    measure("mmap", MappedZip, path, sample)
+
+    source = CbzSource(path)
+    start = time.perf_counter()
+    ratio = source.aspect_ratio(0)
+    print(f"  proporção da página 1: {ratio:.2f} em {(time.perf_counter() - start) * 1000:.3f} ms")
+    source.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""Mede a rolagem contínua do leitor em capítulos curtos e longos.
+
+Rola um PDF sintético do início ao fim e informa o tempo do evento de
+rolagem (que nunca deve decodificar), os controles enviados e o tamanho da
+janela de slots, que precisa ficar igual qualquer que seja o capítulo.
+
+Uso: python benchmarks/bench_continuous.py [--pages 50,1000]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+from types import SimpleNamespace
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+
+def make_pdf(pymupdf, path, count):
+    with pymupdf.open() as doc:
+        for i in range(count):
+            page = doc.new_page(width=600, height=1000)
+            page.draw_rect(page.rect, color=None, fill=((i % 5) / 5, 0.5, 0.7))
+            page.insert_text((60, 500), f"Página {i + 1}", fontsize=48)
+        doc.save(path)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--pages", default="50,1000")
+    parser.add_argument("--step", type=float, default=120.0, help="pixels por evento de rolagem")
+    args = parser.parse_args()
+
+    os.environ["FLET_APP_STORAGE_DATA"] = tempfile.mkdtemp(prefix="blreader-bench-")
+
+    import pymupdf
+    import flet as ft
+    import main as app_main
+    from headless import HeadlessPage, click, find_book_card, walk
+
+    app_main.load_library()
+
+    for count in (int(c) for c in args.pages.split(",")):
+        path = os.path.join(tempfile.mkdtemp(prefix="blreader-pdf-"), f"webtoon-{count}.pdf")
+        make_pdf(pymupdf, path, count)
+        book = app_main.BLBook(f"Webtoon {count}", "Drama", "#9575CD", count, path)
+        app_main.my_library.add_books([book])
+
+        page = HeadlessPage("/")
+        page.run(app_main.main(page))
+        # O livro recém-adicionado é o primeiro do Continuar Lendo
+        click(find_book_card(page.views[0]))
+        click(next(c for c in walk(page.views[-1]) if isinstance(c, ft.IconButton) and c.tooltip == "Rolagem contínua"))
+        column = next(c for c in walk(page.views[-1]) if isinstance(c, ft.Column) and c.on_scroll)
+        extent = column.controls[-1].height + (len(column.controls) - 2) * column.controls[1].height
+
+        connection = page.headless
+        connection.reset()
+        samples = []
+        pixels = 0.0
+        while pixels < extent:
+            t0 = time.perf_counter()
+            column.on_scroll(SimpleNamespace(pixels=pixels, max_scroll_extent=extent, event_type="update"))
+            samples.append((time.perf_counter() - t0) * 1000)
+            pixels += args.step
+            time.sleep(0.002)
+        samples.sort()
+        print(
+            f"{count:5d} páginas  {len(samples):5d} eventos  p95 {samples[int(len(samples) * 0.95) - 1]:5.2f} ms"
+            f"  máx {samples[-1]:6.2f} ms  {len(column.controls) - 2} slots"
+            f"  {connection.added_controls / len(samples):4.1f} controles/evento"
+            f"  cache {app_main.page_cache.current_bytes / 1024 / 1024:5.1f} MB"
+            f"  página salva {book.current_page}"
+        )
+        page.go("/")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""Mede a pintura das capas com o cache de miniaturas frio e quente.
+
+Importa N PDFs sintéticos, "reinicia" o cache (nova instância lendo a mesma
+pasta) e abre a pasta com todas as capas, contando quantas vezes algum PDF
+foi aberto. Com o cache em disco o esperado é zero.
+
+Uso: python benchmarks/bench_covers.py [--books 200]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+
+def make_pdfs(pymupdf, folder, count):
+    paths = []
+    for i in range(count):
+        path = os.path.join(folder, f"capa-{i:04d}.pdf")
+        with pymupdf.open() as doc:
+            page = doc.new_page(width=600, height=900)
+            page.draw_rect(page.rect, color=None, fill=(0.3 + (i % 7) / 10, 0.4, 0.8))
+            page.insert_text((60, 450), f"Volume {i}", fontsize=64)
+            doc.save(path)
+        paths.append(path)
+    return paths
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--books", type=int, default=200)
+    args = parser.parse_args()
+
+    data_dir = tempfile.mkdtemp(prefix="blreader-bench-")
+    os.environ["FLET_APP_STORAGE_DATA"] = data_dir
+
+    import pymupdf
+    import main as app_main
+    from headless import HeadlessPage, click, find_control, find_folder_card, scroll_to_end
+    from importer import ImportJob
+    from thumbnails import ThumbnailCache
+    import flet as ft
+
+    app_main.load_library()
+
+    source_dir = tempfile.mkdtemp(prefix="blreader-pdfs-")
+    make_pdfs(pymupdf, source_dir, args.books)
+
+    start = time.perf_counter()
+    results = []
+    job = ImportJob(app_main.library_store, [source_dir], results.extend)
+    job.start().join()
+    for result in results:
+        app_main.thumbnail_cache.put_many(result["hash"], result["thumbnails"])
+    app_main.my_library.add_imported(results, lambda path: "Capas")
+    print(f"{len(results)} PDFs importados em {time.perf_counter() - start:.2f} s")
+
+    # Conta toda abertura de documento a partir daqui
+    opened = [0]
+    original_open = pymupdf.open
+
+    def counting_open(*a, **kw):
+        opened[0] += 1
+        return original_open(*a, **kw)
+
+    pymupdf.open = counting_open
+
+    for label in ("cache frio (reinício)", "cache quente"):
+        if label.startswith("cache frio"):
+            app_main.thumbnail_cache = ThumbnailCache(app_main.thumbnail_cache.root, app_main.THUMBNAIL_CACHE_BYTES)
+        opened[0] = 0
+        page = HeadlessPage("/")
+        start = time.perf_counter()
+        page.run(app_main.main(page))
+        click(find_folder_card(page.views[0], "Capas"))
+        grid = find_control(page.views[-1], ft.GridView)
+        while len(grid.controls) < args.books:
+            before = len(grid.controls)
+            scroll_to_end(grid)
+            if len(grid.controls) == before:
+                break
+        elapsed = (time.perf_counter() - start) * 1000
+        images = sum(1 for card in grid.controls if isinstance(card.content.controls[0].content, ft.Image))
+        print(f"{label:<24} {elapsed:8.1f} ms  {images:4d} capas com imagem  {opened[0]:3d} PDFs abertos")
+
+    cache = app_main.thumbnail_cache
+    print(f"\nCache em disco: {cache.current_bytes / 1024:.0f} KB para {args.books} livros (2 tamanhos cada)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""Mede a importação de volumes repetidos e o compartilhamento dos caches.
+
+Importa N PDFs de uma pasta e depois uma segunda pasta com cópias de todos
+eles (metade renomeada). Com a deduplicação por hash a biblioteca continua
+com N livros, a segunda importação só calcula hashes (nenhuma miniatura nova)
+e abrir uma cópia reaproveita as páginas já decodificadas da outra.
+
+Uso: python benchmarks/bench_dedup.py [--books 100]
+"""
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+
+def run_import(app_main, paths):
+    from importer import ImportJob
+
+    results = []
+    start = time.perf_counter()
+    job = ImportJob(app_main.library_store, paths, results.extend)
+    job.start().join()
+    for result in results:
+        if result.get("thumbnails"):
+            app_main.thumbnail_cache.put_many(result["hash"], result["thumbnails"])
+    app_main.my_library.add_imported(results, lambda path: "Repetidos")
+    return job, (time.perf_counter() - start) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--books", type=int, default=100)
+    args = parser.parse_args()
+
+    data_dir = tempfile.mkdtemp(prefix="blreader-bench-")
+    os.environ["FLET_APP_STORAGE_DATA"] = data_dir
+
+    import pymupdf
+    import main as app_main
+    from bench_covers import make_pdfs
+    from render import PageCache, PageRenderer
+
+    app_main.load_library()
+    books_before = len(app_main.my_library)
+
+    first_dir = tempfile.mkdtemp(prefix="blreader-pdfs-")
+    originals = make_pdfs(pymupdf, first_dir, args.books)
+    second_dir = tempfile.mkdtemp(prefix="blreader-copias-")
+    for i, path in enumerate(originals):
+        name = f"copia de {os.path.basename(path)}" if i % 2 else os.path.basename(path)
+        shutil.copy(path, os.path.join(second_dir, name))
+
+    job, first_ms = run_import(app_main, [first_dir])
+    thumbnails_bytes = app_main.thumbnail_cache.current_bytes
+    print(f"1ª pasta: {job.done} arquivos em {first_ms:.0f} ms")
+    job, second_ms = run_import(app_main, [second_dir])
+    print(f"2ª pasta (só cópias): {job.done} arquivos em {second_ms:.0f} ms, {job.duplicates} já na biblioteca")
+    assert job.duplicates == args.books, "cópias importadas como livros novos"
+    books = len(app_main.my_library) - books_before
+    print(f"livros na biblioteca: {books} (sem deduplicação seriam {2 * args.books})")
+    assert books == args.books
+    extra = app_main.thumbnail_cache.current_bytes - thumbnails_bytes
+    print(f"miniaturas: {thumbnails_bytes / 1024:.0f} KB, +{extra / 1024:.0f} KB com as cópias")
+
+    book = next(iter(app_main.my_library.by_category("Repetidos", 1)))
+    paths = app_main.library_store.paths_of(book.id)
+    print(f"'{book.title}': {len(paths)} caminhos")
+
+    # Mesmo conteúdo aberto por dois caminhos: a segunda abertura acha as páginas no cache
+    cache = PageCache()
+    for label, path in (("original", paths[0]), ("cópia", paths[1])):
+        renderer = PageRenderer(path, cache, content_hash=book.content_hash)
+        start = time.perf_counter()
+        renderer.render(0)
+        print(f"  abrir {label:<9} página 1: {(time.perf_counter() - start) * 1000:6.2f} ms")
+        renderer.close()
+    print(f"  cache: {len(cache)} entradas, {cache.current_bytes / 1024:.0f} KB")
+
+    # O arquivo principal some: o livro passa a abrir a cópia
+    os.remove(book.path)
+    path = app_main.my_library.available_path(book)
+    print(f"arquivo principal removido, abre agora: {os.path.basename(path)}")
+    assert os.path.exists(path)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,141 @@
+"""Compara a memória de três representações de livro em bibliotecas grandes.
+
+- dict: a classe BLBook antiga (__dict__ por instância, datetime completo)
+- slots: o BLBook atual (__slots__, categoria internada, epoch em float)
+- colunas: um protótipo em arrays (uma coluna por campo, categorias por índice)
+
+Uso: python benchmarks/bench_memory.py [--sizes 10000,100000,1000000]
+"""
+import argparse
+import datetime
+import gc
+import os
+import sys
+import time
+import tracemalloc
+from array import array
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from library import BLBook
+
+CATEGORIES = ["Omegaverse", "Escolar", "Fantasia", "Drama", "Comédia", "Ação"]
+COLORS = ["#7986CB", "#5C6BC0", "#F48FB1", "#9575CD", "#4DB6AC", "#FF8A65"]
+
+
+class DictBook:
+    """Cópia do BLBook anterior aos __slots__, só para comparação"""
+
+    def __init__(self, title, category, cover_color, total_pages=100, path=None):
+        self.id = None
+        self.title = title
+        self.category = category
+        self.cover_color = cover_color
+        self.current_page = 0
+        self.total_pages = total_pages
+        self.last_read = datetime.datetime.now()
+        self.path = path
+        self.content_hash = None
+
+
+class BookColumns:
+    """Uma coluna por campo; book(i) devolve uma visão com os mesmos atributos"""
+
+    def __init__(self):
+        self.titles = []
+        self.category_ids = array("B")
+        self.color_ids = array("B")
+        self.current_pages = array("I")
+        self.total_pages = array("I")
+        self.last_read = array("d")
+        self.paths = []
+        self.categories = []
+        self._category_of = {}
+
+    def _intern(self, table, lookup, value):
+        if value not in lookup:
+            lookup[value] = len(table)
+            table.append(value)
+        return lookup[value]
+
+    def append(self, title, category, color_id, total_pages, path=None):
+        self.titles.append(title)
+        self.category_ids.append(self._intern(self.categories, self._category_of, category))
+        self.color_ids.append(color_id)
+        self.current_pages.append(0)
+        self.total_pages.append(total_pages)
+        self.last_read.append(time.time())
+        self.paths.append(path)
+
+    def book(self, row):
+        return BookView(self, row)
+
+
+class BookView:
+    __slots__ = ("table", "row")
+
+    def __init__(self, table, row):
+        self.table = table
+        self.row = row
+
+    @property
+    def title(self):
+        return self.table.titles[self.row]
+
+    @property
+    def current_page(self):
+        return self.table.current_pages[self.row]
+
+    @current_page.setter
+    def current_page(self, value):
+        self.table.current_pages[self.row] = value
+
+
+def build_dict(count):
+    return [DictBook(f"Volume Sintético {i}", CATEGORIES[i % 6], COLORS[i % 6], 100 + i % 300) for i in range(count)]
+
+
+def build_slots(count):
+    return [BLBook(f"Volume Sintético {i}", CATEGORIES[i % 6], COLORS[i % 6], 100 + i % 300) for i in range(count)]
+
+
+def build_columns(count):
+    table = BookColumns()
+    for i in range(count):
+        table.append(f"Volume Sintético {i}", CATEGORIES[i % 6], i % 6, 100 + i % 300)
+    return table
+
+
+def measure(build, count):
+    gc.collect()
+    tracemalloc.start()
+    start = time.perf_counter()
+    books = build(count)
+    elapsed = time.perf_counter() - start
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    # Os títulos são iguais nas três e ficam dentro da conta
+    del books
+    return current, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", default="10000,100000,1000000")
+    args = parser.parse_args()
+
+    for count in (int(s) for s in args.sizes.split(",")):
+        print(f"{count} livros")
+        baseline = None
+        for label, build in (("dict", build_dict), ("slots", build_slots), ("colunas", build_columns)):
+            used, elapsed = measure(build, count)
+            baseline = baseline or used
+            print(
+                f"  {label:<8} {used / 1024 / 1024:9.1f} MB  {used / count:6.0f} B/livro"
+                f"  {used / baseline:5.0%}  montado em {elapsed:5.2f} s"
+            )
+        print()
+
+
+if __name__ == "__main__":
+    main()
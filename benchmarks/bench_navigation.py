@@ -0,0 +1,69 @@
+"""Mede controles criados e bytes enviados ao cliente por navegação.
+
+Uso: python benchmarks/bench_navigation.py [--books 5000]
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+CATEGORIES = ["Omegaverse", "Escolar", "Fantasia", "Drama"]
+
+
+def synthetic_books(BLBook, count):
+    rng = random.Random(42)
+    return [
+        BLBook(f"Volume Sintético {i}", rng.choice(CATEGORIES), "#7986CB", rng.randint(40, 400))
+        for i in range(count)
+    ]
+
+
+def measure(page, label, action):
+    connection = page.headless
+    connection.reset()
+    start = time.perf_counter()
+    action()
+    elapsed = (time.perf_counter() - start) * 1000
+    print(
+        f"{label:<28} {elapsed:9.1f} ms  {connection.added_controls:7d} controles"
+        f"  {connection.payload_bytes:10d} bytes  {connection.updates:3d} updates"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--books", type=int, default=5000)
+    args = parser.parse_args()
+
+    # O banco do benchmark fica numa pasta temporária, nunca na biblioteca real
+    os.environ["FLET_APP_STORAGE_DATA"] = tempfile.mkdtemp(prefix="blreader-bench-")
+
+    import main as app_main
+    from headless import HeadlessPage, click, find_book_card, find_button, find_control, find_folder_card, scroll_to_end
+    import flet as ft
+
+    app_main.load_library()
+
+    app_main.my_library.add_books(synthetic_books(app_main.BLBook, args.books - len(app_main.my_library)))
+    print(f"Biblioteca com {len(app_main.my_library)} livros\n")
+
+    page = HeadlessPage("/")
+    measure(page, "primeira pintura (/)", lambda: page.run(app_main.main(page)))
+    measure(page, "abrir pasta Escolar", lambda: click(find_folder_card(page.views[0], "Escolar")))
+    measure(page, "rolar a pasta até o fim", lambda: scroll_to_end(find_control(page.views[-1], ft.GridView)))
+    measure(page, "voltar para home", lambda: page.go("/"))
+    measure(page, "abrir livro", lambda: click(find_book_card(page.views[0])))
+    measure(page, "próxima página", lambda: click(find_button(page.views[-1], "Próximo")))
+    measure(page, "voltar do leitor", lambda: page.go("/"))
+    measure(page, "ver tudo (recentes)", lambda: page.go("/recent"))
+    measure(page, "voltar para home", lambda: page.go("/"))
+
+
+if __name__ == "__main__":
+    main()
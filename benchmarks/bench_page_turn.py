@@ -0,0 +1,112 @@
+"""Mede o tempo do toque em "Próximo" até a página publicada, com e sem importação.
+
+Abre um PDF sintético no leitor e vira páginas em dois ritmos (leitura
+normal, em que o pré-carregamento alcança, e toques seguidos, que forçam
+decodificação), primeiro com o app ocioso e depois durante a importação de
+uma pasta grande disparada pelo mesmo seletor de arquivos do app.
+
+Uso: python benchmarks/bench_page_turn.py [--turns 40] [--import-files 400]
+"""
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+from types import SimpleNamespace
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+
+def make_pdf(pymupdf, path, count, label):
+    with pymupdf.open() as doc:
+        for i in range(count):
+            page = doc.new_page(width=600, height=900)
+            for row in range(30):
+                page.draw_rect(pymupdf.Rect(20, 20 + row * 29, 580, 40 + row * 29), color=None, fill=((i + row) % 7 / 7, 0.4, 0.7))
+            page.insert_text((60, 450), f"{label} {i + 1}", fontsize=48)
+        doc.save(path)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--turns", type=int, default=40)
+    parser.add_argument("--import-files", type=int, default=400)
+    args = parser.parse_args()
+
+    os.environ["FLET_APP_STORAGE_DATA"] = tempfile.mkdtemp(prefix="blreader-bench-")
+
+    import pymupdf
+    import flet as ft
+    import main as app_main
+    from headless import HeadlessPage, click, find_book_card, find_button, walk
+    from render import PageCache
+
+    app_main.load_library()
+
+    work_dir = tempfile.mkdtemp(prefix="blreader-pdfs-")
+    book_path = os.path.join(work_dir, "leitura.pdf")
+    make_pdf(pymupdf, book_path, args.turns * 2 + 10, "Página")
+    import_dir = os.path.join(work_dir, "importar")
+    os.makedirs(import_dir)
+    for i in range(args.import_files):
+        make_pdf(pymupdf, os.path.join(import_dir, f"volume-{i:04d}.pdf"), 3, f"Vol {i}")
+
+    book = app_main.BLBook("Leitura", "Drama", "#9575CD", 0, book_path)
+    app_main.my_library.add_books([book])
+    page = HeadlessPage("/")
+    page.run(app_main.main(page))
+
+    def open_book():
+        app_main.page_cache = PageCache(app_main.PAGE_CACHE_BYTES)  # Sempre a frio
+        book.current_page = 0
+        page.go("/")
+        click(find_book_card(page.views[0]))
+
+    def turn_pages(interval):
+        samples = []
+        next_button = find_button(page.views[-1], "Próximo")
+        for _ in range(args.turns):
+            t0 = time.perf_counter()
+            click(next_button)
+            samples.append((time.perf_counter() - t0) * 1000)
+            time.sleep(interval)
+        return samples
+
+    # A faixa de progresso da home fica visível enquanto a importação roda
+    import_status = next(
+        c for c in walk(page.views[0])
+        if isinstance(c, ft.Container) and isinstance(c.content, ft.Column)
+        and any(isinstance(p, ft.ProgressBar) for p in c.content.controls)
+    )
+
+    def import_running():
+        return import_status.visible
+
+    print(f"{'cenário':<44} {'mediana':>9} {'p95':>9} {'máx':>9}")
+    for importing in (False, True):
+        for label, interval in (("leitura (150 ms entre toques)", 0.15), ("toques seguidos", 0.0)):
+            open_book()
+            if importing:
+                # O segundo seletor é o de pasta inteira
+                picker = [c for c in page.overlay if isinstance(c, ft.FilePicker)][1]
+                picker.on_result(SimpleNamespace(files=None, path=import_dir))
+                time.sleep(0.2)  # Varredura da pasta e início do pool
+            samples = sorted(turn_pages(interval))
+            busy = " + importação" if importing else ""
+            note = "" if not importing or import_running() else "  (importação terminou antes do fim)"
+            print(
+                f"{label + busy:<44} {statistics.median(samples):7.1f} ms {samples[int(len(samples) * 0.95) - 1]:7.1f} ms"
+                f" {samples[-1]:7.1f} ms{note}"
+            )
+            if importing:
+                while import_running():
+                    time.sleep(0.05)
+                # Cada rodada importa de novo do zero
+                app_main.my_library.remove_books([b for b in app_main.my_library if b.path and b.path.startswith(import_dir)])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""Mede a pré-renderização no tempo ocioso e a reabertura "no dia seguinte".
+
+Gera um PDF com capítulos, planeja o próximo capítulo a partir de uma página
+no meio do livro e deixa o PrewarmScheduler trabalhar. Confere que um toque
+pausa o trabalho e, com caches novos (como depois de reiniciar o app), compara
+abrir o livro com e sem as páginas prontas em disco.
+
+Uso: python benchmarks/bench_prewarm.py [--pages 300] [--chapter 30] [--current 45]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from chapters import ChapterIndex, pdf_chapters  # noqa: E402
+from disk_cache import DiskCache  # noqa: E402
+from prewarm import PrewarmScheduler, pages_to_warm  # noqa: E402
+from render import PageCache, PageRenderer  # noqa: E402
+
+
+def make_pdf(pymupdf, path, pages, chapter):
+    with pymupdf.open() as doc:
+        for i in range(pages):
+            page = doc.new_page(width=600, height=900)
+            for row in range(40):
+                page.insert_text((40, 40 + row * 21), f"Página {i} linha {row} " * 3, fontsize=11)
+            page.draw_circle((300, 450), 120 + i % 50, color=(0.4, 0.2, 0.6), fill=(0.9, 0.8, 1.0))
+        doc.set_toc([[1, f"Capítulo {n + 1}", n * chapter + 1] for n in range(pages // chapter)])
+        doc.save(path)
+
+
+def wait_until(condition, timeout):
+    deadline = time.monotonic() + timeout
+    while not condition() and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+
+def time_first_pages(path, disk_cache, first, count):
+    start = time.perf_counter()
+    renderer = PageRenderer(path, PageCache(), disk_cache=disk_cache)
+    opened = renderer.render(first)
+    first_ms = (time.perf_counter() - start) * 1000
+    start = time.perf_counter()
+    for index in range(first + 1, first + count):
+        renderer.render(index)
+    turns_ms = (time.perf_counter() - start) * 1000 / max(1, count - 1)
+    renderer.close()
+    return first_ms, turns_ms, len(opened)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--pages", type=int, default=300)
+    parser.add_argument("--chapter", type=int, default=30)
+    parser.add_argument("--current", type=int, default=45)
+    args = parser.parse_args()
+
+    import pymupdf
+
+    folder = tempfile.mkdtemp(prefix="blreader-prewarm-")
+    path = os.path.join(folder, "livro.pdf")
+    make_pdf(pymupdf, path, args.pages, args.chapter)
+    with pymupdf.open(path) as doc:
+        chapters = ChapterIndex(pdf_chapters(doc))
+    pages = pages_to_warm(args.current, chapters, args.pages)
+    print(f"{args.pages} páginas, {len(chapters)} capítulos; plano: páginas {pages.start}-{pages.stop - 1}")
+
+    root = os.path.join(folder, "pages")
+    scheduler = PrewarmScheduler(DiskCache(root, 256 * 1024 * 1024, ".png"), idle_seconds=0.3)
+    start = time.perf_counter()
+    scheduler.plan([(path, None, pages)])
+    wait_until(lambda: scheduler.rendered >= 3, 10)
+    # Um toque: nada é renderizado enquanto o app não fica ocioso de novo
+    scheduler.touch()
+    paused_at = scheduler.rendered
+    time.sleep(scheduler.idle_seconds * 0.8)
+    print(f"  toque durante o trabalho: {scheduler.rendered - paused_at} páginas renderizadas na pausa")
+    wait_until(lambda: scheduler.rendered >= len(pages), 120)
+    elapsed = time.perf_counter() - start
+    print(f"  {scheduler.rendered} páginas pré-renderizadas em {elapsed:.1f} s (com a espera de ociosidade)")
+
+    # "Dia seguinte": caches novos, a pasta de páginas é lida de novo do disco
+    cold = time_first_pages(path, None, args.current, 10)
+    warm = time_first_pages(path, DiskCache(root, 256 * 1024 * 1024, ".png"), args.current, 10)
+    print(f"  sem pré-renderização: abrir {cold[0]:7.1f} ms, próximas páginas {cold[1]:6.1f} ms")
+    print(f"  com pré-renderização: abrir {warm[0]:7.1f} ms, próximas páginas {warm[1]:6.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
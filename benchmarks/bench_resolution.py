@@ -0,0 +1,141 @@
+"""Compara decodificação e bytes por página em cada resolução do leitor.
+
+Para um PDF sintético (texto e formas), renderiza as mesmas páginas em cada
+degrau de RESOLUTION_STEPS: tempo por página, bytes por página e quantas
+páginas cabem no cache de memória; depois mede a abertura a frio, página na
+resolução da tela direto contra prévia rápida + troca pela definitiva.
+
+Para um CBZ de digitalizações grandes (1800 px de largura), mostra por que as
+imagens vão como estão: o custo de reduzi-las com o PyMuPDF em cada degrau.
+
+Uso: python benchmarks/bench_resolution.py [--pages 8] [--steps 360,720,1080,1440]
+"""
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import threading
+import time
+import zipfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from render import PageCache, PageRenderer, RESOLUTION_STEPS, open_source  # noqa: E402
+
+PAGE_CACHE_BYTES = 64 * 1024 * 1024
+
+
+def make_pdf(pymupdf, path, pages):
+    with pymupdf.open() as doc:
+        for i in range(pages):
+            page = doc.new_page(width=600, height=900)
+            for row in range(40):
+                page.insert_text((40, 40 + row * 21), f"Página {i} linha {row} " * 3, fontsize=11)
+            page.draw_circle((300, 450), 120 + i * 7, color=(0.4, 0.2, 0.6), fill=(0.9, 0.8, 1.0))
+        doc.save(path)
+
+
+def make_cbz(pymupdf, path, pages):
+    # Uma página rasterizada como digitalização: 1800 x 2700 em JPEG
+    with pymupdf.open() as doc:
+        page = doc.new_page(width=600, height=900)
+        for row in range(40):
+            page.insert_text((40, 40 + row * 21), f"Balão de fala {row} " * 3, fontsize=11)
+        page.draw_circle((300, 450), 200, color=(0.2, 0.2, 0.2), fill=(0.7, 0.7, 0.7))
+        scan = page.get_pixmap(matrix=pymupdf.Matrix(3, 3)).tobytes("jpeg", jpg_quality=90)
+    with zipfile.ZipFile(path, "w", zipfile.ZIP_STORED) as archive:
+        for i in range(pages):
+            archive.writestr(f"{i:04d}.jpg", scan)
+
+
+def measure_steps(path, pages, steps):
+    source = open_source(path)
+    try:
+        source.render(0, steps[0])  # Aquece o motor (import, fontes)
+        for width in steps:
+            times = []
+            sizes = []
+            for index in range(pages):
+                start = time.perf_counter()
+                data = source.render(index, width)
+                times.append((time.perf_counter() - start) * 1000)
+                sizes.append(len(data))
+            per_page = statistics.mean(sizes)
+            print(
+                f"  {width:>5} px  {statistics.median(times):7.1f} ms/página  {per_page / 1024:7.0f} KB/página"
+                f"  {int(PAGE_CACHE_BYTES // per_page):6d} páginas no cache"
+            )
+    finally:
+        source.close()
+
+
+def measure_cbz_downscale(pymupdf, path, steps):
+    source = open_source(path)
+    source.render(1, steps[0])
+    start = time.perf_counter()
+    data = source.render(0, steps[0])
+    elapsed = (time.perf_counter() - start) * 1000
+    source.close()
+    print(f"  original (como o leitor envia)  {elapsed:7.1f} ms  {len(data) / 1024:7.0f} KB/página")
+    for width in steps:
+        start = time.perf_counter()
+        pix = pymupdf.Pixmap(data)
+        scaled = pymupdf.Pixmap(pix, width, round(pix.height * width / pix.width), None).tobytes("jpeg", jpg_quality=85)
+        print(
+            f"  reduzida para {width:>5} px       {(time.perf_counter() - start) * 1000:7.1f} ms  {len(scaled) / 1024:7.0f} KB/página"
+        )
+
+
+def measure_open(path, width):
+    """Abrir a frio: (ms até a primeira imagem, ms até a definitiva) com e sem prévia"""
+    results = {}
+    for progressive in (False, True):
+        renderer = PageRenderer(path, PageCache(PAGE_CACHE_BYTES), width=width)
+        start = time.perf_counter()
+        data = renderer.preview(0) if progressive else None
+        first = (time.perf_counter() - start) * 1000
+        if data is None:
+            renderer.render(0)
+            first = final = (time.perf_counter() - start) * 1000
+        else:
+            done = threading.Event()
+            renderer.upgrade(0, lambda index, data: done.set())
+            done.wait()
+            final = (time.perf_counter() - start) * 1000
+        renderer.close()
+        results[progressive] = (first, final)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--pages", type=int, default=8)
+    parser.add_argument("--steps", default="360,720,1080,1440")
+    args = parser.parse_args()
+    steps = [int(s) for s in args.steps.split(",")]
+    assert all(s in RESOLUTION_STEPS for s in steps), f"degraus possíveis: {RESOLUTION_STEPS}"
+
+    import pymupdf
+
+    folder = tempfile.mkdtemp(prefix="blreader-resolucao-")
+    pdf_path = os.path.join(folder, "livro.pdf")
+    make_pdf(pymupdf, pdf_path, args.pages)
+    cbz_path = os.path.join(folder, "digitalizado.cbz")
+    make_cbz(pymupdf, cbz_path, args.pages)
+
+    print("PDF (texto e formas, 600 x 900 pt)")
+    measure_steps(pdf_path, args.pages, steps)
+    for width in (720, 1440):
+        results = measure_open(pdf_path, width)
+        direct, progressive = results[False], results[True]
+        print(
+            f"  abrir a {width} px: direto {direct[0]:6.1f} ms"
+            f"  |  prévia {progressive[0]:6.1f} ms, definitiva {progressive[1]:6.1f} ms"
+        )
+    print("CBZ (JPEG 1800 x 2700)")
+    measure_cbz_downscale(pymupdf, cbz_path, steps)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+"""Mede montagem do índice e latência de consultas do SearchIndex.
+
+Uso: python benchmarks/bench_search.py [--titles 50000]
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from search import SearchIndex
+
+WORDS = [
+    "amor", "coração", "escola", "príncipe", "ômega", "alfa", "sangue", "lua", "verão",
+    "segredo", "noite", "beijo", "destino", "dragão", "café", "estrela", "promessa",
+    "inverno", "cidade", "mar", "irmão", "vizinho", "love", "stage", "bank", "complex",
+    "alex", "blue", "spring", "garden", "sensei", "senpai", "rival", "contrato", "ídolo",
+]
+CATEGORIES = ["Omegaverse", "Escolar", "Fantasia", "Drama", "Comédia", "Ação"]
+QUERIES = ["lo", "love st", "coracao", "Coração", "omega", "dra", "a", "principe lua", "xyz", "senpai vol"]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--titles", type=int, default=50000)
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+
+    rng = random.Random(7)
+    index = SearchIndex()
+    start = time.perf_counter()
+    for book_id in range(args.titles):
+        title = " ".join(rng.sample(WORDS, rng.randint(2, 4))) + f" Vol. {rng.randint(1, 30)}"
+        index.add(book_id, title, rng.choice(CATEGORIES))
+    print(f"Índice com {len(index)} títulos montado em {time.perf_counter() - start:.2f} s\n")
+
+    worst = 0.0
+    for query in QUERIES:
+        samples = []
+        for _ in range(args.repeat):
+            t0 = time.perf_counter()
+            results = index.search(query)
+            samples.append((time.perf_counter() - t0) * 1000)
+        samples.sort()
+        p95 = samples[int(len(samples) * 0.95) - 1]
+        worst = max(worst, p95)
+        print(f"{query!r:<16} mediana {statistics.median(samples):6.2f} ms  p95 {p95:6.2f} ms  {len(results):3d} resultados")
+
+    print(f"\nPior p95: {worst:.2f} ms (meta: < 10 ms)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""Mede o arranque a frio do app: import, primeira pintura e home interativa.
+
+Cada rodada é um processo Python novo (como o APK abrindo), com o banco de
+uma biblioteca sintética já criado. Marcos medidos desde o início do processo:
+
+- import: `import main` (Flet incluído)
+- primeira pintura: o primeiro page.update() (a home em esqueleto)
+- interativa: a home preenchida, com busca e importação liberadas
+
+Uso: python benchmarks/bench_startup.py [--books 5000] [--runs 7]
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+START = time.perf_counter()
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+sys.path.insert(0, BENCH_DIR)
+
+
+def child():
+    """Uma rodada: roda no processo filho e imprime os marcos em JSON"""
+    import main as app_main
+
+    imported = time.perf_counter()
+    from headless import HeadlessPage
+
+    page = HeadlessPage("/")
+    called = time.perf_counter()
+    page.run(app_main.main(page))
+    times = page.headless.update_times
+    print(json.dumps({
+        "import": imported - START,
+        "first_paint": times[0] - START,
+        "interactive": times[-1] - START,
+        "main_to_first_paint": times[0] - called,
+        "updates": len(times),
+    }))
+
+
+def setup(books):
+    """Cria o banco com a biblioteca sintética (também num processo à parte)"""
+    import random
+
+    import main as app_main
+
+    library = app_main.load_library()
+    rng = random.Random(42)
+    categories = ["Omegaverse", "Escolar", "Fantasia", "Drama"]
+    library.add_books([
+        app_main.BLBook(f"Volume Sintético {i}", rng.choice(categories), "#7986CB", rng.randint(40, 400))
+        for i in range(books - len(library))
+    ])
+    library.flush()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--books", type=int, default=5000)
+    parser.add_argument("--runs", type=int, default=7)
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--setup", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.child:
+        return child()
+    if args.setup:
+        return setup(args.books)
+
+    env = dict(os.environ, FLET_APP_STORAGE_DATA=tempfile.mkdtemp(prefix="blreader-bench-"))
+    subprocess.run([sys.executable, __file__, "--setup", "--books", str(args.books)], env=env, check=True)
+
+    runs = []
+    for _ in range(args.runs):
+        output = subprocess.run(
+            [sys.executable, __file__, "--child"], env=env, check=True, capture_output=True, text=True
+        ).stdout
+        runs.append(json.loads(output.strip().splitlines()[-1]))
+
+    print(f"{args.books} livros, {args.runs} processos novos (mediana / pior)\n")
+    for key, label in (
+        ("import", "import main"),
+        ("first_paint", "primeira pintura"),
+        ("interactive", "home interativa"),
+        ("main_to_first_paint", "main() até a pintura"),
+    ):
+        values = [r[key] * 1000 for r in runs]
+        print(f"{label:<24} {statistics.median(values):8.1f} ms  {max(values):8.1f} ms")
+    print(f"\nAtualizações até a home interativa: {runs[0]['updates']}")
+
+
+if __name__ == "__main__":
+    main()
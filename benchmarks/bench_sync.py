@@ -0,0 +1,102 @@
+"""Mede o log de sincronização de progresso: tamanho, mesclagem e troca incremental.
+
+Dois aparelhos simulados gravam N eventos cada sobre os mesmos livros. Mede o
+tamanho do log, decodificar e mesclar tudo (conferindo contra um dict simples),
+a troca completa por pasta, uma troca incremental depois de poucos eventos
+novos e a compactação.
+
+Uso: python benchmarks/bench_sync.py [--events 100000] [--books 5000]
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sync_log import HEADER_SIZE, Decoder, Encoder, SyncLog, merge  # noqa: E402
+
+
+def make_events(rng, count, books, start):
+    events = []
+    timestamp = start
+    for _ in range(count):
+        timestamp += rng.uniform(0.5, 30)
+        events.append((f"h:{rng.randrange(books):064x}", rng.randrange(400), timestamp))
+    return events
+
+
+def naive_merge(events):
+    latest = {}
+    for key, page, timestamp in events:
+        if key not in latest or (timestamp, page) > (latest[key][1], latest[key][0]):
+            latest[key] = (page, timestamp)
+    return latest
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--events", type=int, default=100000)
+    parser.add_argument("--books", type=int, default=5000)
+    args = parser.parse_args()
+
+    rng = random.Random(3)
+    phone = make_events(rng, args.events, args.books, 1.7e9)
+    desktop = make_events(rng, args.events, args.books, 1.7e9 + 3600)
+
+    start = time.perf_counter()
+    encoded = bytearray()
+    encoder = Encoder()
+    for event in phone:
+        encoder.encode(encoded, *event)
+    encode_ms = (time.perf_counter() - start) * 1000
+    print(f"{args.events} eventos, {args.books} livros")
+    print(f"  log: {len(encoded) / 1024:.0f} KB ({len(encoded) / args.events:.1f} bytes/evento), codificar {encode_ms:.0f} ms")
+
+    start = time.perf_counter()
+    events, used = Decoder().decode(encoded)
+    latest = merge(events)
+    merge_ms = (time.perf_counter() - start) * 1000
+    assert used == len(encoded) and events == [(k, p, round(t * 1000) / 1000) for k, p, t in phone]
+    print(f"  decodificar + mesclar {len(events)} eventos: {merge_ms:.0f} ms")
+
+    # Dois aparelhos pela pasta, com SyncLog de verdade
+    folder = tempfile.mkdtemp(prefix="blreader-sync-")
+    logs = []
+    for name, device_events in (("celular", phone), ("desktop", desktop)):
+        log = SyncLog(os.path.join(tempfile.mkdtemp(prefix=f"blreader-{name}-"), "sync"))
+        log.set_folder(folder)
+        for event in device_events:
+            log.record(*event)
+        logs.append(log)
+    celular, computador = logs
+    applied = []
+    start = time.perf_counter()
+    # celular envia; computador recebe e envia; celular recebe
+    celular.exchange(lambda latest: applied.append(latest) or [])
+    computador.exchange(lambda latest: applied.append(latest) or [])
+    celular.exchange(lambda latest: applied.append(latest) or [])
+    exchange_ms = (time.perf_counter() - start) * 1000
+    rounded = lambda events: [(k, p, round(t * 1000) / 1000) for k, p, t in events]
+    assert applied[0] == naive_merge(rounded(phone)), "mesclagem divergente"
+    assert applied[1] == naive_merge(rounded(desktop)), "mesclagem divergente"
+    print(f"  troca completa pela pasta (2 aparelhos, 3 trocas, compactação inclusa): {exchange_ms:.0f} ms")
+    print(f"  log local após compactar: {os.path.getsize(celular.path) / 1024:.0f} KB ({celular.events} eventos)")
+
+    # Poucos eventos novos: a troca lê só os bytes acrescentados
+    for event in make_events(rng, 50, args.books, 1.8e9):
+        computador.record(*event)
+    computador.exchange(lambda latest: [])
+    before = celular.state["peers"][computador.device_id]["offset"]
+    start = time.perf_counter()
+    celular.exchange(lambda latest: applied.append(latest) or [])
+    incremental_ms = (time.perf_counter() - start) * 1000
+    read = celular.state["peers"][computador.device_id]["offset"] - before
+    print(f"  troca incremental com 50 eventos novos: {incremental_ms:.1f} ms, {read} bytes lidos, {len(applied[-1])} livros")
+    assert before >= HEADER_SIZE
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,149 @@
+import asyncio
+import json
+import time
+from types import SimpleNamespace
+
+import flet as ft
+from flet_core.local_connection import LocalConnection
+from flet_core.protocol import (
+    ClientActions,
+    ClientMessage,
+    CommandEncoder,
+    PageCommandsBatchResponsePayload,
+)
+
+# --- Página sem Cliente ---
+# Uma ft.Page de verdade ligada a uma conexão que só registra o que seria
+# enviado ao app Flutter. Serve para medir as views sem abrir janela.
+
+
+class HeadlessConnection(LocalConnection):
+    """Conexão que conta os controles e bytes de cada page.update()"""
+
+    def __init__(self):
+        super().__init__()
+        self.reset()
+
+    def reset(self):
+        self.updates = 0
+        self.added_controls = 0
+        self.payload_bytes = 0
+        self.update_times = []  # perf_counter de cada lote enviado
+
+    def send_command(self, session_id, command):
+        return self.send_commands(session_id, [command])
+
+    def send_commands(self, session_id, commands):
+        # Mesmo empacotamento do servidor do Flet: um lote por page.update()
+        self.updates += 1
+        self.update_times.append(time.perf_counter())
+        results = []
+        messages = []
+        for command in commands:
+            result, message = self._process_command(command)
+            if command.name == "add":
+                self.added_controls += len(result.split(" "))
+            if command.name in ("add", "get"):
+                results.append(result)
+            if message:
+                messages.append(message)
+        if messages:
+            batch = ClientMessage(ClientActions.PAGE_CONTROLS_BATCH, messages)
+            self.payload_bytes += len(json.dumps(batch, cls=CommandEncoder, separators=(",", ":")).encode("utf-8"))
+        return PageCommandsBatchResponsePayload(results=results, error="")
+
+
+class HeadlessPage(ft.Page):
+    """ft.Page que executa handlers (síncronos ou async) na hora e espera terminarem"""
+
+    def __init__(self, route="/"):
+        self.headless = HeadlessConnection()
+        self.browser_storage = {}  # localStorage do "navegador" (client_storage)
+        super().__init__(self.headless, "headless", asyncio.new_event_loop())
+        self._set_attr("route", route, False)
+        # O cliente Flutter informa a plataforma ao conectar: a do app desktop
+        self._set_attr("platform", "linux", False)
+
+    def _client_storage(self, method_name, arguments):
+        # Mesmo formato das respostas do cliente Flutter (o valor vem em JSON duas vezes)
+        if method_name == "clientStorage:get":
+            value = self.browser_storage.get(arguments["key"])
+            return json.dumps(value) if value is not None else None
+        if method_name == "clientStorage:set":
+            self.browser_storage[arguments["key"]] = arguments["value"]
+            return "true"
+        raise NotImplementedError(method_name)
+
+    def _invoke_method(self, method_name, arguments=None, control_id="", wait_for_result=False, wait_timeout=5):
+        if method_name.startswith("clientStorage:"):
+            return self._client_storage(method_name, arguments)
+        return super()._invoke_method(method_name, arguments, control_id, wait_for_result, wait_timeout)
+
+    async def _invoke_method_async(self, method_name, arguments=None, control_id="", wait_for_result=False, wait_timeout=5):
+        if method_name.startswith("clientStorage:"):
+            return self._client_storage(method_name, arguments)
+        return await super()._invoke_method_async(method_name, arguments, control_id, wait_for_result, wait_timeout)
+
+    def run(self, result):
+        """Completa o retorno de um handler e as tarefas que ele deixou no loop"""
+        if asyncio.iscoroutine(result):
+            if self.loop.is_running():
+                return self.loop.create_task(result)
+            self.loop.run_until_complete(result)
+        if self.loop.is_running():
+            return
+        pending = [t for t in asyncio.all_tasks(self.loop) if not t.done()]
+        while pending:
+            self.loop.run_until_complete(asyncio.gather(*pending, return_exceptions=True))
+            pending = [t for t in asyncio.all_tasks(self.loop) if not t.done()]
+
+    def go(self, route, skip_route_change_event=False, **kwargs):
+        self.route = route
+        if not skip_route_change_event and self.on_route_change:
+            self.run(self.on_route_change(ft.RouteChangeEvent(route=route)))
+
+
+def walk(control):
+    """Percorre a árvore de controles a partir de `control`"""
+    yield control
+    for child in control._get_children():
+        yield from walk(child)
+
+
+def find_book_card(view):
+    for control in walk(view):
+        if isinstance(control, ft.Container) and isinstance(control.data, tuple):
+            return control
+    return None
+
+
+def find_folder_card(view, name):
+    for control in walk(view):
+        if isinstance(control, ft.Container) and control.on_click and any(
+            isinstance(c, ft.Text) and c.value == name for c in walk(control)
+        ):
+            return control
+    return None
+
+
+def find_button(view, text):
+    for control in walk(view):
+        if isinstance(control, ft.ElevatedButton) and control.text == text:
+            return control
+    return None
+
+
+def find_control(view, control_type):
+    for control in walk(view):
+        if isinstance(control, control_type):
+            return control
+    return None
+
+
+def scroll_to_end(control, extent=10000.0):
+    """Dispara on_scroll como se a lista tivesse chegado ao fim"""
+    control.page.run(control.on_scroll(SimpleNamespace(pixels=extent, max_scroll_extent=extent, event_type="end")))
+
+
+def click(control):
+    control.page.run(control.on_click(None))
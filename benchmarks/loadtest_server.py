@@ -0,0 +1,154 @@
+"""Teste de carga do modo servidor: centenas de sessões simuladas ao mesmo tempo.
+
+Cada sessão é uma HeadlessPage numa thread própria com o seu "navegador"
+(client_storage). Parte dos leitores abre duas abas, que viram páginas do
+mesmo livro ao mesmo tempo. No fim confere que cada leitor ficou com o seu
+progresso (na memória e no banco), que o catálogo não foi duplicado e quanto
+o cache de páginas compartilhado economizou.
+
+Uso: python benchmarks/loadtest_server.py [--sessions 200] [--turns 20] [--books 5000]
+"""
+import argparse
+import os
+import random
+import resource
+import sys
+import tempfile
+import threading
+import time
+import zipfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+
+def make_cbz(pymupdf, path, pages):
+    with pymupdf.open() as doc:
+        page = doc.new_page(width=300, height=450)
+        png = page.get_pixmap().tobytes("png")
+    with zipfile.ZipFile(path, "w", zipfile.ZIP_STORED) as archive:
+        for i in range(pages):
+            archive.writestr(f"{i:04d}.png", png)
+
+
+def percentile(values, fraction):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * fraction))] if values else 0.0
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sessions", type=int, default=200)
+    parser.add_argument("--turns", type=int, default=20)
+    parser.add_argument("--books", type=int, default=5000)
+    parser.add_argument("--files", type=int, default=8, help="livros com arquivo CBZ de verdade")
+    args = parser.parse_args()
+
+    data_dir = tempfile.mkdtemp(prefix="blreader-server-")
+    os.environ["FLET_APP_STORAGE_DATA"] = data_dir
+    os.environ["BLREADER_SERVER"] = "1"
+
+    import pymupdf
+
+    import main as app_main
+    from bench_navigation import synthetic_books
+    from headless import HeadlessPage, click, find_button, find_control, walk
+    import flet as ft
+
+    library = app_main.load_library()
+    library.add_books(synthetic_books(app_main.BLBook, args.books - len(library)))
+    books = []
+    for i in range(args.files):
+        path = os.path.join(data_dir, f"volume-{i}.cbz")
+        make_cbz(pymupdf, path, 60)
+        books.append(app_main.BLBook(f"Volume do Clube {i}", "Escolar", "#7986CB", 60, path))
+    # Os livros com arquivo são os mais recentes do catálogo: aparecem no Ver tudo
+    library.add_books(books)
+
+    # Três quartos de leitores: o resto das sessões é segunda aba de alguém
+    readers = [f"leitor-{i:04d}" for i in range(max(1, args.sessions * 3 // 4))]
+    plans = []
+    for number in range(args.sessions):
+        reader = readers[number % len(readers)]
+        plans.append((reader, books[readers.index(reader) % len(books)], random.Random(number)))
+
+    start_barrier = threading.Barrier(args.sessions)
+    lock = threading.Lock()
+    open_times, turn_times, finals, errors = [], [], [], []
+
+    def session(reader, book, session_rng):
+        try:
+            page = HeadlessPage("/")
+            page.browser_storage[app_main.READER_ID_KEY] = f'"{reader}"'
+            start_barrier.wait()
+            page.run(app_main.main(page))
+            page.go("/recent")
+            card = next(
+                c for c in walk(page.views[-1])
+                if isinstance(c, ft.Container) and isinstance(c.data, tuple) and c.data[0] is book
+            )
+            started = time.perf_counter()
+            click(card)
+            opened = (time.perf_counter() - started) * 1000
+            next_button = find_button(page.views[-1], "Próximo")
+            counter = find_control(page.views[-1].controls[1], ft.Text)
+            turns = []
+            for _ in range(args.turns):
+                time.sleep(session_rng.random() * 0.005)
+                started = time.perf_counter()
+                click(next_button)
+                turns.append((time.perf_counter() - started) * 1000)
+            final_page = int(counter.value.split("Página ")[1].split(" ")[0])
+            page.go("/")
+            with lock:
+                open_times.append(opened)
+                turn_times.extend(turns)
+                finals.append((reader, book, final_page))
+        except Exception as error:
+            with lock:
+                errors.append(repr(error))
+
+    rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    started = time.perf_counter()
+    threads = [threading.Thread(target=session, args=plan) for plan in plans]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+    rss_after = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    library.flush()
+
+    print(f"{args.sessions} sessões, {len(readers)} leitores, {len(library)} livros no catálogo")
+    print(f"  tempo total {elapsed:.1f} s, {len(errors)} erros")
+    for error in errors[:5]:
+        print(f"    {error}")
+    print(f"  abrir livro   p50 {percentile(open_times, 0.5):6.1f} ms  p95 {percentile(open_times, 0.95):6.1f} ms")
+    print(f"  virar página  p50 {percentile(turn_times, 0.5):6.1f} ms  p95 {percentile(turn_times, 0.95):6.1f} ms")
+    print(f"  memória: +{(rss_after - rss_before) / 1024:.0f} MB, ~{(rss_after - rss_before) / max(1, args.sessions):.0f} KB por sessão")
+    print(f"  BLBooks em memória: {len(library._books)} (um por livro, para todas as sessões)")
+    stats = app_main.page_cache.stats()
+    print(f"  cache de páginas compartilhado: {stats['entries']} páginas, acerto {stats['hit_rate']:.0%}")
+
+    # Conferência: cada leitor tem o seu progresso, igual na memória e no banco
+    wrong = 0
+    by_reader = {}
+    for reader, book, final_page in finals:
+        by_reader.setdefault((reader, book.id), set()).add(final_page)
+    for (reader, book_id), pages in by_reader.items():
+        progress = library.progress_for(reader)
+        stored = dict((row[0], row[1]) for row in library.store.user_progress_rows(reader))
+        in_memory = progress._pages.get(book_id)
+        # Duas abas do mesmo livro: vale a página de uma delas (a última gravada)
+        if in_memory not in pages or stored.get(book_id) != in_memory:
+            wrong += 1
+    local_pages = {book.id: book.current_page for book in books}
+    print(f"  progresso conferido para {len(by_reader)} leitores: {wrong} divergências")
+    print(f"  progresso do catálogo intocado: {all(page == 0 for page in local_pages.values())}")
+    if errors or wrong:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,159 @@
+"""Suíte headless das views: tempo, controles, payload e memória por rota.
+
+Para cada tamanho de biblioteca sintética (100 a 100k livros) um banco é
+criado num processo à parte e o app é aberto num processo novo, que percorre
+as rotas com `main(page)` numa HeadlessPage. A memória (pico do tracemalloc)
+é medida numa segunda passada, para não distorcer os tempos.
+
+    python benchmarks/suite.py                      # mede e compara com o baseline
+    python benchmarks/suite.py --save-baseline      # grava benchmarks/baseline.json
+    python benchmarks/suite.py --sizes 100,1000     # só alguns tamanhos
+
+Sai com código 1 se alguma métrica piorar além da tolerância (ver TOLERANCES).
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+sys.path.insert(0, BENCH_DIR)
+
+BASELINE_PATH = os.path.join(BENCH_DIR, "baseline.json")
+DEFAULT_SIZES = "100,1000,10000,100000"
+
+# Piora aceita por métrica: (fator, folga absoluta). Tempo varia entre máquinas
+# e execuções; controles e bytes são determinísticos e quase não têm folga.
+TOLERANCES = {
+    "ms": (1.5, 5.0),
+    "controls": (1.05, 2),
+    "bytes": (1.05, 256),
+    "peak_kb": (1.25, 256),
+}
+
+
+def run_routes(trace_memory):
+    """Percorre as rotas no processo atual; devolve [(passo, métricas)]"""
+    import tracemalloc
+
+    import flet as ft
+    import main as app_main
+    from headless import HeadlessPage, click, find_book_card, find_button, find_control, find_folder_card, scroll_to_end
+
+    page = HeadlessPage("/")
+    connection = page.headless
+    steps = [
+        ("primeira pintura (/)", lambda: page.run(app_main.main(page))),
+        ("abrir pasta (/category)", lambda: click(find_folder_card(page.views[0], "Escolar"))),
+        ("rolar a pasta", lambda: scroll_to_end(find_control(page.views[-1], ft.GridView))),
+        ("voltar para home", lambda: page.go("/")),
+        ("ver tudo (/recent)", lambda: page.go("/recent")),
+        ("rolar ver tudo", lambda: scroll_to_end(find_control(page.views[-1], ft.GridView))),
+        ("voltar para home", lambda: page.go("/")),
+        ("abrir livro (/reader)", lambda: click(find_book_card(page.views[0]))),
+        ("próxima página", lambda: click(find_button(page.views[-1], "Próximo"))),
+        ("voltar do leitor", lambda: page.go("/")),
+    ]
+    results = []
+    if trace_memory:
+        tracemalloc.start()
+    for label, action in steps:
+        connection.reset()
+        if trace_memory:
+            tracemalloc.reset_peak()
+            base, _ = tracemalloc.get_traced_memory()
+        start = time.perf_counter()
+        action()
+        elapsed = (time.perf_counter() - start) * 1000
+        metrics = {"ms": elapsed, "controls": connection.added_controls, "bytes": connection.payload_bytes}
+        if trace_memory:
+            metrics["peak_kb"] = (tracemalloc.get_traced_memory()[1] - base) / 1024
+        results.append((label, metrics))
+    return results
+
+
+def create_library(books):
+    import main as app_main
+    from bench_navigation import synthetic_books
+
+    library = app_main.load_library()
+    library.add_books(synthetic_books(app_main.BLBook, books - len(library)))
+    library.flush()
+
+
+def measure_size(books):
+    env = dict(os.environ, FLET_APP_STORAGE_DATA=tempfile.mkdtemp(prefix="blreader-suite-"))
+    run = lambda *flags: subprocess.run(
+        [sys.executable, __file__, *flags], env=env, check=True, capture_output=True, text=True
+    ).stdout
+    run("--create", str(books))
+    timed = json.loads(run("--routes"))
+    traced = json.loads(run("--routes", "--trace-memory"))
+    # Mesmo passo nas duas passadas: tempos da primeira, memória da segunda
+    return [[label, dict(metrics, peak_kb=memory["peak_kb"])] for (label, metrics), (_, memory) in zip(timed, traced)]
+
+
+def regressed(metric, value, reference):
+    factor, slack = TOLERANCES[metric]
+    return value > reference * factor + slack
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", default=DEFAULT_SIZES)
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument("--baseline", default=BASELINE_PATH)
+    parser.add_argument("--create", type=int, help=argparse.SUPPRESS)
+    parser.add_argument("--routes", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--trace-memory", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.create is not None:
+        return create_library(args.create)
+    if args.routes:
+        return print(json.dumps(run_routes(args.trace_memory)))
+
+    baseline = {}
+    if not args.save_baseline and os.path.exists(args.baseline):
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+
+    report = {}
+    failures = []
+    for books in (int(s) for s in args.sizes.split(",")):
+        steps = measure_size(books)
+        report[str(books)] = steps
+        reference_steps = baseline.get(str(books), [])
+        print(f"\n{books} livros")
+        print(f"  {'passo':<26} {'ms':>8} {'controles':>10} {'bytes':>9} {'pico KB':>9}")
+        for position, (label, metrics) in enumerate(steps):
+            known = reference_steps[position][1] if position < len(reference_steps) else None
+            flags = []
+            for metric in TOLERANCES:
+                if known and regressed(metric, metrics[metric], known[metric]):
+                    flags.append(f"{metric} {known[metric]:.0f}→{metrics[metric]:.0f}")
+            print(
+                f"  {label:<26} {metrics['ms']:8.1f} {metrics['controls']:10d} {metrics['bytes']:9d}"
+                f" {metrics['peak_kb']:9.0f}" + (f"  PIOROU: {', '.join(flags)}" if flags else "")
+            )
+            failures.extend(f"{books} livros / {label}: {flag}" for flag in flags)
+
+    if args.save_baseline:
+        with open(args.baseline, "w", encoding="utf-8", newline="\r\n") as f:
+            json.dump(report, f, ensure_ascii=False, indent=1)
+        print(f"\nBaseline gravado em {args.baseline}")
+    elif not baseline:
+        print("\nSem baseline para comparar (use --save-baseline)")
+    elif failures:
+        print(f"\n{len(failures)} regressões em relação ao baseline")
+        sys.exit(1)
+    else:
+        print("\nNenhuma regressão em relação ao baseline")
+
+
+if __name__ == "__main__":
+    main()
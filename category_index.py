@@ -0,0 +1,88 @@
+import bisect
+import threading
+
+# --- Índice de Pastas ---
+# Cada pasta guarda seus livros já em ordem alfabética: contar é O(1) e
+# listar uma página da pasta é O(k), sem varrer a biblioteca.
+
+
+class CategoryIndex:
+    """Pasta -> livros (ordenados pelo título), com suporte a livros em várias pastas"""
+
+    def __init__(self, rows=(), tags=()):
+        """rows: (id, título, categoria) e tags: (id, pasta) iniciais. Cada pasta é
+        ordenada uma vez só; add() fica para as inclusões depois disso"""
+        self._members = {}  # pasta -> lista ordenada de (chave do título, id)
+        self._books = {}  # id -> (chave do título, set de pastas)
+        self._lock = threading.RLock()
+        for book_id, title, category in rows:
+            key = title.casefold()
+            self._books[book_id] = (key, {category})
+            self._members.setdefault(category, []).append((key, book_id))
+        for book_id, tag in tags:
+            entry = self._books.get(book_id)
+            if entry is not None and tag not in entry[1]:
+                entry[1].add(tag)
+                self._members.setdefault(tag, []).append((entry[0], book_id))
+        for members in self._members.values():
+            members.sort()
+
+    def add(self, book_id, title, categories):
+        with self._lock:
+            if book_id in self._books:
+                self.remove(book_id)
+            key = title.casefold()
+            self._books[book_id] = (key, set(categories))
+            for category in categories:
+                bisect.insort(self._members.setdefault(category, []), (key, book_id))
+
+    def remove(self, book_id):
+        with self._lock:
+            entry = self._books.pop(book_id, None)
+            if entry is None:
+                return
+            key, categories = entry
+            for category in categories:
+                self._discard(category, key, book_id)
+
+    def add_to(self, book_id, category):
+        """Coloca o livro em mais uma pasta (tag)"""
+        with self._lock:
+            key, categories = self._books[book_id]
+            if category not in categories:
+                categories.add(category)
+                bisect.insort(self._members.setdefault(category, []), (key, book_id))
+
+    def remove_from(self, book_id, category):
+        with self._lock:
+            key, categories = self._books[book_id]
+            if category in categories:
+                categories.discard(category)
+                self._discard(category, key, book_id)
+
+    def _discard(self, category, key, book_id):
+        members = self._members[category]
+        position = bisect.bisect_left(members, (key, book_id))
+        if position < len(members) and members[position] == (key, book_id):
+            del members[position]
+        if not members:
+            del self._members[category]
+
+    def count(self, category):
+        with self._lock:
+            return len(self._members.get(category, ()))
+
+    def ids(self, category, limit=-1, offset=0):
+        with self._lock:
+            members = self._members.get(category, ())
+            end = len(members) if limit < 0 else offset + limit
+            return [book_id for _, book_id in members[offset:end]]
+
+    def categories_of(self, book_id):
+        with self._lock:
+            entry = self._books.get(book_id)
+            return set(entry[1]) if entry else set()
+
+    def categories(self):
+        with self._lock:
+            return list(self._members)
@@ -0,0 +1,69 @@
+import bisect
+import posixpath
+
+# --- Índice de Capítulos ---
+# Capítulos vêm do sumário (outline) do PDF ou das subpastas do CBZ. Cada
+# livro guarda só a página inicial de cada um, em ordem: achar o capítulo de
+# uma página é um bisect.
+
+
+class ChapterIndex:
+    """Páginas iniciais (base 0) e títulos dos capítulos de um livro"""
+
+    __slots__ = ("starts", "titles")
+
+    def __init__(self, chapters=()):
+        self.starts = [start for start, _ in chapters]
+        self.titles = [title for _, title in chapters]
+
+    def __len__(self):
+        return len(self.starts)
+
+    def chapter_of(self, page):
+        """Número do capítulo (base 0) que contém a página, ou None antes do primeiro"""
+        position = bisect.bisect_right(self.starts, page) - 1
+        return position if position >= 0 else None
+
+    def start_of(self, number):
+        return self.starts[number]
+
+    def title_of(self, number):
+        return self.titles[number]
+
+    def items(self):
+        return list(zip(self.starts, self.titles))
+
+
+def _normalize(chapters, page_count):
+    """Ordena, descarta páginas fora do livro e capítulos que começam na mesma página"""
+    result = []
+    for start, title in sorted(chapters, key=lambda c: c[0]):
+        if 0 <= start < page_count and (not result or result[-1][0] != start):
+            result.append((start, title.strip() or f"Capítulo {len(result) + 1}"))
+    return result
+
+
+def pdf_chapters(doc):
+    """Capítulos do sumário do PDF (PyMuPDF), no nível mais raso com mais de uma entrada.
+
+    Um sumário com só o título do livro no topo usa os itens de baixo.
+    """
+    toc = [(level, title, page - 1) for level, title, page, *_ in doc.get_toc(simple=True) if page > 0]
+    levels = sorted({level for level, _, _ in toc})
+    if not levels:
+        return []
+    chosen = next((lv for lv in levels if sum(1 for level, _, _ in toc if level == lv) > 1), levels[0])
+    return _normalize([(page, title) for level, title, page in toc if level == chosen], doc.page_count)
+
+
+def folder_chapters(names):
+    """Capítulos de um CBZ: cada subpasta das páginas (já ordenadas) é um capítulo"""
+    chapters = []
+    last_folder = None
+    for index, name in enumerate(names):
+        folder = posixpath.dirname(name)
+        if folder != last_folder:
+            chapters.append((index, posixpath.basename(folder)))
+            last_folder = folder
+    # Tudo numa pasta só não é divisão em capítulos
+    return _normalize(chapters, len(names)) if len(chapters) > 1 else []
@@ -0,0 +1,89 @@
+import os
+import threading
+from collections import OrderedDict
+
+# --- Cache em Disco ---
+# Uma pasta de arquivos limitada em bytes, com os mais antigos saindo primeiro.
+# O conteúdo é listado uma vez (scandir); depois saber se um arquivo existe é
+# uma consulta em memória.
+
+
+class DiskCache:
+    """Pasta de arquivos `<nome><suffix>` limitada em bytes (LRU pela ordem de uso)"""
+
+    def __init__(self, root, max_bytes, suffix):
+        self.root = root
+        self.max_bytes = max_bytes
+        self.suffix = suffix
+        self.current_bytes = 0
+        self._entries = None  # nome do arquivo -> bytes, em ordem de uso
+        self._lock = threading.Lock()
+
+    def _load(self):
+        if self._entries is not None:
+            return
+        os.makedirs(self.root, exist_ok=True)
+        found = []
+        with os.scandir(self.root) as it:
+            for entry in it:
+                if entry.name.endswith(self.suffix):
+                    stat = entry.stat()
+                    found.append((stat.st_mtime, entry.name, stat.st_size))
+        found.sort()
+        self._entries = OrderedDict((name, size) for _, name, size in found)
+        self.current_bytes = sum(self._entries.values())
+
+    def preload(self):
+        """Lê a pasta agora (fora do loop de eventos), não na primeira consulta"""
+        with self._lock:
+            self._load()
+
+    def __contains__(self, name):
+        with self._lock:
+            self._load()
+            return name + self.suffix in self._entries
+
+    def path_of(self, name):
+        """Caminho do arquivo pronto, ou None"""
+        filename = name + self.suffix
+        with self._lock:
+            self._load()
+            if filename not in self._entries:
+                return None
+            self._entries.move_to_end(filename)
+            return os.path.join(self.root, filename)
+
+    def read(self, name):
+        path = self.path_of(name)
+        if path is None:
+            return None
+        try:
+            with open(path, "rb") as f:
+                return f.read()
+        except FileNotFoundError:
+            return None
+
+    def write(self, name, data):
+        self.write_many({name: data})
+
+    def write_many(self, items):
+        with self._lock:
+            self._load()
+            for name, data in items.items():
+                filename = name + self.suffix
+                temp = os.path.join(self.root, filename + ".tmp")
+                with open(temp, "wb") as f:
+                    f.write(data)
+                os.replace(temp, os.path.join(self.root, filename))
+                self.current_bytes += len(data) - self._entries.pop(filename, 0)
+                self._entries[filename] = len(data)
+            self._evict()
+
+    def _evict(self):
+        while self.current_bytes > self.max_bytes and len(self._entries) > 1:
+            filename, size = self._entries.popitem(last=False)
+            self.current_bytes -= size
+            try:
+                os.remove(os.path.join(self.root, filename))
+            except FileNotFoundError:
+                pass
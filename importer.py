@@ -0,0 +1,238 @@
+import concurrent.futures
+import hashlib
+import os
+import queue
+import threading
+import time
+
+from chapters import folder_chapters, pdf_chapters
+from thumbnails import IMAGE_EXTENSIONS, render_thumbnails
+from zipindex import MappedZip
+
+# --- Importação de Arquivos ---
+# Hash e extração (título, nº de páginas, capítulos, miniaturas da capa) rodam num pool de processos;
+# a thread coordenadora só decide o que importar e repassa os resultados. O hash vem
+# primeiro: um conteúdo que a biblioteca já tem (a mesma obra em outra pasta) não
+# passa pela extração, só vira mais um caminho do livro existente.
+
+SUPPORTED_EXTENSIONS = (".pdf", ".cbz", ".zip")
+HASH_CHUNK = 1024 * 1024
+
+
+def scan_paths(paths):
+    """Arquivos suportados nos caminhos dados (pastas são percorridas)"""
+    found = []
+    for path in paths:
+        if os.path.isdir(path):
+            for folder, _, names in os.walk(path):
+                found.extend(
+                    os.path.join(folder, n) for n in sorted(names) if n.lower().endswith(SUPPORTED_EXTENSIONS)
+                )
+        elif path.lower().endswith(SUPPORTED_EXTENSIONS):
+            found.append(path)
+    return found
+
+
+def hash_file(path):
+    """SHA-256 do conteúdo, lido em blocos num buffer reaproveitado (nunca o arquivo inteiro)"""
+    digest = hashlib.sha256()
+    buffer = bytearray(HASH_CHUNK)
+    view = memoryview(buffer)
+    with open(path, "rb", buffering=0) as f:
+        while True:
+            size = f.readinto(buffer)
+            if not size:
+                return digest.hexdigest()
+            digest.update(view[:size])
+
+
+def extract_metadata(path, content_hash):
+    """Roda no processo de trabalho, só para conteúdos novos. Devolve um dict simples (picklable)"""
+    import pymupdf
+
+    title = os.path.splitext(os.path.basename(path))[0]
+    if path.lower().endswith(".pdf"):
+        with pymupdf.open(path) as doc:
+            title = (doc.metadata or {}).get("title") or title
+            page_count = doc.page_count
+            chapters = pdf_chapters(doc)
+    else:
+        with MappedZip(path) as archive:
+            names = sorted(n for n in archive.namelist() if n.lower().endswith(IMAGE_EXTENSIONS))
+        page_count = len(names)
+        chapters = folder_chapters(names)
+    return {
+        "path": path,
+        "hash": content_hash,
+        "title": title,
+        "page_count": page_count,
+        "chapters": chapters,
+        "thumbnails": render_thumbnails(path) if page_count else {},
+    }
+
+
+def _create_executor(max_workers):
+    # No Android não há multiprocessing completo: cai para threads. O except só usa
+    # nomes de concurrent.futures: sem multiprocessing, concurrent.futures.process nem carrega
+    executor = None
+    try:
+        executor = concurrent.futures.ProcessPoolExecutor(max_workers=max_workers)
+        executor.submit(os.getpid).result(timeout=10)
+        return executor
+    except (ImportError, NotImplementedError, OSError, concurrent.futures.BrokenExecutor, concurrent.futures.TimeoutError):
+        if executor is not None:
+            # Pool que não respondeu ao teste: não deixa processos pendurados
+            executor.shutdown(wait=False, cancel_futures=True)
+        return concurrent.futures.ThreadPoolExecutor(max_workers=max_workers)
+
+
+class ImportJob:
+    """Importa arquivos em segundo plano, com progresso e cancelamento.
+
+    on_results(list de dicts) recebe os livros prontos em lotes;
+    on_progress(feitos, total) e on_done(cancelado) avisam a interface.
+    """
+
+    def __init__(self, store, paths, on_results, on_progress=None, on_done=None, max_workers=None, batch_interval=0.5):
+        self.store = store
+        self.paths = paths
+        self.on_results = on_results
+        self.on_progress = on_progress
+        self.on_done = on_done
+        self.max_workers = max_workers or max(1, min(4, (os.cpu_count() or 2) - 1))
+        self.batch_interval = batch_interval
+        self.cancelled = threading.Event()
+        self.done = 0
+        self.total = 0
+        self.skipped = 0  # Sem mudanças: os pulados antes do hash não entram em done/total
+        self.imported = 0  # Conteúdos novos extraídos
+        self.duplicates = 0  # Cópias de conteúdos que a biblioteca já tem
+        self.failed = []
+        self._thread = threading.Thread(target=self._run, name="import", daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def cancel(self):
+        self.cancelled.set()
+
+    def join(self, timeout=None):
+        self._thread.join(timeout)
+
+    def _pending_files(self):
+        """Separa os arquivos novos/alterados; size+mtime iguais nem chegam a ser lidos"""
+        pending = []
+        for path in scan_paths(self.paths):
+            try:
+                stat = os.stat(path)
+            except OSError as error:
+                # Link quebrado ou arquivo apagado durante a varredura: só ele fica de fora
+                self.failed.append((path, error))
+                continue
+            record = self.store.imported_file(path)
+            if record and record[0] == stat.st_size and record[1] == stat.st_mtime_ns:
+                self.skipped += 1
+                continue
+            pending.append((path, stat.st_size, stat.st_mtime_ns, record[2] if record else None))
+        return pending
+
+    def _run(self):
+        try:
+            pending = self._pending_files()
+            self.total = len(pending)
+            self._report()
+            if pending and not self.cancelled.is_set():
+                self._extract(pending)
+        finally:
+            if self.on_done:
+                self.on_done(self.cancelled.is_set())
+
+    def _extract(self, pending):
+        stats = {path: (size, mtime) for path, size, mtime, _ in pending}
+        known = {path: known_hash for path, _, _, known_hash in pending}
+        executor = _create_executor(self.max_workers)
+        # Tarefas de hash e de extração terminam nesta fila, na ordem em que ficam prontas
+        finished = queue.Queue()
+        running = {}  # future -> (caminho, hash; None enquanto é a tarefa de hash)
+        waiting = {}  # hash em extração -> cópias dele que aguardam o original
+        extracted = set()  # hashes já extraídos nesta importação (talvez ainda não no banco)
+        to_hash = iter(stats)
+        hashing = [0]
+        batch = []
+        last_flush = time.monotonic()
+
+        def submit(path, content_hash, *call):
+            future = executor.submit(*call)
+            running[future] = (path, content_hash)
+            future.add_done_callback(finished.put)
+
+        def feed():
+            # Poucos hashes por vez: as extrações entram na fila logo, não depois de todos os hashes
+            for path in to_hash:
+                submit(path, None, hash_file, path)
+                hashing[0] += 1
+                if hashing[0] >= 2 * self.max_workers:
+                    return
+
+        def add(result):
+            self.done += 1
+            result["size"], result["mtime_ns"] = stats[result["path"]]
+            batch.append(result)
+
+        def duplicate(path, content_hash):
+            self.duplicates += 1
+            add({"path": path, "hash": content_hash, "duplicate": True})
+
+        try:
+            feed()
+            while running and not self.cancelled.is_set():
+                future = finished.get()
+                path, content_hash = running.pop(future)
+                if content_hash is None:
+                    hashing[0] -= 1
+                    feed()
+                try:
+                    value = future.result()
+                except Exception as error:
+                    # Se a extração falhou, as cópias do mesmo conteúdo falhariam igual
+                    for failed_path in [path] + waiting.pop(content_hash, []):
+                        self.done += 1
+                        self.failed.append((failed_path, error))
+                    self._report()
+                    continue
+                if content_hash is None:
+                    content_hash = value
+                    if content_hash == known[path]:
+                        # Arquivo só foi "tocado": atualiza a assinatura e segue
+                        self.store.touch_imported_file(path, *stats[path])
+                        self.done += 1
+                        self.skipped += 1
+                    elif content_hash in waiting:
+                        waiting[content_hash].append(path)
+                    elif content_hash in extracted or self.store.ids_by_hash([content_hash]):
+                        duplicate(path, content_hash)
+                    else:
+                        waiting[content_hash] = []
+                        submit(path, content_hash, extract_metadata, path, content_hash)
+                else:
+                    extracted.add(content_hash)
+                    self.imported += 1
+                    add(value)
+                    # As cópias vão no mesmo lote, depois do original
+                    for copy in waiting.pop(content_hash):
+                        duplicate(copy, content_hash)
+                if batch and time.monotonic() - last_flush >= self.batch_interval:
+                    self.on_results(batch)
+                    batch = []
+                    last_flush = time.monotonic()
+                self._report()
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+            if batch:
+                self.on_results(batch)
+            self._report()
+
+    def _report(self):
+        if self.on_progress:
+            self.on_progress(self.done, self.total)
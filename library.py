@@ -0,0 +1,452 @@
+import datetime
+import os
+import sys
+import threading
+import time
+
+from category_index import CategoryIndex
+from chapters import ChapterIndex
+from recency_index import RecencyIndex
+from search import SearchIndex
+
+# Cores das pastas que ainda não foram personalizadas (DeepPurple / DeepPurple50)
+DEFAULT_FOLDER_STYLE = ("FOLDER", "#673AB7", "#EDE7F6")
+# Cores para a capa provisória dos livros importados
+COVER_PALETTE = ["#7986CB", "#5C6BC0", "#F48FB1", "#9575CD", "#4DB6AC", "#FF8A65"]
+
+def sync_key(book):
+    """Identidade do livro entre aparelhos: o hash do arquivo (os ids do banco são locais)"""
+    return f"h:{book.content_hash}" if book.content_hash else f"t:{book.title}"
+
+
+# --- Classes de Dados ---
+class BLBook:
+    # Sem __dict__ por instância: com 100k+ livros em memória a diferença é grande
+    __slots__ = ("id", "title", "category", "cover_color", "current_page", "total_pages", "last_read_ts", "path", "content_hash")
+
+    def __init__(self, title, category, cover_color, total_pages=100, path=None):
+        self.id = None  # Atribuído pelo banco
+        self.title = title
+        # Poucos valores distintos repetidos em todos os livros: uma cópia só
+        self.category = sys.intern(category)
+        self.cover_color = sys.intern(cover_color)
+        self.current_page = 0
+        self.total_pages = total_pages
+        self.last_read_ts = datetime.datetime.now().timestamp()  # Epoch em segundos
+        self.path = path  # Arquivo PDF/CBZ no aparelho (None = livro de exemplo)
+        self.content_hash = None  # SHA-256 do arquivo, preenchido na importação
+
+    @property
+    def last_read(self):
+        return datetime.datetime.fromtimestamp(self.last_read_ts)
+
+    @last_read.setter
+    def last_read(self, value):
+        self.last_read_ts = value.timestamp()
+
+
+class Library:
+    """Biblioteca carregada sob demanda a partir do LibraryStore.
+
+    Cada consulta usa um índice do banco; um livro vira BLBook só quando
+    alguma tela precisa dele, e continua sendo o mesmo objeto depois disso.
+    """
+
+    def __init__(self, store, progress_writer, sync_log=None):
+        self.store = store
+        self.progress_writer = progress_writer
+        self.sync_log = sync_log  # Log de progresso trocado com outros aparelhos (sync_log.py)
+        self._books = {}
+        self._chapters = {}  # id -> ChapterIndex, carregado na primeira consulta
+        self._search_index = None
+        self._index_lock = threading.Lock()
+        self._category_index = None
+        self._category_lock = threading.Lock()
+        self._recency_index = None
+        self._recency_lock = threading.Lock()
+        self._progress = {}  # user_id -> progresso daquele usuário (None = app local)
+        self._progress_lock = threading.Lock()
+
+    def _book_from_row(self, row):
+        book_id, title, category, cover_color, path, current_page, total_pages, last_read, content_hash = row
+        book = self._books.get(book_id)
+        if book is None:
+            book = BLBook(title, category, cover_color, total_pages, path)
+            book.id = book_id
+            book.current_page = current_page
+            book.last_read_ts = last_read
+            book.content_hash = content_hash
+            # Sessões do modo servidor carregam em paralelo: fica o primeiro objeto criado
+            book = self._books.setdefault(book_id, book)
+        return book
+
+    def _get_books(self, ids):
+        """BLBooks dos ids, indo ao banco só pelos que ainda não estão em memória"""
+        missing = [i for i in ids if i not in self._books]
+        for row in self.store.by_ids(missing):
+            self._book_from_row(row)
+        return [self._books[i] for i in ids if i in self._books]
+
+    def __iter__(self):
+        for row in self.store.iter_books():
+            yield self._book_from_row(row)
+
+    def __len__(self):
+        return self.store.count()
+
+    def add_books(self, books):
+        rows = [
+            (b.title, b.category, b.cover_color, b.path, b.current_page, b.total_pages, b.last_read_ts, b.content_hash)
+            for b in books
+        ]
+        for book, book_id in zip(books, self.store.insert_books(rows)):
+            book.id = book_id
+            self._books[book_id] = book
+        # Se o índice estiver sendo montado agora, espera e completa depois
+        with self._index_lock:
+            if self._search_index is not None:
+                for book in books:
+                    self._search_index.add(book.id, book.title, book.category)
+        with self._category_lock:
+            if self._category_index is not None:
+                for book in books:
+                    self._category_index.add(book.id, book.title, [book.category])
+        with self._recency_lock:
+            if self._recency_index is not None:
+                for book in books:
+                    self._recency_index.touch(book.id, book.last_read_ts)
+
+    def add_imported(self, results, category_of):
+        """Cria/atualiza livros a partir dos resultados do ImportJob.
+
+        Um livro por conteúdo: um arquivo com o hash de um livro que já existe
+        (cópia em outra pasta, renomeado) só ganha um caminho a mais nele.
+        category_of(path) decide a pasta dos livros novos. Devolve os BLBooks
+        criados ou alterados.
+        """
+        by_hash = self.store.ids_by_hash(list({r["hash"] for r in results}))
+        new_books = {}  # hash -> BLBook criado neste lote
+        updated = []
+        extracted = {}  # caminho -> id dos livros com metadados novos
+        for result in results:
+            content_hash = result["hash"]
+            record = self.store.imported_file(result["path"])
+            previous = record[3] if record else None
+            if content_hash in by_hash or content_hash in new_books or result.get("duplicate"):
+                if previous is not None and previous != by_hash.get(content_hash):
+                    self._drop_path(previous, result["path"])
+                continue
+            if previous is not None and self.store.paths_of(previous) == [result["path"]]:
+                # Mesmo caminho com conteúdo novo: atualiza o livro existente
+                self.store.update_book_file(previous, result["page_count"], content_hash)
+                book = self._get_books([previous])
+                if book:
+                    book[0].total_pages = result["page_count"]
+                    book[0].content_hash = content_hash
+                    updated.extend(book)
+                by_hash[content_hash] = extracted[result["path"]] = previous
+                continue
+            if previous is not None:
+                # O arquivo mudou, mas as cópias do conteúdo antigo continuam com o livro antigo
+                self._drop_path(previous, result["path"])
+            palette = COVER_PALETTE[int(content_hash[:8], 16) % len(COVER_PALETTE)]
+            book = BLBook(result["title"], category_of(result["path"]), palette, result["page_count"], result["path"])
+            book.content_hash = content_hash
+            # Ainda não lido: não deve empurrar os livros em andamento do Continuar Lendo
+            book.last_read_ts = 0.0
+            new_books[content_hash] = book
+        if new_books:
+            self.add_books(list(new_books.values()))
+            for content_hash, book in new_books.items():
+                by_hash[content_hash] = extracted[book.path] = book.id
+        # Cópia de um conteúdo que não chegou a ser importado (falhou): fica para a próxima vez
+        self.store.record_imported_files([
+            (r["path"], r["size"], r["mtime_ns"], r["hash"], by_hash[r["hash"]]) for r in results if r["hash"] in by_hash
+        ])
+        self.store.replace_chapters(
+            [(extracted[r["path"]], r["chapters"]) for r in results if r["path"] in extracted]
+        )
+        for result in results:
+            if result["path"] in extracted:
+                self._chapters[extracted[result["path"]]] = ChapterIndex(result["chapters"])
+        return list(new_books.values()) + updated
+
+    def _drop_path(self, book_id, path):
+        """O caminho deixou de ter o conteúdo do livro: o livro passa a abrir outra cópia"""
+        books = self._get_books([book_id])
+        if books and books[0].path == path:
+            others = [p for p in self.store.paths_of(book_id) if p != path]
+            if others:
+                books[0].path = others[0]
+                self.store.update_book_path(book_id, others[0])
+
+    def available_path(self, book):
+        """Um caminho do livro que ainda existe: se o arquivo principal sumiu, abre uma cópia"""
+        if book.path is None or os.path.exists(book.path):
+            return book.path
+        for path in self.store.paths_of(book.id):
+            if path != book.path and os.path.exists(path):
+                book.path = path
+                self.store.update_book_path(book.id, path)
+                return path
+        return book.path
+
+    def remove_books(self, books):
+        ids = [b.id for b in books]
+        self.store.delete_books(ids)
+        for book_id in ids:
+            self._books.pop(book_id, None)
+            self._chapters.pop(book_id, None)
+        with self._index_lock:
+            if self._search_index is not None:
+                for book_id in ids:
+                    self._search_index.remove(book_id)
+        for book_id in ids:
+            self.category_index().remove(book_id)
+            self.recency_index().remove(book_id)
+
+    def set_category(self, books, category):
+        """Move os livros para outra pasta (categoria principal), numa transação só"""
+        # Quem já estava na pasta como tag perde a tag: ela vira a categoria principal
+        self.store.set_category([b.id for b in books], category)
+        index = self.category_index()
+        for book in books:
+            index.remove_from(book.id, book.category)
+            index.add_to(book.id, category)
+            book.category = category
+        with self._index_lock:
+            if self._search_index is not None:
+                for book in books:
+                    self._search_index.add(book.id, book.title, book.category)
+
+    def add_tag(self, books, tag):
+        """Faz os livros aparecerem também em outra pasta, numa transação só"""
+        books = [b for b in books if b.category != tag]
+        self.store.add_tag([b.id for b in books], tag)
+        index = self.category_index()
+        for book in books:
+            index.add_to(book.id, tag)
+
+    def remove_tag(self, books, tag):
+        """Tira os livros de uma pasta em que estão como tag; a categoria principal fica"""
+        books = [b for b in books if b.category != tag]
+        self.store.remove_tag([b.id for b in books], tag)
+        index = self.category_index()
+        for book in books:
+            index.remove_from(book.id, tag)
+
+    def recent(self, limit, offset=0):
+        """Livros do mais recente para o mais antigo (Continuar Lendo / Ver tudo)"""
+        ids = self.recency_index().ids(limit, offset)
+        return self._get_books(ids)
+
+    def recency_index(self):
+        with self._recency_lock:
+            if self._recency_index is None:
+                self._recency_index = RecencyIndex(self.store.recency_rows())
+            return self._recency_index
+
+    def by_category(self, category, limit=-1, offset=0):
+        """Livros da pasta em ordem alfabética; limit/offset permitem carregar aos poucos"""
+        ids = self.category_index().ids(category, limit, offset)
+        return self._get_books(ids)
+
+    def category_index(self):
+        """Índice de pastas, montado uma vez a partir de duas consultas leves"""
+        with self._category_lock:
+            if self._category_index is None:
+                self._category_index = CategoryIndex(self.store.category_rows(), self.store.tag_rows())
+            return self._category_index
+
+    def category_count(self, category):
+        return self.category_index().count(category)
+
+    def categories_of(self, book):
+        """Pastas em que o livro aparece (a categoria principal e as tags)"""
+        return self.category_index().categories_of(book.id)
+
+    def folders(self):
+        """(nome, ícone, cor, cor de fundo) das pastas salvas e das categorias sem pasta"""
+        folders = self.store.folders()
+        named = {f[0] for f in folders}
+        extra = sorted(c for c in self.category_index().categories() if c not in named)
+        return folders + [(name,) + DEFAULT_FOLDER_STYLE for name in extra]
+
+    def add_folder(self, name, icon=DEFAULT_FOLDER_STYLE[0], color=DEFAULT_FOLDER_STYLE[1], bg_color=DEFAULT_FOLDER_STYLE[2]):
+        self.store.insert_folder(name, icon, color, bg_color)
+
+    def search_index(self):
+        """Índice de busca, montado na primeira chamada a partir do banco"""
+        with self._index_lock:
+            if self._search_index is None:
+                index = SearchIndex()
+                for row in self.store.iter_books():
+                    index.add(row[0], row[1], row[2])
+                self._search_index = index
+            return self._search_index
+
+    def warm_search_index(self):
+        """Monta o índice em segundo plano para não atrasar a primeira tela"""
+        threading.Thread(target=self.search_index, name="search-index", daemon=True).start()
+
+    def search(self, query, limit=20):
+        ids = self.search_index().search(query, limit)
+        return self._get_books(ids)
+
+    def chapters(self, book):
+        """ChapterIndex do livro (vazio se não houver capítulos)"""
+        index = self._chapters.get(book.id)
+        if index is None:
+            index = self._chapters[book.id] = ChapterIndex(self.store.chapter_rows(book.id))
+        return index
+
+    def set_chapters(self, book, chapters):
+        """Grava os capítulos lidos do arquivo, se mudaram"""
+        if self.chapters(book).items() != chapters:
+            self.store.replace_chapters([(book.id, chapters)])
+            self._chapters[book.id] = ChapterIndex(chapters)
+
+    def save_progress(self, book):
+        """Agenda a gravação de current_page/last_read (com debounce)"""
+        # A ordem do Continuar Lendo muda na hora; o banco recebe depois
+        self.recency_index().touch(book.id, book.last_read_ts)
+        self.progress_writer.schedule(book)
+        if self.sync_log is not None:
+            self.sync_log.record(sync_key(book), book.current_page, book.last_read_ts)
+
+    def save_progress_many(self, books):
+        """Grava na hora, numa transação, o progresso de vários livros (ações em lote).
+
+        No log de sincronização a mudança vai com o momento de agora, não com
+        last_read (que zerar deixa em 0): senão um evento antigo de outro
+        aparelho desfaria a ação.
+        """
+        index = self.recency_index()
+        now = time.time()
+        for book in books:
+            index.touch(book.id, book.last_read_ts)
+            self.progress_writer.schedule(book)
+            if self.sync_log is not None:
+                self.sync_log.record(sync_key(book), book.current_page, now)
+        self.progress_writer.flush()
+
+    def flush(self):
+        self.progress_writer.flush()
+        if self.sync_log is not None:
+            self.sync_log.flush()
+
+    def apply_synced_progress(self, latest):
+        """Aplica {chave: (página, ts)} de outros aparelhos onde for mais novo que o local.
+
+        Devolve os BLBooks alterados. Não volta para o log: os outros já têm o evento.
+        """
+        hashes = [key[2:] for key in latest if key.startswith("h:")]
+        titles = [key[2:] for key in latest if key.startswith("t:")]
+        keys = dict((book_id, key) for key, book_id in self.store.ids_for_sync(hashes, titles))
+        updated = []
+        for book in self._get_books(list(keys)):
+            page, timestamp = latest[keys[book.id]]
+            if timestamp > book.last_read_ts:
+                book.current_page = page
+                book.last_read_ts = timestamp
+                self.recency_index().touch(book.id, timestamp)
+                self.progress_writer.schedule(book)
+                updated.append(book)
+        return updated
+
+    def progress_for(self, user_id=None):
+        """Progresso de leitura de um usuário; None é o app local de um usuário só.
+
+        Abas do mesmo usuário recebem o mesmo objeto.
+        """
+        with self._progress_lock:
+            progress = self._progress.get(user_id)
+            if progress is None:
+                if user_id is None:
+                    progress = LocalProgress(self)
+                else:
+                    progress = UserProgress(self, user_id, self.store.user_progress_rows(user_id))
+                self._progress[user_id] = progress
+            return progress
+
+
+class LocalProgress:
+    """Progresso guardado no próprio BLBook (colunas current_page/last_read de books)"""
+
+    def __init__(self, library):
+        self.library = library
+
+    def page_of(self, book):
+        return book.current_page
+
+    def save_progress(self, book, page):
+        book.current_page = page
+        book.last_read_ts = time.time()
+        self.library.save_progress(book)
+
+    def set_pages(self, books, page_of, reset=False):
+        """Página page_of(livro) para vários livros; reset tira os livros do Continuar Lendo"""
+        for book in books:
+            book.current_page = page_of(book)
+            if reset:
+                book.last_read_ts = 0.0
+        self.library.save_progress_many(books)
+
+    def recent(self, limit, offset=0):
+        return self.library.recent(limit, offset)
+
+
+class UserProgress:
+    """Progresso de um usuário do modo servidor (tabela progress).
+
+    O catálogo (BLBooks, índices, capítulos, caches) é um só para todas as
+    sessões e ninguém o altera ao ler; aqui ficam apenas a página e a última
+    leitura dos livros que este usuário já abriu.
+    """
+
+    def __init__(self, library, user_id, rows):
+        self.library = library
+        self.user_id = user_id
+        self._pages = {book_id: current_page for book_id, current_page, _ in rows}
+        self._index = RecencyIndex((book_id, last_read) for book_id, _, last_read in rows)
+        self._lock = threading.Lock()
+
+    def page_of(self, book):
+        return self._pages.get(book.id, 0)
+
+    def save_progress(self, book, page):
+        # Duas abas virando página ao mesmo tempo: vale a última, na memória e no banco
+        with self._lock:
+            last_read = time.time()
+            self._pages[book.id] = page
+            self._index.touch(book.id, last_read)
+            self.library.progress_writer.schedule_user(self.user_id, book.id, page, last_read)
+
+    def set_pages(self, books, page_of, reset=False):
+        """Como LocalProgress.set_pages, só para este usuário. Zerar apaga as linhas dele:
+        o livro volta a ser um que ele nunca abriu"""
+        writer = self.library.progress_writer
+        with self._lock:
+            for book in books:
+                if reset:
+                    self._pages.pop(book.id, None)
+                    self._index.remove(book.id)
+                else:
+                    # Não conta como leitura: a posição no Continuar Lendo fica
+                    last_read = self._index.timestamp(book.id, 0.0)
+                    self._pages[book.id] = page_of(book)
+                    self._index.touch(book.id, last_read)
+                    writer.schedule_user(self.user_id, book.id, self._pages[book.id], last_read)
+        # Gravações pendentes destes livros vão antes, para não voltarem depois de apagadas
+        writer.flush()
+        if reset:
+            self.library.store.delete_user_progress(self.user_id, [b.id for b in books])
+
+    def recent(self, limit, offset=0):
+        """Os livros do usuário por última leitura, seguidos pelo resto do catálogo"""
+        with self._lock:
+            ids = self._index.ids(limit, offset)
+            if len(ids) < limit:
+                skip = max(0, offset - len(self._index))
+                ids += self.library.recency_index().ids_excluding(limit - len(ids), skip, self._pages)
+        return self.library._get_books(ids)
@@ -0,0 +1,395 @@
+import sqlite3
+import threading
+import time
+
+# --- Banco da Biblioteca ---
+# SQLite em modo WAL: leituras não bloqueiam as gravações de progresso e,
+# com synchronous=NORMAL, um commit não força fsync a cada página virada.
+
+# Cada item leva o banco para a versão seguinte (PRAGMA user_version)
+MIGRATIONS = [
+    """
+    CREATE TABLE books (
+        id INTEGER PRIMARY KEY,
+        title TEXT NOT NULL,
+        category TEXT NOT NULL,
+        cover_color TEXT NOT NULL,
+        path TEXT,
+        current_page INTEGER NOT NULL DEFAULT 0,
+        total_pages INTEGER NOT NULL DEFAULT 100,
+        last_read REAL NOT NULL
+    );
+    CREATE INDEX idx_books_category ON books(category);
+    CREATE INDEX idx_books_title ON books(title COLLATE NOCASE);
+    CREATE INDEX idx_books_last_read ON books(last_read DESC);
+    """,
+    """
+    CREATE TABLE folders (
+        name TEXT PRIMARY KEY,
+        icon TEXT NOT NULL,
+        color TEXT NOT NULL,
+        bg_color TEXT NOT NULL,
+        position INTEGER NOT NULL
+    );
+    INSERT INTO folders VALUES
+        ('Omegaverse', 'PETS', '#E91E63', '#FCE4EC', 0),
+        ('Escolar', 'SCHOOL', '#E91E63', '#FCE4EC', 1),
+        ('Fantasia', 'TOKEN', '#9C27B0', '#F3E5F5', 2),
+        ('Drama', 'THEATER_COMEDY', '#9C27B0', '#F3E5F5', 3);
+    CREATE TABLE book_tags (
+        book_id INTEGER NOT NULL REFERENCES books(id) ON DELETE CASCADE,
+        tag TEXT NOT NULL,
+        PRIMARY KEY (book_id, tag)
+    ) WITHOUT ROWID;
+    CREATE INDEX idx_book_tags_tag ON book_tags(tag);
+    """,
+    """
+    ALTER TABLE books ADD COLUMN content_hash TEXT;
+    CREATE INDEX idx_books_content_hash ON books(content_hash);
+    CREATE TABLE imported_files (
+        path TEXT PRIMARY KEY,
+        size INTEGER NOT NULL,
+        mtime_ns INTEGER NOT NULL,
+        content_hash TEXT NOT NULL,
+        book_id INTEGER REFERENCES books(id) ON DELETE CASCADE
+    );
+    """,
+    """
+    CREATE TABLE chapters (
+        book_id INTEGER NOT NULL REFERENCES books(id) ON DELETE CASCADE,
+        start_page INTEGER NOT NULL,
+        title TEXT NOT NULL,
+        PRIMARY KEY (book_id, start_page)
+    ) WITHOUT ROWID;
+    """,
+    """
+    CREATE TABLE progress (
+        user_id TEXT NOT NULL,
+        book_id INTEGER NOT NULL REFERENCES books(id) ON DELETE CASCADE,
+        current_page INTEGER NOT NULL,
+        last_read REAL NOT NULL,
+        PRIMARY KEY (user_id, book_id)
+    ) WITHOUT ROWID;
+    """,
+    """
+    -- Um livro por conteúdo: as cópias importadas antes viram caminhos extras
+    -- do exemplar lido mais recentemente, que herda tags, pasta e progresso delas
+    CREATE TEMP TABLE duplicates AS
+        SELECT b.id AS id, (
+            SELECT k.id FROM books k WHERE k.content_hash = b.content_hash
+            ORDER BY k.last_read DESC, k.id LIMIT 1
+        ) AS keeper
+        FROM books b WHERE b.content_hash IS NOT NULL;
+    DELETE FROM duplicates WHERE id = keeper;
+    UPDATE imported_files SET book_id = (SELECT keeper FROM duplicates WHERE duplicates.id = imported_files.book_id)
+        WHERE book_id IN (SELECT id FROM duplicates);
+    INSERT OR IGNORE INTO book_tags
+        SELECT d.keeper, t.tag FROM book_tags t JOIN duplicates d ON d.id = t.book_id;
+    INSERT OR IGNORE INTO book_tags
+        SELECT d.keeper, b.category FROM duplicates d
+        JOIN books b ON b.id = d.id JOIN books k ON k.id = d.keeper
+        WHERE b.category <> k.category;
+    INSERT INTO progress
+        SELECT p.user_id, d.keeper, p.current_page, p.last_read FROM progress p JOIN duplicates d ON d.id = p.book_id
+        WHERE true
+        ON CONFLICT (user_id, book_id) DO UPDATE SET
+            current_page = excluded.current_page, last_read = excluded.last_read
+        WHERE excluded.last_read > progress.last_read;
+    DELETE FROM books WHERE id IN (SELECT id FROM duplicates);
+    DROP TABLE duplicates;
+    DROP INDEX idx_books_content_hash;
+    CREATE UNIQUE INDEX idx_books_content_hash ON books(content_hash);
+    """,
+    """
+    -- Apagar um livro apaga em cascata os caminhos e o progresso dele: sem estes
+    -- índices cada livro apagado varria as duas tabelas inteiras
+    CREATE INDEX idx_imported_files_book ON imported_files(book_id);
+    CREATE INDEX idx_progress_book ON progress(book_id);
+    """,
+]
+
+BOOK_COLUMNS = "id, title, category, cover_color, path, current_page, total_pages, last_read, content_hash"
+
+
+class LibraryStore:
+    """Acesso ao arquivo .db da biblioteca"""
+
+    def __init__(self, db_path):
+        self.db_path = db_path
+        # Os eventos do Flet chegam em threads do pool: uma conexão com lock
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._lock = threading.RLock()
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("PRAGMA foreign_keys=ON")
+        self._migrate()
+
+    def _migrate(self):
+        with self._lock:
+            version = self._conn.execute("PRAGMA user_version").fetchone()[0]
+            for number, script in enumerate(MIGRATIONS[version:], start=version + 1):
+                # Script e nova versão entram juntos, ou nada entra
+                self._conn.executescript(f"BEGIN; {script} PRAGMA user_version = {number}; COMMIT;")
+
+    def is_empty(self):
+        with self._lock:
+            return self._conn.execute("SELECT 1 FROM books LIMIT 1").fetchone() is None
+
+    def count(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM books").fetchone()[0]
+
+    def insert_books(self, rows):
+        """Insere (title, category, cover_color, path, current_page, total_pages, last_read, content_hash) e devolve os ids"""
+        ids = []
+        with self._lock, self._conn:
+            for row in rows:
+                cursor = self._conn.execute(
+                    "INSERT INTO books (title, category, cover_color, path, current_page, total_pages, last_read, content_hash)"
+                    " VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                    row,
+                )
+                ids.append(cursor.lastrowid)
+        return ids
+
+    def update_progress_many(self, rows):
+        """Grava vários (current_page, last_read, id) numa única transação"""
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "UPDATE books SET current_page = ?, last_read = ? WHERE id = ?", rows
+            )
+
+    def user_progress_rows(self, user_id):
+        """(book_id, current_page, last_read) dos livros que o usuário já abriu"""
+        with self._lock:
+            return self._conn.execute(
+                "SELECT book_id, current_page, last_read FROM progress WHERE user_id = ?", (user_id,)
+            ).fetchall()
+
+    def update_user_progress_many(self, rows):
+        """Grava vários (user_id, book_id, current_page, last_read); a leitura mais recente vence"""
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT INTO progress VALUES (?, ?, ?, ?) ON CONFLICT (user_id, book_id) DO UPDATE SET"
+                " current_page = excluded.current_page, last_read = excluded.last_read"
+                " WHERE excluded.last_read >= progress.last_read",
+                rows,
+            )
+
+    def delete_user_progress(self, user_id, book_ids):
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "DELETE FROM progress WHERE user_id = ? AND book_id = ?", [(user_id, i) for i in book_ids]
+            )
+
+    def ids_for_sync(self, hashes, titles, chunk=500):
+        """(chave de sincronização, id) dos livros com estes hashes, ou estes títulos se não têm hash"""
+        found = []
+        with self._lock:
+            for values, prefix, sql in (
+                (hashes, "h:", "SELECT content_hash, id FROM books WHERE content_hash IN ({})"),
+                (titles, "t:", "SELECT title, id FROM books WHERE content_hash IS NULL AND title IN ({})"),
+            ):
+                for start in range(0, len(values), chunk):
+                    part = values[start:start + chunk]
+                    rows = self._conn.execute(sql.format(", ".join("?" * len(part))), part).fetchall()
+                    found.extend((prefix + value, book_id) for value, book_id in rows)
+        return found
+
+    def ids_by_hash(self, hashes, chunk=500):
+        """{content_hash: id} dos livros que já têm algum destes conteúdos"""
+        found = {}
+        with self._lock:
+            for start in range(0, len(hashes), chunk):
+                part = hashes[start:start + chunk]
+                found.update(self._conn.execute(
+                    f"SELECT content_hash, id FROM books WHERE content_hash IN ({', '.join('?' * len(part))})", part
+                ).fetchall())
+        return found
+
+    def recency_rows(self):
+        """(id, last_read) de todos os livros, para montar o índice de leitura recente"""
+        with self._lock:
+            return self._conn.execute("SELECT id, last_read FROM books").fetchall()
+
+    def category_rows(self):
+        """(id, title, category) de todos os livros, para montar o índice de pastas"""
+        with self._lock:
+            return self._conn.execute("SELECT id, title, category FROM books").fetchall()
+
+    def tag_rows(self):
+        with self._lock:
+            return self._conn.execute("SELECT book_id, tag FROM book_tags").fetchall()
+
+    def set_category(self, book_ids, category):
+        """Muda a categoria principal numa transação; quem tinha a pasta como tag deixa de ter"""
+        rows = [(category, i) for i in book_ids]
+        with self._lock, self._conn:
+            self._conn.executemany("UPDATE books SET category = ? WHERE id = ?", rows)
+            self._conn.executemany("DELETE FROM book_tags WHERE tag = ? AND book_id = ?", rows)
+
+    def add_tag(self, book_ids, tag):
+        with self._lock, self._conn:
+            self._conn.executemany("INSERT OR IGNORE INTO book_tags VALUES (?, ?)", [(i, tag) for i in book_ids])
+
+    def remove_tag(self, book_ids, tag):
+        with self._lock, self._conn:
+            self._conn.executemany("DELETE FROM book_tags WHERE book_id = ? AND tag = ?", [(i, tag) for i in book_ids])
+
+    def delete_books(self, book_ids):
+        with self._lock, self._conn:
+            self._conn.executemany("DELETE FROM books WHERE id = ?", [(i,) for i in book_ids])
+
+    def update_book_file(self, book_id, total_pages, content_hash):
+        with self._lock, self._conn:
+            self._conn.execute(
+                "UPDATE books SET total_pages = ?, content_hash = ? WHERE id = ?",
+                (total_pages, content_hash, book_id),
+            )
+
+    def update_book_path(self, book_id, path):
+        with self._lock, self._conn:
+            self._conn.execute("UPDATE books SET path = ? WHERE id = ?", (path, book_id))
+
+    def paths_of(self, book_id):
+        """Todos os caminhos importados com o conteúdo do livro"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT path FROM imported_files WHERE book_id = ? ORDER BY path", (book_id,)
+            ).fetchall()
+        return [row[0] for row in rows]
+
+    def imported_file(self, path):
+        """(size, mtime_ns, content_hash, book_id) da última importação do arquivo"""
+        with self._lock:
+            return self._conn.execute(
+                "SELECT size, mtime_ns, content_hash, book_id FROM imported_files WHERE path = ?", (path,)
+            ).fetchone()
+
+    def record_imported_files(self, rows):
+        """Grava (path, size, mtime_ns, content_hash, book_id) numa transação"""
+        with self._lock, self._conn:
+            self._conn.executemany("INSERT OR REPLACE INTO imported_files VALUES (?, ?, ?, ?, ?)", rows)
+
+    def touch_imported_file(self, path, size, mtime_ns):
+        with self._lock, self._conn:
+            self._conn.execute(
+                "UPDATE imported_files SET size = ?, mtime_ns = ? WHERE path = ?", (size, mtime_ns, path)
+            )
+
+    def chapter_rows(self, book_id):
+        """(start_page, title) dos capítulos do livro, em ordem"""
+        with self._lock:
+            return self._conn.execute(
+                "SELECT start_page, title FROM chapters WHERE book_id = ? ORDER BY start_page", (book_id,)
+            ).fetchall()
+
+    def replace_chapters(self, entries):
+        """Troca os capítulos de vários livros [(book_id, [(start_page, title)])] numa transação"""
+        with self._lock, self._conn:
+            for book_id, chapters in entries:
+                self._conn.execute("DELETE FROM chapters WHERE book_id = ?", (book_id,))
+                self._conn.executemany(
+                    "INSERT INTO chapters VALUES (?, ?, ?)", [(book_id, start, title) for start, title in chapters]
+                )
+
+    def folders(self):
+        """(name, icon, color, bg_color) na ordem definida pelo usuário"""
+        with self._lock:
+            return self._conn.execute(
+                "SELECT name, icon, color, bg_color FROM folders ORDER BY position"
+            ).fetchall()
+
+    def insert_folder(self, name, icon, color, bg_color):
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR IGNORE INTO folders VALUES (?, ?, ?, ?,"
+                " (SELECT COALESCE(MAX(position), -1) + 1 FROM folders))",
+                (name, icon, color, bg_color),
+            )
+
+    def by_ids(self, ids):
+        """Linhas dos ids pedidos, na mesma ordem"""
+        if not ids:
+            return []
+        placeholders = ", ".join("?" * len(ids))
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT {BOOK_COLUMNS} FROM books WHERE id IN ({placeholders})", list(ids)
+            ).fetchall()
+        by_id = {row[0]: row for row in rows}
+        return [by_id[i] for i in ids if i in by_id]
+
+    def iter_books(self, batch_size=500):
+        """Percorre a tabela em lotes, sem segurar o lock entre eles"""
+        last_id = 0
+        while True:
+            with self._lock:
+                rows = self._conn.execute(
+                    f"SELECT {BOOK_COLUMNS} FROM books WHERE id > ? ORDER BY id LIMIT ?",
+                    (last_id, batch_size),
+                ).fetchall()
+            if not rows:
+                return
+            yield from rows
+            last_id = rows[-1][0]
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+class ProgressWriter:
+    """Junta as gravações de progresso e grava tudo de uma vez após um intervalo"""
+
+    def __init__(self, store, delay=2.0):
+        self.store = store
+        self.delay = delay
+        self._pending = {}
+        self._pending_users = {}  # (user_id, book_id) -> linha da tabela progress
+        self._due = None  # Momento (monotonic) da próxima gravação agendada
+        self._lock = threading.Condition()
+        # Garante que dois flushes não gravem fora de ordem
+        self._flush_lock = threading.Lock()
+        # Uma thread fixa: criar um Timer por rajada travava a rolagem do leitor
+        # (Thread.start espera o GIL, que o worker de páginas segura ao decodificar)
+        self._thread = threading.Thread(target=self._run, name="progress-writer", daemon=True)
+        self._thread.start()
+
+    def schedule(self, book):
+        with self._lock:
+            # Só o estado mais recente de cada livro interessa
+            self._pending[book.id] = (book.current_page, book.last_read_ts, book.id)
+            self._wake()
+
+    def schedule_user(self, user_id, book_id, current_page, last_read):
+        """Progresso de um usuário do modo servidor (tabela progress)"""
+        with self._lock:
+            self._pending_users[(user_id, book_id)] = (user_id, book_id, current_page, last_read)
+            self._wake()
+
+    def _wake(self):
+        # Chamado com self._lock seguro
+        if self._due is None:
+            self._due = time.monotonic() + self.delay
+            self._lock.notify()
+
+    def _run(self):
+        while True:
+            with self._lock:
+                while self._due is None or self._due > time.monotonic():
+                    self._lock.wait(None if self._due is None else self._due - time.monotonic())
+            self.flush()
+
+    def flush(self):
+        with self._flush_lock:
+            with self._lock:
+                self._due = None
+                rows = list(self._pending.values())
+                user_rows = list(self._pending_users.values())
+                self._pending.clear()
+                self._pending_users.clear()
+            if rows:
+                self.store.update_progress_many(rows)
+            if user_rows:
+                self.store.update_user_progress_many(user_rows)
@@ -1,15 +1,23 @@
 import flet as ft
+import asyncio
+import atexit
+import base64
 import datetime
+import math
+import os
+import secrets
+import threading
+import time
 
-# --- Classes de Dados ---
-class BLBook:
-    def __init__(self, title, category, cover_color, total_pages=100):
-        self.title = title
-        self.category = category
-        self.cover_color = cover_color
-        self.current_page = 0
-        self.total_pages = total_pages
-        self.last_read = datetime.datetime.now()
+# Banco (sqlite3) e importação (pool de processos, hashlib) só são importados
+# quando usados: o arranque do APK paga apenas pelo Flet e pela home
+import perf
+from disk_cache import DiskCache
+from library import BLBook, Library
+from prewarm import PrewarmScheduler, pages_to_warm
+from render import DEFAULT_ASPECT_RATIO, PageCache, PageRenderer
+from search import SearchDebouncer
+from thumbnails import ThumbnailCache
 
 # --- Dados Iniciais ---
 # CORES HEXADECIMAIS (Funcionam 100% em qualquer Android)
@@ -18,14 +26,88 @@ class BLBook:
 # Pink200 = #F48FB1
 # DeepPurple300 = #9575CD
 
-my_library = [
-    BLBook("Love Stage!! Vol. 1", "Escolar", "#7986CB", 150),
-    BLBook("Blood Bank", "Fantasia", "#5C6BC0", 200),
-    BLBook("Omega Complex", "Omegaverse", "#F48FB1", 120),
-    BLBook("Bj Alex", "Drama", "#9575CD", 80),
-]
+def sample_books():
+    return [
+        BLBook("Love Stage!! Vol. 1", "Escolar", "#7986CB", 150),
+        BLBook("Blood Bank", "Fantasia", "#5C6BC0", 200),
+        BLBook("Omega Complex", "Omegaverse", "#F48FB1", 120),
+        BLBook("Bj Alex", "Drama", "#9575CD", 80),
+    ]
 
-def main(page: ft.Page):
+# No Android o Flet informa a pasta de dados do app; no desktop usamos a home
+DATA_DIR = os.getenv("FLET_APP_STORAGE_DATA") or os.path.join(os.path.expanduser("~"), ".blreader")
+os.makedirs(DATA_DIR, exist_ok=True)
+# Miniaturas das capas ficam em disco até este limite (as mais antigas saem primeiro)
+THUMBNAIL_CACHE_BYTES = 64 * 1024 * 1024
+thumbnail_cache = ThumbnailCache(os.path.join(DATA_DIR, "thumbnails"), THUMBNAIL_CACHE_BYTES)
+
+# Modo servidor (Flet web para a casa / clube de leitura): BLREADER_SERVER=1.
+# Catálogo, índices e caches são um só para todas as sessões; cada navegador
+# tem o seu leitor e o seu progresso (tabela progress). Importar e criar pastas
+# fica só no app local, então o catálogo não muda por baixo das sessões.
+SERVER_MODE = os.getenv("BLREADER_SERVER") == "1"
+SERVER_PORT = int(os.getenv("BLREADER_PORT", "8550"))
+# Chave do id do leitor no localStorage do navegador
+READER_ID_KEY = "blreader.reader_id"
+
+# A biblioteca abre depois da primeira pintura (ver load_library)
+library_store = None
+my_library = None
+_library_lock = threading.Lock()
+
+
+def load_library():
+    """Abre o banco e deixa prontos os índices da home. Roda fora do loop de eventos"""
+    global library_store, my_library
+    with _library_lock:
+        if my_library is None:
+            from library_store import LibraryStore, ProgressWriter
+
+            store = LibraryStore(os.path.join(DATA_DIR, "library.db"))
+            # Sincronização entre aparelhos só no app local (no servidor o progresso é por leitor)
+            sync_log = None
+            if not SERVER_MODE:
+                from sync_log import SyncLog
+
+                sync_log = SyncLog(os.path.join(DATA_DIR, "sync"))
+            library = Library(store, ProgressWriter(store), sync_log)
+            if store.is_empty():
+                library.add_books(sample_books())
+            # Progresso ainda no debounce não se perde ao fechar o app
+            atexit.register(library.flush)
+            library.recency_index()
+            library.category_index()
+            library_store, my_library = store, library
+        return my_library
+
+# Linhas extras de cards montadas além das visíveis nas grades de livros
+GRID_OVERSCAN_ROWS = 2
+
+# Páginas rasterizadas ficam em memória até este limite (aparelhos com pouca RAM)
+PAGE_CACHE_BYTES = 64 * 1024 * 1024
+page_cache = PageCache(PAGE_CACHE_BYTES)
+
+# Páginas de PDF pré-renderizadas no tempo ocioso ficam em disco até este limite
+PAGE_DISK_CACHE_BYTES = 256 * 1024 * 1024
+page_disk_cache = DiskCache(os.path.join(DATA_DIR, "pages"), PAGE_DISK_CACHE_BYTES, ".png")
+# Livros do Continuar Lendo que ganham o próximo capítulo pronto (no app local)
+PREWARM_BOOKS = 3
+prewarm = PrewarmScheduler(page_disk_cache)
+
+# Rolagem contínua: páginas mantidas acima da tela e quanto decodificar à frente
+CONTINUOUS_BEHIND_PAGES = 1
+CONTINUOUS_LOOKAHEAD_SECONDS = 0.6
+CONTINUOUS_MAX_AHEAD = 6
+
+# Pixels do aparelho por pixel lógico. O Flet 0.24 não informa a densidade da
+# tela: BLREADER_PIXEL_RATIO define; sem ela, 2 em celulares e no Mac, 1 no resto
+PIXEL_RATIO = float(os.getenv("BLREADER_PIXEL_RATIO") or 0)
+# Altura (px lógicos) da barra, do contador e dos botões em volta da página
+READER_CHROME_HEIGHT = 200
+# Zoom máximo (pinça) do leitor página a página
+MAX_READER_ZOOM = 4.0
+
+async def main(page: ft.Page):
     # --- Configurações da Página ---
     page.title = "BL Reader"
     page.theme_mode = ft.ThemeMode.LIGHT
@@ -35,32 +117,57 @@ def main(page: ft.Page):
     # Estado da aplicação
     current_book = None
     selected_category = None
+    renderer = None
+    continuous_reading = False
+    reader_zoom = 1.0  # Zoom da página no leitor página a página
+    reader_aspect = DEFAULT_ASPECT_RATIO  # Altura/largura das páginas do livro aberto
+    reader_id = None  # Modo servidor: quem está lendo nesta sessão
+    progress = None  # Progresso de leitura desta sessão (ver Library.progress_for)
+    pending_scroll = None  # (controle, offset) aplicado depois que a view é montada
+    navigation = 0  # Conta os route_change: uma view montada com awaits sabe se ficou para trás
+    # Trabalho assíncrono da tela atual; cancelado quando o usuário navega
+    screen_tasks = set()
+    # Controles que ficam desligados enquanto a home é só esqueleto
+    search_field = None
+    import_fab = None
+    see_all_button = None
+    # A home é montada uma vez e depois só recebe atualizações pontuais
+    home_view = None
+    recent_row = None
+    search_results = None
+    search_section = None
+    browse_section = None
+    folders_grid = None
+    import_job = None
+    import_status = None
+    import_text = None
+    import_bar = None
     
     # --- Componentes Reutilizáveis ---
 
     def create_book_card(book, width=140, height=200, minimal=False):
         """Cria o card visual do livro"""
         
-        progress_val = book.current_page / book.total_pages if book.total_pages > 0 else 0
+        progress_text = ft.Text(size=11, color="#9E9E9E") # Grey
+        progress_bar = ft.ProgressBar(color="#FF4081", bgcolor="#FCE4EC", height=4) # PinkAccent / Pink50
         
+        cover = ft.Container(
+            alignment=ft.alignment.center,
+            bgcolor=book.cover_color,
+            height=140 if not minimal else 100,
+            border_radius=12,
+        )
+        cover.content = create_cover(book, cover, width - 20, "minimal" if minimal else "normal")
+
         card_content = ft.Container(
             content=ft.Column([
                 # Capa
-                ft.Container(
-                    content=ft.Text(
-                        "".join([word[0] for word in book.title.split()[:2]]), 
-                        size=30, weight=ft.FontWeight.BOLD, color="#FFFFFF"
-                    ),
-                    alignment=ft.alignment.center,
-                    bgcolor=book.cover_color,
-                    height=140 if not minimal else 100,
-                    border_radius=12,
-                ),
+                cover,
                 # Informações
                 ft.Column([
                     ft.Text(book.title, weight=ft.FontWeight.BOLD, size=14, no_wrap=True, overflow=ft.TextOverflow.ELLIPSIS),
-                    ft.Text(f"Cap. {book.current_page} - Pág {book.current_page}", size=11, color="#9E9E9E"), # Grey
-                    ft.ProgressBar(value=progress_val, color="#FF4081", bgcolor="#FCE4EC", height=4) # PinkAccent / Pink50
+                    progress_text,
+                    progress_bar
                 ], spacing=2)
             ], spacing=5),
             width=width,
@@ -68,12 +175,57 @@ def main(page: ft.Page):
             bgcolor="#FFFFFF",
             border_radius=16,
             on_click=lambda _: open_reader(book),
-            shadow=ft.BoxShadow(blur_radius=10, color=ft.colors.with_opacity(0.05, "#000000"))
+            shadow=ft.BoxShadow(blur_radius=10, color=ft.colors.with_opacity(0.05, "#000000")),
+            # Guardado para atualizar só o progresso depois, sem recriar o card
+            data=(book, progress_text, progress_bar)
         )
+        update_book_card(card_content)
         return card_content
 
+    def create_cover(book, box, width, size):
+        """Miniatura do cache em disco ou, enquanto não existe, as iniciais do título"""
+        initials = ft.Text(
+            "".join([word[0] for word in book.title.split()[:2]]), 
+            size=30, weight=ft.FontWeight.BOLD, color="#FFFFFF"
+        )
+        if not book.content_hash:
+            return initials
+        src = thumbnail_cache.lookup(book.content_hash, size)
+        if src is None:
+            if book.path:
+                # Saiu do cache (limite de tamanho): gera de novo sem travar a home
+                def on_ready():
+                    ready = thumbnail_cache.lookup(book.content_hash, size)
+                    if ready and box.page:
+                        box.content = cover_image(ready, width, box.height, initials)
+                        publish(box)
+                thumbnail_cache.request(book.content_hash, book.path, on_ready)
+            return initials
+        return cover_image(src, width, box.height, initials)
+
+    def cover_image(src, width, height, initials):
+        return ft.Image(
+            src=src, width=width, height=height, fit=ft.ImageFit.COVER,
+            border_radius=12, error_content=initials
+        )
+
+    def progress_label(book):
+        """Capítulo real (bisect no índice de capítulos) e página"""
+        current_page = progress.page_of(book)
+        number = my_library.chapters(book).chapter_of(current_page)
+        if number is None:
+            return f"Pág {current_page}"
+        return f"Cap. {number + 1} - Pág {current_page}"
+
+    def update_book_card(card):
+        """Atualiza texto e barra de progresso de um card já existente"""
+        book, progress_text, progress_bar = card.data
+        progress_text.value = progress_label(book)
+        progress_bar.value = progress.page_of(book) / book.total_pages if book.total_pages > 0 else 0
+
     def create_folder_card(icon, name, count, color_hex, bg_color_hex):
         """Cria o card das pastas"""
+        count_text = ft.Text(f"{count} arquivos", size=11, color="#9E9E9E")
         return ft.Container(
             content=ft.Column([
                 ft.Container(
@@ -84,21 +236,138 @@ def main(page: ft.Page):
                     width=45, height=45, alignment=ft.alignment.center
                 ),
                 ft.Text(name, weight=ft.FontWeight.BOLD, size=14),
-                ft.Text(f"{count} arquivos", size=11, color="#9E9E9E")
+                count_text
             ], alignment=ft.MainAxisAlignment.CENTER, horizontal_alignment=ft.CrossAxisAlignment.START),
             width=150, height=120,
             bgcolor="#FFFFFF",
             border_radius=16,
             padding=15,
             on_click=lambda _: open_category(name),
-            shadow=ft.BoxShadow(blur_radius=5, color=ft.colors.with_opacity(0.05, "#000000"))
+            shadow=ft.BoxShadow(blur_radius=5, color=ft.colors.with_opacity(0.05, "#000000")),
+            data=(name, count_text)
         )
 
+    def create_skeleton_card(width, height):
+        """Bloco cinza no lugar de um card enquanto a biblioteca abre"""
+        return ft.Container(width=width, height=height, bgcolor="#ECEAF2", border_radius=16)
+
+    def create_folder_cards():
+        """Cards de todas as pastas, com a contagem vinda do índice de pastas"""
+        return [
+            create_folder_card(getattr(ft.icons, icon, ft.icons.FOLDER), name, my_library.category_count(name), color, bg_color)
+            for name, icon, color, bg_color in my_library.folders()
+        ]
+
+    def refresh_folder_cards():
+        """Atualiza contagens e acrescenta pastas novas sem recriar as existentes"""
+        cards = {card.data[0]: card for card in folders_grid.controls}
+        for name, icon, color, bg_color in my_library.folders():
+            card = cards.get(name)
+            if card is None:
+                folders_grid.controls.append(
+                    create_folder_card(getattr(ft.icons, icon, ft.icons.FOLDER), name, my_library.category_count(name), color, bg_color)
+                )
+            else:
+                card.data[1].value = f"{my_library.category_count(name)} arquivos"
+
+    def open_new_folder_dialog(e):
+        name_field = ft.TextField(label="Nome da pasta", autofocus=True)
+
+        def create_folder(_):
+            name = (name_field.value or "").strip()
+            page.close(dialog)
+            if name:
+                my_library.add_folder(name)
+                refresh_folder_cards()
+                publish()
+
+        dialog = ft.AlertDialog(
+            title=ft.Text("Nova pasta"),
+            content=name_field,
+            actions=[
+                ft.TextButton("Cancelar", on_click=lambda _: page.close(dialog)),
+                ft.TextButton("Criar", on_click=create_folder),
+            ],
+        )
+        page.open(dialog)
+
+    def create_lazy_book_grid(fetch_books, create_card=None):
+        """GridView de cards que busca os livros em lotes conforme a rolagem.
+
+        fetch_books(limit, offset) devolve a próxima fatia da lista; create_card(livro)
+        troca o card padrão. Devolve (grid, fill): fill() completa a primeira tela
+        depois que cards saem do grid (livros movidos ou apagados).
+        """
+        create_card = create_card or (lambda book: create_book_card(book, minimal=True))
+        # Medidas do card no GridView (max_extent=160, child_aspect_ratio=0.7)
+        tile_extent = 160
+        tile_height = tile_extent / 0.7
+        columns = max(1, math.ceil((page.width or 380) / tile_extent))
+        visible_rows = math.ceil((page.height or 800) / tile_height)
+        # Só as linhas visíveis + uma folga são montadas; o resto vem com a rolagem
+        batch_size = columns * (visible_rows + GRID_OVERSCAN_ROWS)
+        exhausted = False
+        loading = False
+
+        def load_more():
+            nonlocal exhausted
+            # O offset é o que está no grid: cards removidos não fazem pular livros
+            books = fetch_books(batch_size, len(grid.controls))
+            exhausted = len(books) < batch_size
+            grid.controls.extend(create_card(b) for b in books)
+
+        def fill():
+            if not exhausted and len(grid.controls) < batch_size:
+                load_more()
+
+        def on_grid_scroll(e):
+            nonlocal loading
+            if exhausted or loading or e.max_scroll_extent is None:
+                return
+            if e.max_scroll_extent - e.pixels > tile_height * GRID_OVERSCAN_ROWS:
+                return
+            loading = True
+            try:
+                load_more()
+                publish(grid)
+            finally:
+                loading = False
+
+        grid = ft.GridView(
+            runs_count=2,
+            max_extent=tile_extent,
+            child_aspect_ratio=0.7,
+            spacing=10,
+            run_spacing=10,
+            padding=20,
+            expand=True,
+            on_scroll=on_grid_scroll,
+            on_scroll_interval=100
+        )
+        load_more()
+        return grid, fill
+
     # --- Navegação ---
 
+    def publish(*controls):
+        """page.update() medido pela instrumentação"""
+        # Toda atualização da tela conta como uso: a pré-renderização espera
+        prewarm.touch()
+        with perf.span("page.update", len(controls) or "page"):
+            page.update(*controls)
+
+    def on_screen(action):
+        """Handler que roda action(e) como tarefa da tela atual (cancelada ao sair dela)"""
+        async def handler(e):
+            task = asyncio.create_task(action(e))
+            screen_tasks.add(task)
+            task.add_done_callback(screen_tasks.discard)
+        return handler
+
     def open_reader(book):
         nonlocal current_book
         current_book = book
+        progress.save_progress(book, progress.page_of(book))
         page.go("/reader")
 
     def open_category(category_name):
@@ -106,24 +375,334 @@ def main(page: ft.Page):
         selected_category = category_name
         page.go("/category")
 
+    def show_search_results(query, books):
+        """Troca o conteúdo da home pelos resultados (ou volta ao normal)"""
+        searching = bool(query.strip())
+        search_section.visible = searching
+        browse_section.visible = not searching
+        if searching:
+            search_results.controls = [create_book_card(b, minimal=True) for b in books] or [
+                ft.Text("Nenhum livro encontrado", size=14, color="#9E9E9E")
+            ]
+        else:
+            search_results.controls = []
+        publish(search_section, browse_section)
+
+    search_debouncer = SearchDebouncer(lambda query: my_library.search(query), show_search_results)
+
     def search_books(e):
-        pass 
+        search_debouncer.submit(e.control.value or "")
+
+    # --- Importação ---
+
+    def on_import_results(results, category_of):
+        """Chega da thread de importação, em lotes, conforme os arquivos ficam prontos"""
+        for result in results:
+            if result.get("thumbnails"):
+                thumbnail_cache.put_many(result["hash"], result["thumbnails"])
+        my_library.add_imported(results, category_of)
+        # Só as pastas: uma importação longa não pode redesenhar a tela inteira
+        refresh_folder_cards()
+        publish(folders_grid)
+
+    def on_import_progress(done, total):
+        import_status.visible = True
+        import_text.value = f"Importando {done} de {total}"
+        import_bar.value = done / total if total else None
+        publish(import_status)
+
+    def on_import_done(cancelled):
+        nonlocal import_job
+        job = import_job
+        import_job = None
+        summary = "Importação cancelada" if cancelled else f"{job.imported} livros importados"
+        if job.skipped:
+            summary += f", {job.skipped} sem mudanças"
+        if job.duplicates:
+            summary += f", {job.duplicates} já estavam na biblioteca"
+        if job.failed:
+            summary += f", {len(job.failed)} com erro"
+        import_status.visible = False
+        publish(import_status)
+        page.open(ft.SnackBar(ft.Text(summary)))
+
+    def start_import(paths, folder_import):
+        nonlocal import_job
+        if not paths or import_job is not None:
+            return
+        # Pasta escolhida: cada subpasta vira uma pasta do app
+        if folder_import:
+            category_of = lambda path: os.path.basename(os.path.dirname(path)) or "Importados"
+        else:
+            category_of = lambda path: "Importados"
+        from importer import ImportJob
+
+        import_job = ImportJob(
+            library_store, paths, lambda results: on_import_results(results, category_of),
+            on_progress=on_import_progress, on_done=on_import_done
+        )
+        import_job.start()
+
+    def cancel_import(e):
+        if import_job is not None:
+            import_job.cancel()
+
+    def on_files_picked(e):
+        start_import([f.path for f in e.files or [] if f.path], folder_import=False)
+
+    def on_folder_picked(e):
+        start_import([e.path] if e.path else [], folder_import=True)
+
+    files_picker = ft.FilePicker(on_result=on_files_picked)
+    folder_picker = ft.FilePicker(on_result=on_folder_picked)
+    page.overlay.extend([files_picker, folder_picker])
+
+    def open_import_sheet(e):
+        def pick(action):
+            page.close(sheet)
+            action()
+
+        sheet = ft.BottomSheet(
+            ft.Container(
+                content=ft.Column([
+                    ft.ListTile(
+                        leading=ft.Icon(ft.icons.PICTURE_AS_PDF), title=ft.Text("Arquivos PDF / CBZ"),
+                        on_click=lambda _: pick(lambda: files_picker.pick_files(
+                            allow_multiple=True, file_type=ft.FilePickerFileType.CUSTOM,
+                            allowed_extensions=["pdf", "cbz", "zip"]
+                        ))
+                    ),
+                    ft.ListTile(
+                        leading=ft.Icon(ft.icons.FOLDER_OPEN), title=ft.Text("Pasta inteira"),
+                        on_click=lambda _: pick(folder_picker.get_directory_path)
+                    ),
+                ], tight=True),
+                padding=10
+            )
+        )
+        page.open(sheet)
+
+    # --- Desempenho ---
+
+    def open_perf_panel(e):
+        """Painel de depuração: tempos medidos, acertos de cache e exportação do trace"""
+        rows = ft.Column(spacing=2, scroll=ft.ScrollMode.AUTO, height=260)
+        status = ft.Text(size=11, color="#9E9E9E")
+
+        def fill():
+            rows.controls = [
+                ft.Text(
+                    f"{name}: {samples}x  média {mean:.1f} ms  p95 {p95:.1f}  máx {worst:.1f}",
+                    size=12, font_family="monospace", color="#000000"
+                )
+                for name, (samples, mean, p95, worst) in perf.recorder.summary().items()
+            ] or [ft.Text("Nenhuma amostra ainda", size=12, color="#9E9E9E")]
+            counters = dict(perf.recorder.counters)
+            stats = page_cache.stats()
+            counters.update({
+                "page_cache": f"{stats['entries']} págs, {stats['bytes'] // 1024} KB, acerto {stats['hit_rate']:.0%}"
+            })
+            rows.controls.extend(
+                ft.Text(f"{name}: {value}", size=12, font_family="monospace", color="#616161")
+                for name, value in sorted(counters.items())
+            )
+
+        def refresh(_):
+            fill()
+            sheet.update()
+
+        def toggle(e):
+            perf.recorder.enabled = e.control.value
+            status.value = "Medindo" if perf.recorder.enabled else "Desligado"
+            status.update()
+
+        def clear(_):
+            perf.recorder.clear()
+            refresh(_)
+
+        def export(_):
+            name = datetime.datetime.now().strftime("trace-%Y%m%d-%H%M%S.json")
+            path = perf.recorder.export(os.path.join(DATA_DIR, "traces", name))
+            status.value = f"Trace salvo em {path}"
+            status.update()
+
+        fill()
+        status.value = "Medindo" if perf.recorder.enabled else "Desligado"
+        sheet = ft.BottomSheet(
+            ft.Container(
+                content=ft.Column([
+                    ft.Row([
+                        ft.Text("Desempenho", size=16, weight=ft.FontWeight.BOLD, color="#000000"),
+                        ft.Switch(value=perf.recorder.enabled, active_color="#673AB7", on_change=toggle),
+                    ], alignment=ft.MainAxisAlignment.SPACE_BETWEEN),
+                    status,
+                    rows,
+                    ft.Row([
+                        ft.TextButton("Atualizar", on_click=refresh),
+                        ft.TextButton("Limpar", on_click=clear),
+                        ft.TextButton("Exportar trace", on_click=export),
+                    ], alignment=ft.MainAxisAlignment.END),
+                ], tight=True),
+                padding=20
+            )
+        )
+        page.open(sheet)
+
+    # --- Sincronização ---
+
+    async def sync_progress(announce=False):
+        """Troca o log de progresso com a pasta de sincronização e atualiza a home"""
+        try:
+            updated = await asyncio.to_thread(my_library.sync_log.exchange, my_library.apply_synced_progress)
+        except OSError:
+            updated = None  # Pasta indisponível (cartão removido, permissão negada)
+        if updated and page.route == "/":
+            refresh_home_view()
+            publish()
+        if announce:
+            if updated is None:
+                summary = "Pasta de sincronização indisponível"
+            else:
+                summary = f"{len(updated)} livros atualizados por outros aparelhos"
+            page.open(ft.SnackBar(ft.Text(summary)))
+
+    async def on_sync_folder_picked(e):
+        if e.path:
+            await asyncio.to_thread(my_library.sync_log.set_folder, e.path)
+            await sync_progress(announce=True)
+
+    sync_picker = ft.FilePicker(on_result=on_sync_folder_picked)
+    page.overlay.append(sync_picker)
+
+    def open_settings_sheet(e):
+        def pick(action):
+            page.close(sheet)
+            action()
+
+        tiles = []
+        if my_library is not None and my_library.sync_log is not None:
+            tiles += [
+                ft.ListTile(
+                    leading=ft.Icon(ft.icons.FOLDER_SHARED), title=ft.Text("Pasta de sincronização"),
+                    subtitle=ft.Text(my_library.sync_log.folder or "Nenhuma"),
+                    on_click=lambda _: pick(sync_picker.get_directory_path)
+                ),
+                ft.ListTile(
+                    leading=ft.Icon(ft.icons.SYNC), title=ft.Text("Sincronizar agora"),
+                    on_click=lambda _: pick(lambda: page.run_task(sync_progress, True))
+                ),
+            ]
+        tiles.append(ft.ListTile(
+            leading=ft.Icon(ft.icons.SPEED), title=ft.Text("Desempenho"),
+            on_click=lambda _: pick(lambda: open_perf_panel(None))
+        ))
+        sheet = ft.BottomSheet(ft.Container(content=ft.Column(tiles, tight=True), padding=10))
+        page.open(sheet)
+
+    def on_navigation(e):
+        if e.control.selected_index == 3:
+            # Configurações ainda não tem tela própria: abre as opções e volta para Home
+            e.control.selected_index = 0
+            publish(e.control)
+            open_settings_sheet(e)
 
     # --- Views ---
 
     def get_home_view():
-        recent_books = sorted(my_library, key=lambda x: x.last_read, reverse=True)[:2]
-        
-        # Cores manuais para as pastas (Icone / Fundo bem clarinho)
-        # Pink: #E91E63 / #FCE4EC
-        # Purple: #9C27B0 / #F3E5F5
+        nonlocal recent_row, search_results, search_section, browse_section, folders_grid
+        nonlocal import_status, import_text, import_bar, search_field, import_fab, see_all_button
+        # Sem a biblioteca aberta ainda, a home sai como esqueleto (ver fill_home)
+        ready = progress is not None
         
-        folders_grid = ft.Row([
-            create_folder_card(ft.icons.PETS, "Omegaverse", 5, "#E91E63", "#FCE4EC"),
-            create_folder_card(ft.icons.SCHOOL, "Escolar", 3, "#E91E63", "#FCE4EC"),
-            create_folder_card(ft.icons.TOKEN, "Fantasia", 8, "#9C27B0", "#F3E5F5"),
-            create_folder_card(ft.icons.THEATER_COMEDY, "Drama", 2, "#9C27B0", "#F3E5F5"),
-        ], wrap=True, alignment=ft.MainAxisAlignment.SPACE_BETWEEN)
+        # Ícones e cores das pastas ficam no banco (tabela folders)
+        folders_grid = ft.Row(
+            create_folder_cards() if ready else [create_skeleton_card(150, 120) for _ in range(4)],
+            wrap=True, alignment=ft.MainAxisAlignment.SPACE_BETWEEN
+        )
+
+        recent_row = ft.Row(
+            [create_book_card(book) for book in progress.recent(2)] if ready
+            else [create_skeleton_card(140, 210) for _ in range(2)],
+            scroll=ft.ScrollMode.ALWAYS
+        )
+
+        search_results = ft.Row(wrap=True, spacing=10, run_spacing=10)
+        search_section = ft.Container(
+            content=ft.Column([
+                ft.Text("Resultados", size=16, weight=ft.FontWeight.BOLD, color="#000000"),
+                search_results
+            ]),
+            padding=ft.padding.symmetric(horizontal=20),
+            visible=False
+        )
+
+        import_text = ft.Text(size=12, color="#000000")
+        import_bar = ft.ProgressBar(color="#7C4DFF", bgcolor="#EDE7F6", height=4)
+        import_status = ft.Container(
+            content=ft.Column([
+                ft.Row([
+                    import_text,
+                    ft.IconButton(ft.icons.CLOSE, icon_size=18, tooltip="Cancelar", on_click=cancel_import)
+                ], alignment=ft.MainAxisAlignment.SPACE_BETWEEN),
+                import_bar
+            ], spacing=0),
+            padding=ft.padding.symmetric(horizontal=20),
+            visible=False
+        )
+
+        search_field = ft.TextField(
+            prefix_icon=ft.icons.SEARCH,
+            hint_text="Love stage",
+            border=ft.InputBorder.NONE,
+            bgcolor="#FFFFFF",
+            border_radius=30,
+            content_padding=15,
+            text_size=14,
+            on_change=search_books,
+            disabled=not ready
+        )
+        import_fab = ft.FloatingActionButton(
+            icon=ft.icons.ADD, bgcolor="#7C4DFF", shape=ft.CircleBorder(), on_click=open_import_sheet, disabled=not ready,
+            visible=not SERVER_MODE
+        )
+
+        see_all_button = ft.Container(
+            content=ft.Text("Ver tudo", size=12, color="#673AB7", weight=ft.FontWeight.BOLD),
+            on_click=lambda _: page.go("/recent"),
+            disabled=not ready
+        )
+
+        browse_section = ft.Column([
+            ft.Container(
+                content=ft.Row([
+                    ft.Text("Continuar Lendo", size=16, weight=ft.FontWeight.BOLD, color="#000000"),
+                    see_all_button
+                ], alignment=ft.MainAxisAlignment.SPACE_BETWEEN),
+                padding=ft.padding.symmetric(horizontal=20)
+            ),
+            ft.Container(
+                content=recent_row,
+                padding=ft.padding.only(left=20)
+            ),
+
+            ft.Container(
+                content=ft.Row([
+                    ft.Text("Minhas Pastas", size=16, weight=ft.FontWeight.BOLD, color="#000000"),
+                    ft.Row([
+                        ft.IconButton(
+                            ft.icons.CREATE_NEW_FOLDER, icon_size=20, icon_color="#000000",
+                            on_click=open_new_folder_dialog, visible=not SERVER_MODE
+                        ),
+                        ft.Icon(ft.icons.SORT_BY_ALPHA, size=20, color="#000000")
+                    ], spacing=0)
+                ], alignment=ft.MainAxisAlignment.SPACE_BETWEEN),
+                padding=ft.padding.symmetric(horizontal=20, vertical=10)
+            ),
+            ft.Container(
+                content=folders_grid,
+                padding=ft.padding.symmetric(horizontal=20)
+            )
+        ])
 
         return ft.View(
             "/",
@@ -139,52 +718,22 @@ def main(page: ft.Page):
                 
                 # Barra de Pesquisa
                 ft.Container(
-                    content=ft.TextField(
-                        prefix_icon=ft.icons.SEARCH,
-                        hint_text="Love stage",
-                        border=ft.InputBorder.NONE,
-                        bgcolor="#FFFFFF",
-                        border_radius=30,
-                        content_padding=15,
-                        text_size=14,
-                        on_change=search_books
-                    ),
+                    content=search_field,
                     padding=ft.padding.symmetric(horizontal=20)
                 ),
 
+                # Progresso da importação
+                import_status,
+
                 # Conteúdo
                 ft.Column([
-                    ft.Container(
-                        content=ft.Row([
-                            ft.Text("Continuar Lendo", size=16, weight=ft.FontWeight.BOLD, color="#000000"),
-                            ft.Text("Ver tudo", size=12, color="#673AB7", weight=ft.FontWeight.BOLD)
-                        ], alignment=ft.MainAxisAlignment.SPACE_BETWEEN),
-                        padding=ft.padding.symmetric(horizontal=20)
-                    ),
-                    ft.Container(
-                        content=ft.Row(
-                            [create_book_card(book) for book in recent_books],
-                            scroll=ft.ScrollMode.ALWAYS
-                        ),
-                        padding=ft.padding.only(left=20)
-                    ),
-
-                    ft.Container(
-                        content=ft.Row([
-                            ft.Text("Minhas Pastas", size=16, weight=ft.FontWeight.BOLD, color="#000000"),
-                            ft.Icon(ft.icons.SORT_BY_ALPHA, size=20, color="#000000")
-                        ], alignment=ft.MainAxisAlignment.SPACE_BETWEEN),
-                        padding=ft.padding.symmetric(horizontal=20, vertical=10)
-                    ),
-                    ft.Container(
-                        content=folders_grid,
-                        padding=ft.padding.symmetric(horizontal=20)
-                    )
+                    search_section,
+                    browse_section,
                 ], scroll=ft.ScrollMode.AUTO, expand=True),
 
                 # Botão Flutuante
                 ft.Container(
-                    content=ft.FloatingActionButton(icon=ft.icons.ADD, bgcolor="#7C4DFF", shape=ft.CircleBorder()),
+                    content=import_fab,
                     alignment=ft.alignment.bottom_center,
                     padding=10
                 ),
@@ -200,39 +749,365 @@ def main(page: ft.Page):
                     height=60,
                     bgcolor="#FFFFFF",
                     indicator_color="transparent",
-                    icon_color="#9E9E9E",
-                    selected_index=0
+                    selected_index=0,
+                    on_change=on_navigation
                 )
             ],
             bgcolor="#F5F5FA",
             padding=0
         )
 
-    def get_reader_view():
-        
-        def change_page(delta):
-            new_page = current_book.current_page + delta
-            if 0 <= new_page <= current_book.total_pages:
-                current_book.current_page = new_page
-                page_counter.value = f"Página {current_book.current_page} de {current_book.total_pages}"
-                page.update()
-
-        page_counter = ft.Text(f"Página {current_book.current_page} de {current_book.total_pages}", color="#000000")
-        
+    pixel_ratio = PIXEL_RATIO or (
+        2.0 if page.platform in (ft.PagePlatform.ANDROID, ft.PagePlatform.IOS, ft.PagePlatform.MACOS) else 1.0
+    )
+
+    def reader_pixels(aspect_ratio=DEFAULT_ASPECT_RATIO, zoom=1.0):
+        """Largura, em pixels do aparelho, que uma página ocupa no leitor"""
+        width = page.width or 380
+        if not continuous_reading:
+            # Página inteira na tela: páginas altas são limitadas pela altura
+            width = min(width, max(1, (page.height or 800) - READER_CHROME_HEIGHT) / aspect_ratio) * zoom
+        return width * pixel_ratio
+
+    def create_continuous_pages(reader, aspect_ratio, current_page, on_visible_page):
+        """Rolagem vertical contínua (webtoon) com uma janela deslizante de páginas.
+
+        Só existem `window` slots de imagem; espaçadores acima e abaixo ocupam a
+        altura das páginas de fora, e os slots que saem da tela são reaproveitados
+        para as que entram. A rolagem nunca decodifica: o que não está no cache
+        vai para o worker e aparece quando fica pronto.
+        """
+        page_count = reader.page_count
+        width = page.width or 380
+        slot_height = width * aspect_ratio
+        visible_pages = math.ceil((page.height or 800) / slot_height) + 1
+        window = min(page_count, visible_pages + 2 * CONTINUOUS_BEHIND_PAGES)
+        first_page = min(current_page, page_count - 1)
+        visible_page = first_page
+        start = max(0, min(first_page - CONTINUOUS_BEHIND_PAGES, page_count - window))
+        last_scroll = (time.monotonic(), first_page * slot_height)
+
+        top_spacer = ft.Container(height=start * slot_height)
+        bottom_spacer = ft.Container(height=(page_count - start - window) * slot_height)
+        slots = [
+            ft.Container(
+                content=ft.Image(src_base64="", width=width, height=slot_height, fit=ft.ImageFit.FIT_WIDTH, visible=False),
+                height=slot_height,
+                bgcolor="#EEEEEE",
+            )
+            for _ in range(window)
+        ]
+        # A imagem de cada slot; enquanto a página dele não abre, o slot mostra um aviso no lugar
+        images = {id(slot): slot.content for slot in slots}
+
+        def error_placeholder():
+            return ft.Column(
+                [
+                    ft.Icon(ft.icons.BROKEN_IMAGE, color="#9E9E9E"),
+                    ft.Text("Não foi possível abrir esta página", size=12, color="#9E9E9E"),
+                ],
+                alignment=ft.MainAxisAlignment.CENTER,
+                horizontal_alignment=ft.CrossAxisAlignment.CENTER,
+            )
+
+        def assign(slot, index):
+            slot.data = index
+            image = slot.content = images[id(slot)]
+            data = reader.cached(index)
+            if data is None:
+                # Limpa a página anterior para o slot reciclado não reenviá-la
+                image.src_base64 = ""
+                image.visible = False
+                reader.request(index, on_decoded)
+            else:
+                image.src_base64 = base64.b64encode(data).decode("ascii")
+                image.visible = True
+
+        def on_decoded(index, data):
+            # Chega do worker; o slot pode já ter sido reciclado para outra página.
+            # Sem dados a página não abriu: o slot mostra o aviso em vez de ficar cinza
+            for slot in list(slots):
+                image = images[id(slot)]
+                if slot.data == index and slot.content is image and not image.visible:
+                    if data is None:
+                        slot.content = error_placeholder()
+                    else:
+                        image.src_base64 = base64.b64encode(data).decode("ascii")
+                        image.visible = True
+                    if slot.page:
+                        publish(slot)
+
+        def on_scroll(e):
+            nonlocal start, last_scroll, visible_page
+            now = time.monotonic()
+            velocity = (e.pixels - last_scroll[1]) / max(now - last_scroll[0], 0.001)
+            last_scroll = (now, e.pixels)
+            first = max(0, min(page_count - 1, int(e.pixels // slot_height)))
+            new_start = max(0, min(first - CONTINUOUS_BEHIND_PAGES, page_count - window))
+            shift = new_start - start
+            if shift:
+                if abs(shift) >= window:
+                    moved = list(slots)
+                elif shift > 0:
+                    moved = slots[:shift]
+                    slots[:] = slots[shift:] + moved
+                else:
+                    moved = slots[shift:]
+                    slots[:] = moved + slots[:shift]
+                start = new_start
+                for offset, slot in enumerate(slots):
+                    if any(slot is m for m in moved):
+                        assign(slot, start + offset)
+                top_spacer.height = start * slot_height
+                bottom_spacer.height = (page_count - start - window) * slot_height
+                column.controls[1:-1] = slots
+                publish(column)
+
+            # Decodifica à frente na direção da rolagem, mais longe quanto mais rápida
+            ahead = min(
+                CONTINUOUS_MAX_AHEAD,
+                max(reader.prefetch_radius, math.ceil(abs(velocity) * CONTINUOUS_LOOKAHEAD_SECONDS / slot_height)),
+            )
+            if velocity >= 0:
+                reader.prefetch(start + window - 1, ahead=ahead, behind=0)
+            else:
+                reader.prefetch(start, ahead=0, behind=ahead)
+            if first != visible_page:
+                visible_page = first
+                on_visible_page(first)
+
+        for offset, slot in enumerate(slots):
+            assign(slot, start + offset)
+        column = ft.Column(
+            [top_spacer] + slots + [bottom_spacer],
+            spacing=0,
+            scroll=ft.ScrollMode.AUTO,
+            expand=True,
+            on_scroll=on_scroll,
+            on_scroll_interval=50,
+        )
+        return column, first_page * slot_height
+
+    async def get_reader_view():
+        """View do leitor, ou None se outra navegação chegou enquanto ela era montada"""
+        nonlocal renderer, pending_scroll, reader_zoom, reader_aspect
+        # Depois de cada await a tela (e até o livro aberto) pode ter mudado: daqui em
+        # diante valem o livro e o renderer locais, e uma chamada velha desiste
+        generation = navigation
+        book = current_book
+
+        def stale():
+            return navigation != generation or page.route != "/reader"
+
+        reader = renderer
+        if reader is None and book.path:
+            try:
+                # Abrir o arquivo lê disco: fica fora do loop de eventos
+                path = await asyncio.to_thread(my_library.available_path, book)
+                opened = await asyncio.to_thread(
+                    PageRenderer, path, page_cache, disk_cache=page_disk_cache, content_hash=book.content_hash
+                )
+            except Exception:
+                # Arquivo sumiu ou motor de PDF indisponível: mantém o placeholder
+                opened = None
+            if stale():
+                # O usuário saiu enquanto o livro abria
+                if opened:
+                    await asyncio.to_thread(opened.close)
+                return None
+            if opened:
+                # A partir daqui quem fecha é o route_change que sair do leitor
+                renderer = reader = opened
+                book.total_pages = reader.page_count
+                # Livros importados antes do índice de capítulos ganham o seu aqui
+                chapters = await asyncio.to_thread(reader.chapters)
+                await asyncio.to_thread(my_library.set_chapters, book, chapters)
+                if stale():
+                    return None
+
+        reader_zoom = 1.0
+        if reader:
+            # As páginas são renderizadas no tamanho em que aparecem (tela × densidade)
+            aspect = await asyncio.to_thread(reader.aspect_ratio)
+            if stale():
+                return None
+            reader_aspect = aspect
+            reader.set_width(reader_pixels(reader_aspect))
+
+        chapter_index = my_library.chapters(book)
+        last_page = reader.page_count - 1 if reader else book.total_pages
+        # Página desta sessão: outra aba do mesmo leitor pode gravar no progresso
+        # ao mesmo tempo, mas não muda a página mostrada aqui
+        reading_page = min(progress.page_of(book), last_page)
+
+        async def load_page(index, jump=True):
+            """(dados, True se na resolução da tela). Do cache na hora; senão decodifica
+            numa thread sem travar a interface. Num salto (abrir, capítulo, slider) vem
+            antes uma prévia rápida; virando a página, a vizinha já está a caminho no worker"""
+            data, full = reader.cached_any(index)
+            if data is None:
+                data = await asyncio.to_thread(reader.preview, index) if jump else None
+                full = data is None
+                if full:
+                    data = await asyncio.to_thread(reader.render, index)
+            return data, full
+
+        def show_page(index, data, full=True):
+            if data is not None:
+                page_image.src_base64 = base64.b64encode(data).decode("ascii")
+            # As vizinhas são decodificadas em segundo plano antes do próximo toque
+            reader.prefetch(index)
+            if not full:
+                # Prévia na tela: a resolução certa vem do worker se o leitor ficar na página
+                reader.upgrade(index, on_upgraded)
+
+        def on_upgraded(index, data):
+            # Chega do worker; o leitor pode já estar em outra página. Sem dados
+            # (a página não decodificou) a prévia continua na tela
+            if data is None:
+                return
+            if index == min(reading_page, reader.page_count - 1) and page_image.page:
+                page_image.src_base64 = base64.b64encode(data).decode("ascii")
+                publish(page_image)
+
+        gesture_scale = 1.0
+
+        def on_zoom_update(e):
+            nonlocal gesture_scale
+            gesture_scale = e.scale or 1.0
+
+        def on_zoom_end(e):
+            nonlocal reader_zoom, gesture_scale
+            reader_zoom = min(MAX_READER_ZOOM, max(1.0, reader_zoom * gesture_scale))
+            gesture_scale = 1.0
+            before = reader.width
+            # Só aproximar além do degrau atual refaz a página; afastar usa a maior que já existe
+            if reader.set_width(reader_pixels(reader_aspect, reader_zoom)) and reader.width > before:
+                index = min(reading_page, reader.page_count - 1)
+                reader.prefetch(index)
+                reader.upgrade(index, on_upgraded)
+
+        def counter_text(page_number):
+            text = f"Página {page_number} de {book.total_pages}"
+            number = chapter_index.chapter_of(page_number)
+            return text if number is None else f"Cap. {number + 1} · {text}"
+
+        def save_reading(new_page):
+            nonlocal reading_page
+            reading_page = new_page
+            progress.save_progress(book, new_page)
+            page_counter.value = counter_text(new_page)
+            scrubber.value = new_page
+
+        async def go_to_page(new_page):
+            """Vai direto para a página; as do meio nunca são renderizadas"""
+            if not 0 <= new_page <= last_page:
+                return
+            jump = abs(new_page - reading_page) > (reader.prefetch_radius if reader else 0)
+            save_reading(new_page)
+            if reader and continuous_reading:
+                # A janela de slots é montada de novo em volta da página
+                page.go("/reader")
+                return
+            if not reader:
+                publish(page_counter, scrubber)
+                return
+            with perf.span("go_to_page", new_page):
+                index = min(new_page, reader.page_count - 1)
+                if not reader.is_cached(index):
+                    # O número muda já; a imagem vem quando a decodificação terminar
+                    publish(page_counter, scrubber)
+                data, full = await load_page(index, jump)
+                if reading_page != new_page:
+                    return  # Outro toque chegou antes: esta página já não interessa
+                show_page(index, data, full)
+                publish(page_image, page_counter, scrubber)
+
+        def on_visible_page(index):
+            save_reading(index)
+            publish(page_counter, scrubber)
+
+        def preview_seek(e):
+            # Arrastando: só o número muda, nada é renderizado até soltar
+            page_counter.value = counter_text(round(e.control.value))
+            publish(page_counter)
+
+        def chapter_menu():
+            return ft.PopupMenuButton(
+                icon=ft.icons.TOC,
+                icon_color="#FFFFFF",
+                tooltip="Capítulos",
+                items=[
+                    ft.PopupMenuItem(
+                        text=f"{number + 1}. {title}",
+                        on_click=on_screen(lambda _, start=start: go_to_page(start)),
+                    )
+                    for number, (start, title) in enumerate(chapter_index.items())
+                ],
+            )
+
+        def toggle_continuous(e):
+            nonlocal continuous_reading
+            continuous_reading = not continuous_reading
+            page.go("/reader")
+
+        page_counter = ft.Text(counter_text(reading_page), color="#000000")
+        scrubber = ft.Slider(
+            min=0, max=max(last_page, 1), value=reading_page,
+            disabled=last_page < 1, active_color="#673AB7", inactive_color="#EDE7F6",
+            on_change=preview_seek,
+            on_change_end=on_screen(lambda e: go_to_page(round(e.control.value))),
+        )
+        actions = [chapter_menu()] if chapter_index else []
+
+        if reader:
+            actions.append(ft.IconButton(
+                ft.icons.AUTO_STORIES if continuous_reading else ft.icons.VIEW_DAY,
+                icon_color="#FFFFFF",
+                tooltip="Página a página" if continuous_reading else "Rolagem contínua",
+                on_click=toggle_continuous,
+            ))
+
+        if reader and continuous_reading:
+            pages_column, offset = create_continuous_pages(reader, reader_aspect, reading_page, on_visible_page)
+            pending_scroll = (pages_column, offset)
+            body = ft.Column([
+                pages_column,
+                ft.Container(content=page_counter, padding=ft.padding.only(top=8)),
+                scrubber,
+            ], spacing=0, horizontal_alignment=ft.CrossAxisAlignment.CENTER, expand=True)
+        else:
+            if reader:
+                page_image = ft.Image(src_base64="", fit=ft.ImageFit.CONTAIN, expand=True)
+                index = min(reading_page, reader.page_count - 1)
+                first = await load_page(index)
+                if stale():
+                    return None
+                show_page(index, *first)
+                page_content = [ft.InteractiveViewer(
+                    content=page_image, min_scale=1, max_scale=MAX_READER_ZOOM, expand=True,
+                    on_interaction_update=on_zoom_update, on_interaction_end=on_zoom_end,
+                )]
+            else:
+                page_content = [
+                    ft.Icon(ft.icons.PICTURE_AS_PDF, size=100, color="#E0E0E0"),
+                    ft.Text("Aqui apareceria o PDF", size=20, weight=ft.FontWeight.BOLD, color="#000000"),
+                ]
+            body = ft.Column(page_content + [
+                page_counter,
+                scrubber,
+                ft.Row([
+                    ft.ElevatedButton("Anterior", on_click=on_screen(lambda _: go_to_page(reading_page - 1))),
+                    ft.ElevatedButton("Próximo", on_click=on_screen(lambda _: go_to_page(reading_page + 1))),
+                ], alignment=ft.MainAxisAlignment.CENTER)
+            ], alignment=ft.MainAxisAlignment.CENTER, horizontal_alignment=ft.CrossAxisAlignment.CENTER)
+
         return ft.View(
             "/reader",
             controls=[
-                ft.AppBar(title=ft.Text(current_book.title, color="#FFFFFF"), bgcolor="#673AB7", color="#FFFFFF"),
+                ft.AppBar(title=ft.Text(book.title, color="#FFFFFF"), bgcolor="#673AB7", color="#FFFFFF", actions=actions),
                 ft.Container(
-                    content=ft.Column([
-                        ft.Icon(ft.icons.PICTURE_AS_PDF, size=100, color="#E0E0E0"),
-                        ft.Text("Aqui apareceria o PDF", size=20, weight=ft.FontWeight.BOLD, color="#000000"),
-                        page_counter,
-                        ft.Row([
-                            ft.ElevatedButton("Anterior", on_click=lambda _: change_page(-1)),
-                            ft.ElevatedButton("Próximo", on_click=lambda _: change_page(1)),
-                        ], alignment=ft.MainAxisAlignment.CENTER)
-                    ], alignment=ft.MainAxisAlignment.CENTER, horizontal_alignment=ft.CrossAxisAlignment.CENTER),
+                    content=body,
                     expand=True,
                     alignment=ft.alignment.center,
                     bgcolor="#FFFFFF"
@@ -241,43 +1116,323 @@ def main(page: ft.Page):
         )
     
     def get_category_view():
-        category_books = [b for b in my_library if b.category == selected_category]
-        
+        """Livros da pasta. Toque longo (ou o botão da barra) seleciona vários para agir em lote"""
+        selected = {}  # id -> BLBook selecionado (inclui livros ainda fora do grid)
+        cards = {}  # id -> card já montado no grid
+        selecting = False
+
+        def create_card(book):
+            card = create_book_card(book, minimal=True)
+            card.on_click = lambda _: toggle(card) if selecting else open_reader(book)
+            card.on_long_press = lambda _: toggle(card)
+            cards[book.id] = card
+            paint_selection(card)
+            return card
+
+        def paint_selection(card):
+            chosen = card.data[0].id in selected
+            card.border = ft.border.all(2, "#673AB7") if chosen else None
+            card.bgcolor = "#EDE7F6" if chosen else "#FFFFFF"
+
+        def set_selecting(value):
+            nonlocal selecting
+            selecting = value
+            title.value = f"{len(selected)} selecionados" if selecting else selected_category
+            app_bar.leading = close_button if selecting else None
+            select_button.visible = not selecting
+            select_all_button.visible = actions_menu.visible = selecting
+
+        def toggle(card):
+            book = card.data[0]
+            if selected.pop(book.id, None) is None:
+                selected[book.id] = book
+            paint_selection(card)
+            # Desmarcar o último sai da seleção
+            set_selecting(bool(selected))
+            publish(card, app_bar)
+
+        def start_selection(_):
+            set_selecting(True)
+            publish(app_bar)
+
+        def clear_selection(_=None):
+            painted = [cards[i] for i in selected if i in cards]
+            selected.clear()
+            for card in painted:
+                paint_selection(card)
+            set_selecting(False)
+            publish(app_bar, *painted)
+
+        def select_all(_):
+            # Pelo índice de pastas: vale também para os livros que o grid ainda não montou
+            painted = [card for book_id, card in cards.items() if book_id not in selected]
+            for book in my_library.by_category(selected_category):
+                selected[book.id] = book
+            for card in painted:
+                paint_selection(card)
+            set_selecting(True)
+            # Só os cards que mudaram: atualizar o grid inteiro compararia todos os outros
+            publish(app_bar, *painted)
+
+        async def run_batch(action, message):
+            """action(livros) numa thread (uma transação no banco); a tela muda só onde precisa.
+            message(quantidade) é o aviso no fim"""
+            books = list(selected.values())
+            with perf.span("bulk", len(books)):
+                await asyncio.to_thread(action, books)
+                # Movidos para outra pasta ou apagados: saem do grid
+                gone = {b.id for b in books if selected_category not in my_library.categories_of(b)}
+                if gone:
+                    grid.controls = [c for c in grid.controls if c.data[0].id not in gone]
+                    for book_id in gone:
+                        cards.pop(book_id, None)
+                    fill()
+                selected.clear()
+                changed = [cards[b.id] for b in books if b.id in cards]
+                for card in changed:
+                    paint_selection(card)
+                    update_book_card(card)
+                set_selecting(False)
+                refresh_folder_cards()
+                # O grid só vai inteiro quando perdeu cards; senão, só os cards alterados
+                publish(app_bar, folders_grid, *([grid] if gone else changed))
+            page.open(ft.SnackBar(ft.Text(message(len(books)))))
+
+        def batch_item(text, icon, action, message):
+            return ft.PopupMenuItem(text=text, icon=icon, on_click=on_screen(lambda _: run_batch(action, message)))
+
+        def folder_dialog(title_text, action, message):
+            """Escolha de outra pasta; action(livros, pasta) e message(quantidade, pasta) como em run_batch"""
+            def open_dialog(_):
+                async def choose(name):
+                    page.close(dialog)
+                    await run_batch(lambda books: action(books, name), lambda n: message(n, name))
+
+                dialog = ft.AlertDialog(
+                    title=ft.Text(title_text),
+                    content=ft.Column([
+                        ft.ListTile(
+                            leading=ft.Icon(getattr(ft.icons, icon, ft.icons.FOLDER), color=color),
+                            title=ft.Text(name),
+                            on_click=on_screen(lambda _, name=name: choose(name)),
+                        )
+                        for name, icon, color, _ in my_library.folders() if name != selected_category
+                    ], tight=True, scroll=ft.ScrollMode.AUTO),
+                    actions=[ft.TextButton("Cancelar", on_click=lambda _: page.close(dialog))],
+                )
+                page.open(dialog)
+            return open_dialog
+
+        def open_delete_dialog(_):
+            async def delete(_):
+                page.close(dialog)
+                await run_batch(my_library.remove_books, lambda n: f"{n} livros removidos da biblioteca")
+
+            dialog = ft.AlertDialog(
+                title=ft.Text(f"Remover {len(selected)} livros?"),
+                content=ft.Text("Os arquivos continuam no aparelho; só o progresso e as pastas deles se perdem."),
+                actions=[
+                    ft.TextButton("Cancelar", on_click=lambda _: page.close(dialog)),
+                    ft.TextButton("Remover", on_click=on_screen(delete)),
+                ],
+            )
+            page.open(dialog)
+
+        items = [
+            batch_item("Marcar como lido", ft.icons.DONE_ALL,
+                       lambda books: progress.set_pages(books, lambda b: b.total_pages), lambda n: f"{n} livros marcados como lidos"),
+            batch_item("Marcar como não lido", ft.icons.REMOVE_DONE,
+                       lambda books: progress.set_pages(books, lambda b: 0), lambda n: f"{n} livros marcados como não lidos"),
+            batch_item("Zerar progresso", ft.icons.RESTART_ALT,
+                       lambda books: progress.set_pages(books, lambda b: 0, reset=True), lambda n: f"Progresso de {n} livros zerado"),
+        ]
+        if not SERVER_MODE:
+            # No servidor o catálogo é de todos: cada leitor só mexe no próprio progresso
+            items = [
+                ft.PopupMenuItem(
+                    text="Mover para pasta", icon=ft.icons.DRIVE_FILE_MOVE,
+                    on_click=folder_dialog("Mover para a pasta", my_library.set_category,
+                                           lambda n, name: f"{n} livros movidos para {name}"),
+                ),
+                ft.PopupMenuItem(
+                    text="Adicionar a outra pasta", icon=ft.icons.BOOKMARK_ADD,
+                    on_click=folder_dialog("Adicionar também à pasta", my_library.add_tag,
+                                           lambda n, name: f"{n} livros adicionados a {name}"),
+                ),
+                # Só sai quem está aqui como tag; a pasta principal do livro não muda
+                batch_item("Remover desta pasta", ft.icons.BOOKMARK_REMOVE,
+                           lambda books: my_library.remove_tag(books, selected_category),
+                           lambda n: f"Saíram de {selected_category} os livros que estavam nela como tag"),
+                *items,
+                ft.PopupMenuItem(text="Remover da biblioteca", icon=ft.icons.DELETE, on_click=open_delete_dialog),
+            ]
+
+        title = ft.Text(selected_category, color="#FFFFFF")
+        close_button = ft.IconButton(ft.icons.CLOSE, icon_color="#FFFFFF", tooltip="Cancelar seleção", on_click=clear_selection)
+        select_button = ft.IconButton(ft.icons.CHECKLIST, icon_color="#FFFFFF", tooltip="Selecionar", on_click=start_selection)
+        select_all_button = ft.IconButton(
+            ft.icons.SELECT_ALL, icon_color="#FFFFFF", tooltip="Selecionar tudo", on_click=select_all, visible=False
+        )
+        actions_menu = ft.PopupMenuButton(icon=ft.icons.MORE_VERT, icon_color="#FFFFFF", items=items, visible=False)
+        app_bar = ft.AppBar(
+            title=title, bgcolor="#673AB7", color="#FFFFFF",
+            actions=[select_button, select_all_button, actions_menu],
+        )
+        grid, fill = create_lazy_book_grid(
+            lambda limit, offset: my_library.by_category(selected_category, limit, offset), create_card
+        )
+
         return ft.View(
             "/category",
+            controls=[app_bar, grid],
+            bgcolor="#F5F5FA"
+        )
+
+    def get_recent_view():
+        """Ver tudo: a lista completa de leitura recente, carregada aos poucos"""
+        grid, _ = create_lazy_book_grid(lambda limit, offset: progress.recent(limit, offset))
+
+        return ft.View(
+            "/recent",
             controls=[
-                ft.AppBar(title=ft.Text(selected_category, color="#FFFFFF"), bgcolor="#673AB7", color="#FFFFFF"),
-                ft.GridView(
-                    runs_count=2,
-                    max_extent=160,
-                    child_aspect_ratio=0.7,
-                    spacing=10,
-                    run_spacing=10,
-                    padding=20,
-                    controls=[create_book_card(b, minimal=True) for b in category_books]
-                )
+                ft.AppBar(title=ft.Text("Continuar Lendo", color="#FFFFFF"), bgcolor="#673AB7", color="#FFFFFF"),
+                grid
             ],
             bgcolor="#F5F5FA"
         )
 
-    def route_change(route):
-        page.views.clear()
-        page.views.append(get_home_view())
+    def fill_home():
+        """Troca o esqueleto da primeira pintura pelo conteúdo real"""
+        recent_row.controls = [create_book_card(book) for book in progress.recent(2)]
+        folders_grid.controls = create_folder_cards()
+        search_field.disabled = False
+        import_fab.disabled = False
+        see_all_button.disabled = False
+
+    def schedule_prewarm():
+        """Próximo capítulo dos livros do Continuar Lendo, do mais recente ao mais antigo"""
+        prewarm.plan([
+            (book.path, book.content_hash, pages_to_warm(progress.page_of(book), my_library.chapters(book), book.total_pages))
+            for book in progress.recent(PREWARM_BOOKS) if book.path
+        ], reader_pixels)
+
+    def refresh_home_view():
+        """Atualiza só o que muda ao voltar para a home: progresso e ordem do Continuar Lendo"""
+        recent_books = progress.recent(2)
+        cards = {card.data[0].id: card for card in recent_row.controls}
+        new_cards = [cards.get(book.id) or create_book_card(book) for book in recent_books]
+        for card in new_cards:
+            update_book_card(card)
+        if new_cards != recent_row.controls:
+            recent_row.controls = new_cards
+        for card in search_results.controls:
+            if isinstance(card.data, tuple):
+                update_book_card(card)
+        refresh_folder_cards()
+
+    async def route_change(route):
+        nonlocal renderer, home_view, pending_scroll, progress, navigation
+        navigation += 1
+        with perf.span("route_change", page.route):
+            prewarm.touch()
+            # Decodificações e buscas da tela anterior não interessam mais
+            for task in list(screen_tasks):
+                task.cancel()
+            closing = None
+            if page.route != "/reader" and renderer:
+                closing, renderer = renderer, None
+
+            if home_view is None or not page.views or page.views[0] is not home_view:
+                page.views.clear()
+                if my_library is not None and progress is None:
+                    # Biblioteca já aberta por outra sessão (modo servidor): só o progresso do leitor
+                    progress = await asyncio.to_thread(my_library.progress_for, reader_id)
+                with perf.span("view.home"):
+                    home_view = get_home_view()
+                page.views.append(home_view)
+                if progress is None:
+                    # Primeira pintura: o esqueleto aparece enquanto o banco abre numa thread
+                    publish()
+                    await asyncio.to_thread(load_library)
+                    await asyncio.to_thread(thumbnail_cache.preload)
+                    progress = await asyncio.to_thread(my_library.progress_for, reader_id)
+                    with perf.span("view.fill_home"):
+                        fill_home()
+                    # A busca só é montada depois: não disputa o GIL com a home
+                    my_library.warm_search_index()
+            else:
+                # A home continua montada no cliente: remove só as telas acima dela
+                del page.views[1:]
+                if progress is None:
+                    # A primeira pintura ainda espera o banco: quando ela terminar,
+                    # monta a rota que estiver em page.route
+                    return
+                if page.route == "/":
+                    with perf.span("view.refresh_home"):
+                        refresh_home_view()
         
-        if page.route == "/reader" and current_book:
-            page.views.append(get_reader_view())
-        elif page.route == "/category" and selected_category:
-            page.views.append(get_category_view())
+            if page.route == "/reader" and current_book:
+                with perf.span("view.reader"):
+                    reader_view = await get_reader_view()
+                if reader_view is None:
+                    return
+                page.views.append(reader_view)
+            elif page.route == "/category" and selected_category:
+                with perf.span("view.category"):
+                    page.views.append(get_category_view())
+            elif page.route == "/recent":
+                with perf.span("view.recent"):
+                    page.views.append(get_recent_view())
             
-        page.update()
+            publish()
+            if pending_scroll:
+                # Só dá para rolar depois que a view existe no cliente
+                control, offset = pending_scroll
+                pending_scroll = None
+                if offset:
+                    control.scroll_to(offset=offset, duration=0)
+
+            if page.route != "/reader":
+                # Fecha o livro e grava o progresso pendente depois de a tela já ter mudado
+                if closing:
+                    await asyncio.to_thread(closing.close)
+                await asyncio.to_thread(my_library.flush)
+                if page.route == "/" and my_library.sync_log is not None:
+                    # Progresso de outros aparelhos entra antes de planejar a pré-renderização
+                    await sync_progress()
+                # No servidor não há "ocioso": as sessões dos outros leitores continuam
+                if page.route == "/" and not SERVER_MODE:
+                    await asyncio.to_thread(schedule_prewarm)
 
     def view_pop(view):
         page.views.pop()
         top_view = page.views[-1]
         page.go(top_view.route)
 
+    if SERVER_MODE:
+        # Cada navegador guarda o seu id de leitor; sem um, ganha um novo
+        reader_id = await page.client_storage.get_async(READER_ID_KEY)
+        if not reader_id:
+            reader_id = secrets.token_hex(8)
+            await page.client_storage.set_async(READER_ID_KEY, reader_id)
+
+    def on_resized(e):
+        # Só o leitor depende do tamanho da tela: mudou de degrau, a view é refeita
+        if page.route == "/reader" and renderer and renderer.set_width(reader_pixels(reader_aspect, reader_zoom)):
+            page.go("/reader")
+
+    def on_lifecycle(e):
+        # Em segundo plano o sistema pode matar o app: nada de trabalho de fundo
+        prewarm.set_foreground(e.state in (ft.AppLifecycleState.SHOW, ft.AppLifecycleState.RESUME))
+
     page.on_route_change = route_change
     page.on_view_pop = view_pop
+    page.on_resized = on_resized
+    page.on_app_lifecycle_state_change = on_lifecycle
     page.go(page.route)
 
-ft.app(target=main)
+if __name__ == "__main__":
+    if SERVER_MODE:
+        ft.app(target=main, view=None, port=SERVER_PORT)
+    else:
+        ft.app(target=main)
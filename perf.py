@@ -0,0 +1,118 @@
+import collections
+import json
+import os
+import threading
+import time
+
+# --- Instrumentação ---
+# Tempos dos caminhos quentes (rotas, views, troca de página, decodificação,
+# page.update) e contadores de acerto de cache. Desligada, cada ponto medido
+# custa só a checagem de `enabled`; ligada, as amostras vão para um buffer
+# circular de tamanho fixo e nada cresce sem limite.
+
+DEFAULT_CAPACITY = 4096
+
+
+class _NullSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class _Span:
+    __slots__ = ("recorder", "name", "detail", "start")
+
+    def __init__(self, recorder, name, detail):
+        self.recorder = recorder
+        self.name = name
+        self.detail = detail
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.recorder.record(self.name, self.start, time.perf_counter(), self.detail)
+        return False
+
+
+class Recorder:
+    """Amostras (nome, início, duração, thread, detalhe) num buffer circular"""
+
+    def __init__(self, capacity=DEFAULT_CAPACITY, enabled=False):
+        self.enabled = enabled
+        self.samples = collections.deque(maxlen=capacity)
+        self.counters = collections.Counter()
+        self._origin = time.perf_counter()
+        self._lock = threading.Lock()
+
+    def span(self, name, detail=None):
+        """Context manager que mede o bloco: `with span("decode", index): ...`"""
+        if not self.enabled:
+            return _NULL_SPAN
+        return _Span(self, name, detail)
+
+    def record(self, name, start, end, detail=None):
+        # deque com maxlen descarta a amostra mais antiga sozinho
+        self.samples.append((name, start - self._origin, end - start, threading.current_thread().name, detail))
+
+    def count(self, name, amount=1):
+        if self.enabled:
+            with self._lock:
+                self.counters[name] += amount
+
+    def clear(self):
+        with self._lock:
+            self.samples.clear()
+            self.counters.clear()
+
+    def summary(self):
+        """{nome: (amostras, média ms, p95 ms, máx ms)} das amostras no buffer"""
+        durations = collections.defaultdict(list)
+        for name, _, duration, _, _ in list(self.samples):
+            durations[name].append(duration * 1000)
+        result = {}
+        for name, values in sorted(durations.items()):
+            values.sort()
+            p95 = values[min(len(values) - 1, int(len(values) * 0.95))]
+            result[name] = (len(values), sum(values) / len(values), p95, values[-1])
+        return result
+
+    def export(self, path):
+        """Grava o buffer no formato Trace Event (abre no chrome://tracing e no Perfetto)"""
+        threads = {}
+        events = []
+        for name, start, duration, thread, detail in list(self.samples):
+            event = {
+                "name": name, "ph": "X", "pid": 1,
+                "tid": threads.setdefault(thread, len(threads) + 1),
+                "ts": round(start * 1e6), "dur": round(duration * 1e6),
+            }
+            if detail is not None:
+                event["args"] = {"detail": str(detail)}
+            events.append(event)
+        events.extend(
+            {"name": "thread_name", "ph": "M", "pid": 1, "tid": tid, "args": {"name": thread}}
+            for thread, tid in threads.items()
+        )
+        with self._lock:
+            counters = dict(self.counters)
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        temp = path + ".tmp"
+        with open(temp, "w", encoding="utf-8") as f:
+            json.dump({"traceEvents": events, "otherData": {"counters": counters}}, f)
+        os.replace(temp, path)
+        return path
+
+
+# Ligada desde o arranque com BLREADER_TRACE=1; senão pelo painel de desempenho
+recorder = Recorder(enabled=os.getenv("BLREADER_TRACE") == "1")
+span = recorder.span
+count = recorder.count
@@ -0,0 +1,137 @@
+import threading
+import time
+
+from render import DEFAULT_RESOLUTION, content_key, disk_page_name, open_source, prefetch_idle, resolution_for, stored_width
+
+# --- Pré-renderização no Tempo Ocioso ---
+# Com o app aberto e sem toques por alguns segundos, renderiza o resto do
+# capítulo atual e o capítulo seguinte dos livros do Continuar Lendo e grava
+# no cache de páginas em disco. Abrir amanhã o livro de ontem já encontra as
+# páginas prontas.
+
+# Segundos sem interação até o app ser considerado ocioso
+IDLE_SECONDS = 5.0
+# Pausa entre duas páginas: o trabalho de fundo nunca vira rajada
+PAGE_PAUSE = 0.05
+# Teto de páginas por livro (capítulos muito longos ou livro sem capítulos)
+MAX_PAGES_PER_BOOK = 40
+
+
+def pages_to_warm(current_page, chapters, page_count, max_pages=MAX_PAGES_PER_BOOK):
+    """Da página atual até o fim do próximo capítulo, no máximo `max_pages`"""
+    number = chapters.chapter_of(current_page)
+    following = 0 if number is None else number + 1
+    end = chapters.start_of(following + 1) if following + 1 < len(chapters) else page_count
+    return range(current_page, min(end, current_page + max_pages, page_count))
+
+
+class PrewarmScheduler:
+    """Renderiza no tempo ocioso as próximas páginas dos livros em leitura.
+
+    plan() recebe [(caminho, hash do conteúdo, páginas)] do livro mais recente ao mais antigo
+    e width_of(proporção altura/largura), a largura em que o leitor vai mostrar as
+    páginas de um livro com aquela proporção (a mesma chave do cache em disco).
+    Uma página só é renderizada com o app em primeiro plano, sem interação há
+    `idle_seconds` e com o worker do leitor parado, uma de cada vez. Qualquer
+    toque interrompe; o que já foi para o disco não é refeito.
+    """
+
+    def __init__(self, disk_cache, width=DEFAULT_RESOLUTION, idle_seconds=IDLE_SECONDS, pause=PAGE_PAUSE):
+        self.disk_cache = disk_cache
+        self.width_of = lambda aspect_ratio: width
+        self._aspects = {}  # chave do conteúdo -> proporção da primeira página, como o leitor usa
+        self.idle_seconds = idle_seconds
+        self.pause = pause
+        self.foreground = True
+        self.rendered = 0
+        self._last_input = time.monotonic()
+        self._plan = []
+        self._version = 0
+        self._wake = threading.Condition()
+        self._thread = None
+
+    def touch(self):
+        """Houve interação: o trabalho de fundo espera o app ficar ocioso de novo"""
+        self._last_input = time.monotonic()
+
+    def set_foreground(self, foreground):
+        with self._wake:
+            self.foreground = foreground
+            self._wake.notify()
+
+    def plan(self, books, width_of=None):
+        with self._wake:
+            if width_of is not None:
+                self.width_of = width_of
+            # Só PDFs: as páginas de um CBZ já são imagens prontas no arquivo
+            self._plan = [
+                (path, content_hash, list(pages)) for path, content_hash, pages in books if path.lower().endswith(".pdf")
+            ]
+            self._version += 1
+            self._wake.notify()
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="prewarm", daemon=True)
+                self._thread.start()
+
+    def _wait_time(self):
+        """0 se pode trabalhar agora; senão quanto esperar (None = até plan()/primeiro plano)"""
+        if not self._plan or not self.foreground:
+            return None
+        remaining = self.idle_seconds - (time.monotonic() - self._last_input)
+        if remaining > 0:
+            return remaining
+        return 0 if prefetch_idle() else 0.2
+
+    def _run(self):
+        while True:
+            with self._wake:
+                wait = self._wait_time()
+                while wait != 0:
+                    self._wake.wait(wait)
+                    wait = self._wait_time()
+                version, plan = self._version, self._plan
+            if self._warm(version, plan):
+                with self._wake:
+                    if self._version == version:
+                        self._plan = []
+
+    def _warm(self, version, plan):
+        """Percorre o plano; False se foi interrompido no meio"""
+        width_of = self.width_of
+
+        def missing_pages(key, pages, aspect_ratio):
+            width = resolution_for(width_of(aspect_ratio))
+            # Página já em disco numa largura maior serve ao leitor (ver PageRenderer._from_disk)
+            return width, [i for i in pages if stored_width(self.disk_cache, key, i, width) is None]
+
+        for path, content_hash, pages in plan:
+            try:
+                key = content_key(path, content_hash)
+            except OSError:
+                continue  # Arquivo sumiu
+            aspect_ratio = self._aspects.get(key)
+            if aspect_ratio is not None:
+                width, missing = missing_pages(key, pages, aspect_ratio)
+                if not missing:
+                    continue
+            try:
+                source = open_source(path)
+            except Exception:
+                continue
+            try:
+                if aspect_ratio is None:
+                    # Páginas altas (webtoon, A4) ficam mais estreitas no leitor
+                    aspect_ratio = self._aspects[key] = source.aspect_ratio(0)
+                    width, missing = missing_pages(key, pages, aspect_ratio)
+                for index in missing:
+                    if self._wait_time() != 0 or self._version != version:
+                        return False
+                    if index < source.page_count:
+                        self.disk_cache.write(disk_page_name(key, index, width), source.render(index, width))
+                        self.rendered += 1
+                    time.sleep(self.pause)
+            except Exception:
+                continue  # Página corrompida: segue para o próximo livro
+            finally:
+                source.close()
+        return True
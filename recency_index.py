@@ -0,0 +1,62 @@
+import bisect
+import threading
+
+# --- Índice de Leitura Recente ---
+# Lista sempre ordenada por last_read (mais recente primeiro). Tocar um livro
+# custa O(log n) para achar a posição; o "Continuar Lendo" é só uma fatia.
+
+
+class RecencyIndex:
+    """Livros ordenados pela última leitura, atualizado a cada toque"""
+
+    def __init__(self, rows=()):
+        """rows: (id, timestamp) iniciais, ordenados de uma vez só (touch um a um é O(n²))"""
+        self._stamps = dict(rows)  # id -> timestamp
+        self._order = sorted((-timestamp, book_id) for book_id, timestamp in self._stamps.items())
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._order)
+
+    def touch(self, book_id, timestamp):
+        with self._lock:
+            old = self._stamps.get(book_id)
+            if old == timestamp:
+                return
+            if old is not None:
+                self._discard(book_id, old)
+            self._stamps[book_id] = timestamp
+            bisect.insort(self._order, (-timestamp, book_id))
+
+    def timestamp(self, book_id, default=None):
+        with self._lock:
+            return self._stamps.get(book_id, default)
+
+    def remove(self, book_id):
+        with self._lock:
+            old = self._stamps.pop(book_id, None)
+            if old is not None:
+                self._discard(book_id, old)
+
+    def _discard(self, book_id, timestamp):
+        position = bisect.bisect_left(self._order, (-timestamp, book_id))
+        del self._order[position]
+
+    def ids(self, limit, offset=0):
+        with self._lock:
+            return [book_id for _, book_id in self._order[offset:offset + limit]]
+
+    def ids_excluding(self, limit, offset, excluded):
+        """Como ids(), pulando os livros de `excluded` (conjunto ou dict de ids)"""
+        result = []
+        with self._lock:
+            for _, book_id in self._order:
+                if book_id in excluded:
+                    continue
+                if offset:
+                    offset -= 1
+                    continue
+                result.append(book_id)
+                if len(result) >= limit:
+                    break
+        return result
@@ -0,0 +1,445 @@
+import hashlib
+import itertools
+import os
+import queue
+import struct
+import threading
+from collections import OrderedDict
+
+import perf
+from chapters import folder_chapters, pdf_chapters
+from zipindex import MappedZip
+
+# --- Renderização de Páginas ---
+# O motor de PDF (PyMuPDF) só é importado quando um livro é aberto de verdade.
+
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png", ".webp", ".gif", ".bmp")
+# Proporção (altura/largura) usada quando o cabeçalho da imagem não é reconhecido
+DEFAULT_ASPECT_RATIO = 1.5
+# Larguras (px do aparelho) em que as páginas são renderizadas. O leitor pede o
+# degrau logo acima do espaço que a página ocupa na tela: redimensionar um pouco
+# não invalida o cache, e telas parecidas dividem as mesmas entradas
+RESOLUTION_STEPS = (360, 540, 720, 900, 1080, 1440, 1800, 2160)
+# Resolução sem tela conhecida (ex.: benchmarks): o antigo zoom 1.5 numa página de 600 pt
+DEFAULT_RESOLUTION = 900
+# Bytes lidos do começo de uma imagem para achar o tamanho (cobre um bloco EXIF inteiro)
+IMAGE_HEADER_BYTES = 128 * 1024
+
+
+def resolution_for(pixels):
+    """Degrau de RESOLUTION_STEPS que cobre `pixels` de largura"""
+    for step in RESOLUTION_STEPS:
+        if step >= pixels:
+            return step
+    return RESOLUTION_STEPS[-1]
+
+
+def preview_resolution(width):
+    """Resolução da passada rápida (metade da largura), ou None se `width` já é o mínimo"""
+    step = resolution_for(width / 2)
+    return step if step < width else None
+
+
+def image_size(data):
+    """(largura, altura) lidos do cabeçalho de um PNG/JPEG/GIF, sem decodificar"""
+    if data[:8] == b"\x89PNG\r\n\x1a\n":
+        return struct.unpack(">II", data[16:24])
+    if data[:6] in (b"GIF87a", b"GIF89a"):
+        return struct.unpack("<HH", data[6:10])
+    if data[:2] == b"\xff\xd8":
+        position = 2
+        while position + 9 < len(data):
+            marker, length = struct.unpack(">HH", data[position:position + 4])
+            # SOF0..SOF15 (exceto DHT/JPG/DAC) trazem altura e largura
+            if 0xFFC0 <= marker <= 0xFFCF and marker not in (0xFFC4, 0xFFC8, 0xFFCC):
+                height, width = struct.unpack(">HH", data[position + 5:position + 9])
+                return width, height
+            position += 2 + length
+    return None
+
+
+class PageCache:
+    """Cache LRU das páginas já rasterizadas, limitado por bytes"""
+
+    def __init__(self, max_bytes=64 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self.current_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        return self.get_first((key,))[1]
+
+    def get_first(self, keys, count_miss=True):
+        """(chave, dados) da primeira chave presente, ou (None, None); conta um acerto ou uma
+        falha. count_miss=False deixa a falha para quem vai buscar a página de outro jeito"""
+        with self._lock:
+            for key in keys:
+                data = self._entries.get(key)
+                if data is not None:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return key, data
+            if count_miss:
+                self.misses += 1
+            return None, None
+
+    def count_miss(self):
+        with self._lock:
+            self.misses += 1
+
+    def peek(self, key):
+        """Consulta sem mexer nos contadores nem na ordem LRU"""
+        with self._lock:
+            return self._entries.get(key)
+
+    def put(self, key, data):
+        size = len(data)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self.current_bytes -= len(old)
+            self._entries[key] = data
+            self.current_bytes += size
+            while self.current_bytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self.current_bytes -= len(evicted)
+                self.evictions += 1
+
+    def __contains__(self, key):
+        with self._lock:
+            return key in self._entries
+
+    def __len__(self):
+        return len(self._entries)
+
+    def stats(self):
+        """Contadores para dimensionar o orçamento em aparelhos com pouca RAM"""
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / total if total else 0.0,
+                "evictions": self.evictions,
+                "entries": len(self._entries),
+                "bytes": self.current_bytes,
+                "max_bytes": self.max_bytes,
+            }
+
+
+class PdfSource:
+    """Rasteriza páginas de um PDF com o PyMuPDF"""
+
+    def __init__(self, path):
+        import pymupdf
+
+        self._pymupdf = pymupdf
+        # Aberto pelo caminho (não por bytes): o MuPDF lê a xref e busca cada
+        # objeto no arquivo só quando a página precisa dele
+        self._doc = pymupdf.open(path)
+        self.page_count = self._doc.page_count
+
+    def render(self, index, width):
+        page = self._doc.load_page(index)
+        zoom = width / page.rect.width if page.rect.width else 1
+        pix = page.get_pixmap(matrix=self._pymupdf.Matrix(zoom, zoom))
+        return pix.tobytes("png")
+
+    def preview(self, index, width):
+        """(imagem, resolução) rápida: metade dos pixels de largura custa ~1/4 do tempo"""
+        low = preview_resolution(width)
+        return (self.render(index, low), low) if low else (None, None)
+
+    def chapters(self):
+        return pdf_chapters(self._doc)
+
+    def aspect_ratio(self, index):
+        rect = self._doc.load_page(index).rect
+        return rect.height / rect.width if rect.width else DEFAULT_ASPECT_RATIO
+
+    def close(self):
+        self._doc.close()
+
+
+class CbzSource:
+    """Lê as imagens de um CBZ/ZIP na ordem dos nomes, direto do arquivo mapeado"""
+
+    def __init__(self, path):
+        self._zip = MappedZip(path)
+        self._names = sorted(
+            n for n in self._zip.namelist() if n.lower().endswith(IMAGE_EXTENSIONS)
+        )
+        self.page_count = len(self._names)
+
+    def render(self, index, width):
+        # As páginas de um CBZ já são imagens: basta extrair a entrada. Reduzir
+        # para `width` exigiria decodificar e recodificar o JPEG segurando o GIL,
+        # bem mais caro que enviar a original (ver benchmarks/bench_resolution.py)
+        return self._zip.read(self._names[index])
+
+    def preview(self, index, width):
+        # Extrair a entrada já é o caminho rápido
+        return None, None
+
+    def chapters(self):
+        return folder_chapters(self._names)
+
+    def aspect_ratio(self, index):
+        size = image_size(self._zip.read(self._names[index], IMAGE_HEADER_BYTES))
+        return size[1] / size[0] if size and size[0] else DEFAULT_ASPECT_RATIO
+
+    def close(self):
+        self._zip.close()
+
+
+def file_key(path):
+    """Identifica a versão do arquivo (caminho, tamanho, mtime) nos nomes do cache em disco"""
+    stat = os.stat(path)
+    return hashlib.sha1(f"{path}|{stat.st_size}|{stat.st_mtime_ns}".encode("utf-8")).hexdigest()[:20]
+
+
+def content_key(path, content_hash=None):
+    """Chave das páginas nos caches: o hash do conteúdo, para que cópias do mesmo
+    arquivo dividam as entradas; sem hash (livro não importado), a versão do arquivo"""
+    return content_hash or file_key(path)
+
+
+def disk_page_name(key, index, width):
+    return f"{key}_{index}_w{width}"
+
+
+def stored_width(disk_cache, key, index, width):
+    """Menor degrau >= width em que a página está no cache em disco, ou None"""
+    for step in RESOLUTION_STEPS:
+        if step >= width and disk_page_name(key, index, step) in disk_cache:
+            return step
+    return None
+
+
+def open_source(path):
+    if os.path.splitext(path)[1].lower() in (".cbz", ".zip"):
+        return CbzSource(path)
+    return PdfSource(path)
+
+
+class PageRenderer:
+    """Entrega as páginas de um livro, usando o cache e pré-carregando as vizinhas"""
+
+    def __init__(self, path, cache, width=DEFAULT_RESOLUTION, prefetch_radius=2, disk_cache=None, content_hash=None):
+        self.path = path
+        self.cache = cache
+        # Cada página fica no cache na resolução em que foi renderizada
+        self.width = resolution_for(width)
+        self.prefetch_radius = prefetch_radius
+        # Páginas pré-renderizadas em outra sessão do app (ver prewarm.py)
+        self.disk_cache = disk_cache
+        self.content_key = content_key(path, content_hash)
+        self.closed = False
+        self._source = open_source(path)
+        self.page_count = self._source.page_count
+        # O documento não é thread-safe: leitor e worker revezam pelo lock
+        self._lock = threading.Lock()
+        self._generation = 0
+
+    def set_width(self, pixels):
+        """Nova largura na tela (redimensionamento, zoom). True se mudou de degrau"""
+        width = resolution_for(pixels)
+        if width == self.width:
+            return False
+        self.width = width
+        # Pré-carregamentos pedidos na resolução antiga são descartados
+        self._generation += 1
+        return True
+
+    def _key(self, index, width=None):
+        return (self.content_key, index, self.width if width is None else width)
+
+    def _keys(self, index, lower=False):
+        """Chaves que servem para a resolução atual (ela e as maiores); com lower, as menores no fim"""
+        keys = [self._key(index, w) for w in RESOLUTION_STEPS if w >= self.width]
+        if lower:
+            keys += [self._key(index, w) for w in reversed(RESOLUTION_STEPS) if w < self.width]
+        return keys
+
+    def _peek(self, index):
+        for key in self._keys(index):
+            data = self.cache.peek(key)
+            if data is not None:
+                return data
+        return None
+
+    def render(self, index):
+        """Retorna a página em bytes de imagem (PNG/JPEG), na resolução atual ou maior"""
+        _, data = self.cache.get_first(self._keys(index))
+        if data is None:
+            perf.count("page.miss")
+            data = self._decode(self._key(index), index)
+        else:
+            perf.count("page.hit")
+        return data
+
+    def _decode(self, key, index):
+        width = key[2]
+        with self._lock:
+            if self.closed:
+                return None
+            # Pode ter sido decodificada pelo worker enquanto esperávamos o lock
+            data = self.cache.peek(key)
+            if data is None:
+                data, stored = self._from_disk(index, width)
+                if data is None:
+                    with perf.span("decode", index):
+                        data = self._source.render(index, width)
+                else:
+                    # Entra no cache com a largura que tem de verdade
+                    key = self._key(index, stored)
+                self.cache.put(key, data)
+            return data
+
+    def _from_disk(self, index, width):
+        """(dados, largura) da página no cache em disco, em `width` ou num degrau maior
+        (a pré-renderização pode ter usado outra tela), ou (None, None)"""
+        if self.disk_cache is None:
+            return None, None
+        stored = stored_width(self.disk_cache, self.content_key, index, width)
+        data = None if stored is None else self.disk_cache.read(disk_page_name(self.content_key, index, stored))
+        perf.count("page.disk_miss" if data is None else "page.disk_hit")
+        return data, stored
+
+    def preview(self, index):
+        """Versão rápida da página enquanto a resolução atual não fica pronta, ou None"""
+        with self._lock:
+            if self.closed:
+                return None
+            with perf.span("preview", index):
+                data, width = self._source.preview(index, self.width)
+        if width is not None:
+            # A página não estava no cache (ver cached_any): a prévia conta como a falha
+            self.cache.count_miss()
+            perf.count("page.miss")
+            self.cache.put(self._key(index, width), data)
+        return data
+
+    def is_cached(self, index):
+        """A página está no cache na resolução atual (ou maior)"""
+        return self._peek(index) is not None
+
+    def cached(self, index):
+        """A página se já estiver no cache na resolução atual ou maior; nunca decodifica"""
+        return self.cache.get_first(self._keys(index))[1]
+
+    def cached_any(self, index):
+        """(dados, True se na resolução atual ou maior) da melhor versão em cache, ou (None, False).
+
+        Conta só o acerto: numa falha a página vem de preview() ou render(), que contam.
+        """
+        key, data = self.cache.get_first(self._keys(index, lower=True), count_miss=False)
+        if data is not None:
+            perf.count("page.hit")
+        return data, key is not None and key[2] >= self.width
+
+    def aspect_ratio(self, index=0):
+        with self._lock:
+            if self.closed:
+                return DEFAULT_ASPECT_RATIO
+            return self._source.aspect_ratio(index)
+
+    def chapters(self):
+        """[(página inicial, título)] lidos do próprio arquivo"""
+        with self._lock:
+            if self.closed:
+                return []
+            return self._source.chapters()
+
+    def request(self, index, on_ready):
+        """Decodifica no worker, na frente da fila, e chama on_ready(index, dados).
+
+        Se a página não puder ser decodificada, on_ready recebe dados None.
+        """
+        _prefetch_worker().submit(self, index, None, 0, on_ready)
+
+    def upgrade(self, index, on_ready):
+        """Troca uma prévia pela resolução atual quando o worker fica livre: depois
+        das vizinhas, e descartada se o leitor sair da página antes (novo prefetch)"""
+        _prefetch_worker().submit(self, index, self._generation, self.prefetch_radius + 1, on_ready)
+
+    def prefetch(self, index, ahead=None, behind=None):
+        """Agenda no worker de fundo `ahead` páginas depois e `behind` antes (padrão: o raio)"""
+        ahead = self.prefetch_radius if ahead is None else ahead
+        behind = self.prefetch_radius if behind is None else behind
+        self._generation += 1
+        generation = self._generation
+        for distance in range(1, max(ahead, behind) + 1):
+            for neighbour, limit in ((index + distance, ahead), (index - distance, behind)):
+                if distance <= limit and 0 <= neighbour < self.page_count and not self.is_cached(neighbour):
+                    _prefetch_worker().submit(self, neighbour, generation, distance)
+
+    def _run(self, index, generation, on_ready):
+        # Pré-carregamentos de uma posição antiga do leitor são descartados
+        if self.closed or (generation is not None and generation != self._generation):
+            return
+        data = self._peek(index)
+        if data is None:
+            data = self._decode(self._key(index), index)
+        if on_ready and data is not None:
+            on_ready(index, data)
+
+    def close(self):
+        with self._lock:
+            self.closed = True
+            self._source.close()
+
+
+class _PrefetchWorker:
+    """Thread única que decodifica páginas fora do evento da interface.
+
+    A fila é por prioridade: páginas pedidas pela tela (0) passam na frente
+    das vizinhas, e as mais próximas passam na frente das distantes.
+    """
+
+    def __init__(self):
+        self._queue = queue.PriorityQueue()
+        self._order = itertools.count()
+        self._thread = threading.Thread(target=self._loop, name="page-prefetch", daemon=True)
+        self._thread.start()
+
+    def submit(self, renderer, index, generation, priority=1, on_ready=None):
+        self._queue.put((priority, next(self._order), renderer, index, generation, on_ready))
+
+    def _loop(self):
+        while True:
+            _, _, renderer, index, generation, on_ready = self._queue.get()
+            try:
+                renderer._run(index, generation, on_ready)
+            except Exception:
+                # Uma página corrompida não pode derrubar o worker; quem esperava
+                # por ela fica sabendo, para não deixar o lugar em branco
+                if on_ready:
+                    try:
+                        on_ready(index, None)
+                    except Exception:
+                        pass
+
+
+_worker = None
+_worker_lock = threading.Lock()
+
+
+def prefetch_idle():
+    """True se o worker do leitor não tem nada na fila"""
+    worker = _worker
+    return worker is None or worker._queue.empty()
+
+
+def _prefetch_worker():
+    global _worker
+    with _worker_lock:
+        if _worker is None:
+            _worker = _PrefetchWorker()
+        return _worker
@@ -0,0 +1,190 @@
+import bisect
+import heapq
+import re
+import threading
+import unicodedata
+
+# --- Busca ---
+# Índice invertido com busca por prefixo. Títulos, categorias e (quando houver)
+# o texto extraído do PDF passam pelo mesmo dobramento de acentos e caixa.
+
+TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+# Peso de cada campo na pontuação; o prefixo vale um pouco menos que a palavra inteira
+TITLE_WEIGHT = 3.0
+LEAD_BONUS = 0.5  # Primeira palavra do título: "love" acha "Love Stage" antes de "My Love"
+CATEGORY_WEIGHT = 1.5
+TEXT_WEIGHT = 0.5
+PREFIX_FACTOR = 0.7
+
+
+def fold(text):
+    """Remove acentos e caixa: "Coração" -> "coracao" """
+    decomposed = unicodedata.normalize("NFKD", text)
+    return "".join(c for c in decomposed if not unicodedata.combining(c)).casefold()
+
+
+def tokenize(text):
+    return TOKEN_RE.findall(fold(text))
+
+
+class SearchIndex:
+    """Índice invertido palavra -> {peso: ids dos livros}, atualizado livro a livro.
+
+    Os ids ficam em sets agrupados por peso, então uniões e interseções
+    rodam em C; o Python só percorre os livros que disputam o top-K.
+    """
+
+    def __init__(self):
+        self._postings = {}
+        self._tokens = []  # Ordenada, para achar prefixos com bisect
+        self._doc_tokens = {}
+        self._rank = {}  # Desempate fixo: títulos mais curtos primeiro
+        self._lock = threading.RLock()
+
+    def __len__(self):
+        return len(self._doc_tokens)
+
+    def add(self, book_id, title, category, text=None):
+        weights = {}
+        for token in tokenize(category):
+            weights[token] = max(weights.get(token, 0), CATEGORY_WEIGHT)
+        title_tokens = tokenize(title)
+        for position, token in enumerate(title_tokens):
+            weight = TITLE_WEIGHT + (LEAD_BONUS if position == 0 else 0)
+            weights[token] = max(weights.get(token, 0), weight)
+        if text:
+            for token in tokenize(text):
+                weights.setdefault(token, TEXT_WEIGHT)
+        with self._lock:
+            if book_id in self._doc_tokens:
+                self._remove(book_id)
+            for token, weight in weights.items():
+                posting = self._postings.get(token)
+                if posting is None:
+                    posting = self._postings[token] = {}
+                    bisect.insort(self._tokens, token)
+                posting.setdefault(weight, set()).add(book_id)
+            self._doc_tokens[book_id] = tuple(weights.items())
+            self._rank[book_id] = (len(" ".join(title_tokens)) << 40) | book_id
+
+    def remove(self, book_id):
+        with self._lock:
+            if book_id in self._doc_tokens:
+                self._remove(book_id)
+
+    def _remove(self, book_id):
+        for token, weight in self._doc_tokens.pop(book_id):
+            posting = self._postings[token]
+            ids = posting[weight]
+            ids.discard(book_id)
+            if not ids:
+                del posting[weight]
+            if not posting:
+                del self._postings[token]
+                del self._tokens[bisect.bisect_left(self._tokens, token)]
+        del self._rank[book_id]
+
+    def _tiers(self, term, is_prefix):
+        """Faixas (pontuação, ids) de um termo, da maior para a menor e sem repetir livros"""
+        groups = {}
+        exact = self._postings.get(term)
+        if exact:
+            for weight, ids in exact.items():
+                groups.setdefault(weight, []).append(ids)
+        if is_prefix:
+            start = bisect.bisect_left(self._tokens, term)
+            for token in self._tokens[start:]:
+                if not token.startswith(term):
+                    break
+                if token == term:
+                    continue
+                for weight, ids in self._postings[token].items():
+                    groups.setdefault(weight * PREFIX_FACTOR, []).append(ids)
+        tiers = []
+        seen = set()
+        for weight in sorted(groups, reverse=True):
+            ids = set().union(*groups[weight])
+            ids -= seen
+            if ids:
+                tiers.append((weight, ids))
+                seen |= ids
+        return tiers, seen
+
+    def search(self, query, limit=20):
+        """Ids dos livros com todas as palavras da consulta, mais relevantes primeiro.
+
+        A última palavra vale como prefixo, já que o usuário ainda está digitando.
+        """
+        terms = tokenize(query)
+        if not terms:
+            return []
+        with self._lock:
+            per_term = [
+                self._tiers(term, is_prefix=(i == len(terms) - 1))
+                for i, term in enumerate(terms)
+            ]
+            if len(per_term) == 1:
+                groups = per_term[0][0]
+            else:
+                candidates = set.intersection(*sorted((seen for _, seen in per_term), key=len))
+                scores = dict.fromkeys(candidates, 0.0)
+                for tiers, _ in per_term:
+                    remaining = candidates
+                    for weight, ids in tiers:
+                        hits = remaining & ids
+                        for book_id in hits:
+                            scores[book_id] += weight
+                        remaining = remaining - hits
+                by_score = {}
+                for book_id, score in scores.items():
+                    by_score.setdefault(score, []).append(book_id)
+                groups = sorted(by_score.items(), reverse=True)
+
+            results = []
+            rank = self._rank.__getitem__
+            for _, ids in groups:
+                needed = limit - len(results)
+                if needed <= 0:
+                    break
+                if len(ids) <= needed:
+                    results.extend(sorted(ids, key=rank))
+                else:
+                    results.extend(heapq.nsmallest(needed, ids, key=rank))
+            return results
+
+
+class SearchDebouncer:
+    """Espera o usuário parar de digitar e descarta buscas que ficaram velhas"""
+
+    def __init__(self, search, on_results, delay=0.25):
+        self.search = search
+        self.on_results = on_results
+        self.delay = delay
+        self._generation = 0
+        self._timer = None
+        self._lock = threading.Lock()
+
+    def submit(self, query):
+        with self._lock:
+            self._generation += 1
+            if self._timer is not None:
+                self._timer.cancel()
+            self._timer = threading.Timer(self.delay, self._run, (self._generation, query))
+            self._timer.daemon = True
+            self._timer.start()
+
+    def cancel(self):
+        with self._lock:
+            self._generation += 1
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+
+    def _run(self, generation, query):
+        if generation != self._generation:
+            return
+        results = self.search(query)
+        # Uma tecla nova chegou durante a busca: o resultado já não interessa
+        if generation == self._generation:
+            self.on_results(query, results)
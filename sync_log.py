@@ -0,0 +1,325 @@
+import json
+import os
+import secrets
+import threading
+
+# --- Sincronização de Progresso ---
+# Cada aparelho escreve só no seu log: eventos (livro, página, momento) em
+# binário, só acrescentados no fim. A troca é por uma pasta qualquer (cartão,
+# pendrive, pasta sincronizada): cada aparelho copia para lá o que o seu log
+# ganhou e lê dos logs dos outros só os bytes novos desde a última troca.
+# Na mesclagem, por livro, vence o evento mais recente.
+#
+# Formato: MAGIC + época (8 bytes) + registros. Um registro começa com um
+# varint: ímpar declara o próximo livro (varint do tamanho + chave UTF-8);
+# par é um evento do livro `cabeçalho >> 1`, seguido de varint da página e do
+# delta em zigzag (ms) desde o evento anterior. Uma virada de página comum
+# cabe em 4-6 bytes. Compactar reescreve o log com o último evento de cada
+# livro e troca a época, o que avisa os outros aparelhos para relê-lo.
+
+MAGIC = b"BLSYNC1\n"
+HEADER_SIZE = len(MAGIC) + 8
+# Compacta quando há mais que isto de eventos por livro (e o log não é pequeno)
+COMPACT_RATIO = 4
+COMPACT_MIN_EVENTS = 1024
+
+
+def _varint(out, value):
+    while value >= 0x80:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    out.append(value)
+
+
+def _read_varint(data, position):
+    result = shift = 0
+    while True:
+        byte = data[position]
+        position += 1
+        result |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return result, position
+        shift += 7
+
+
+class Encoder:
+    """Estado de quem escreve: livros já declarados e o momento do último evento"""
+
+    def __init__(self, refs=None, last_ms=0):
+        self.refs = refs or {}
+        self.last_ms = last_ms
+
+    def encode(self, out, key, page, timestamp):
+        ref = self.refs.get(key)
+        if ref is None:
+            ref = self.refs[key] = len(self.refs)
+            raw = key.encode("utf-8")
+            _varint(out, 1)
+            _varint(out, len(raw))
+            out.extend(raw)
+        ms = round(timestamp * 1000)
+        delta = ms - self.last_ms
+        self.last_ms = ms
+        _varint(out, ref << 1)
+        _varint(out, page)
+        _varint(out, (delta << 1) ^ (delta >> 63))
+
+
+class Decoder:
+    """Estado de quem lê um log a partir de um offset (salvo entre as trocas)"""
+
+    def __init__(self, refs=None, last_ms=0):
+        self.refs = refs or []
+        self.last_ms = last_ms
+
+    def decode(self, data, position=0):
+        """[(chave, página, timestamp)] e o offset após o último registro completo.
+
+        Um registro cortado no fim (cópia em andamento) fica para a próxima troca.
+        """
+        events = []
+        end = len(data)
+        refs = self.refs
+        last_ms = self.last_ms
+        while position < end:
+            try:
+                header, cursor = _read_varint(data, position)
+                if header & 1:
+                    length, cursor = _read_varint(data, cursor)
+                    if cursor + length > end:
+                        break
+                    refs.append(bytes(data[cursor:cursor + length]).decode("utf-8"))
+                    cursor += length
+                else:
+                    page, cursor = _read_varint(data, cursor)
+                    zigzag, cursor = _read_varint(data, cursor)
+                    last_ms += (zigzag >> 1) ^ -(zigzag & 1)
+                    events.append((refs[header >> 1], page, last_ms / 1000))
+            except IndexError:
+                break
+            position = cursor
+            self.last_ms = last_ms
+        return events, position
+
+
+def merge(events, latest=None):
+    """Último (página, timestamp) de cada livro; empate no momento fica com a página maior"""
+    latest = {} if latest is None else latest
+    get = latest.get
+    for key, page, timestamp in events:
+        current = get(key)
+        if current is None or (timestamp, page) > (current[1], current[0]):
+            latest[key] = (page, timestamp)
+    return latest
+
+
+def _read_header(path):
+    with open(path, "rb") as f:
+        header = f.read(HEADER_SIZE)
+    if len(header) < HEADER_SIZE or not header.startswith(MAGIC):
+        return None
+    return header[len(MAGIC):].hex()
+
+
+class SyncLog:
+    """O log deste aparelho e a troca com os logs dos outros numa pasta.
+
+    Os eventos ficam num buffer até flush(); a pasta de troca e o ponto em que
+    cada log alheio foi lido ficam em state.json.
+
+    Dois locks: _buffer_lock guarda o que record() mexe (buffer, codificador,
+    último evento de cada livro) e só é segurado por operações em memória;
+    _lock serializa o acesso aos arquivos. Assim record(), chamado a cada
+    virada de página, nunca espera uma troca com a pasta terminar.
+    """
+
+    def __init__(self, root):
+        self.root = root
+        self._lock = threading.RLock()
+        self._buffer_lock = threading.Lock()
+        self._opened = False
+        self._buffer = bytearray()
+
+    # --- Log local ---
+
+    def _open(self):
+        """Carrega o log na primeira vez; chamar com _buffer_lock"""
+        if self._opened:
+            return
+        os.makedirs(self.root, exist_ok=True)
+        device_path = os.path.join(self.root, "device_id")
+        if os.path.exists(device_path):
+            with open(device_path, encoding="utf-8") as f:
+                self.device_id = f.read().strip()
+        else:
+            self.device_id = secrets.token_hex(6)
+            with open(device_path, "w", encoding="utf-8") as f:
+                f.write(self.device_id)
+        self.path = os.path.join(self.root, f"{self.device_id}.log")
+        self.state = {"folder": None, "exported": None, "peers": {}}
+        state_path = os.path.join(self.root, "state.json")
+        if os.path.exists(state_path):
+            with open(state_path, encoding="utf-8") as f:
+                self.state.update(json.load(f))
+        self.epoch = _read_header(self.path) if os.path.exists(self.path) else None
+        if self.epoch is None:
+            self._write(self._reencode({}))
+        else:
+            # O estado do codificador sai do próprio log (curto graças à compactação)
+            with open(self.path, "rb") as f:
+                data = f.read()
+            decoder = Decoder()
+            events, used = decoder.decode(data, HEADER_SIZE)
+            if used < len(data):
+                # Gravação interrompida no meio de um registro: corta o resto
+                with open(self.path, "r+b") as f:
+                    f.truncate(used)
+            self.encoder = Encoder({key: ref for ref, key in enumerate(decoder.refs)}, decoder.last_ms)
+            self.events = len(events)
+            self.latest = merge(events)
+        self._opened = True
+
+    def _ensure_open(self):
+        with self._buffer_lock:
+            self._open()
+
+    def record(self, key, page, timestamp):
+        with self._buffer_lock:
+            self._open()
+            self.encoder.encode(self._buffer, key, page, timestamp)
+            self.events += 1
+            self.latest[key] = (page, timestamp)
+
+    def flush(self):
+        with self._lock:
+            # Troca o buffer por um vazio e grava fora do _buffer_lock; os
+            # flushes seguem em ordem porque _lock os serializa
+            with self._buffer_lock:
+                data = self._buffer
+                self._buffer = bytearray()
+            if data:
+                with open(self.path, "ab") as f:
+                    f.write(data)
+
+    def _reencode(self, latest):
+        """Bytes de um log só com `latest`, numa época nova; chamar com _buffer_lock.
+
+        O buffer é descartado: os eventos dele já estão em `latest`, e os
+        próximos saem do codificador novo.
+        """
+        self.epoch = secrets.token_bytes(8).hex()
+        self.encoder = Encoder()
+        out = bytearray(MAGIC + bytes.fromhex(self.epoch))
+        for key, (page, timestamp) in sorted(latest.items(), key=lambda item: item[1][1]):
+            self.encoder.encode(out, key, page, timestamp)
+        self._buffer = bytearray()
+        self.events = len(latest)
+        self.latest = dict(latest)
+        return out
+
+    def _write(self, data):
+        temp = self.path + ".tmp"
+        with open(temp, "wb") as f:
+            f.write(data)
+        os.replace(temp, self.path)
+
+    def compact(self, force=False):
+        """Reescreve o log com o último evento de cada livro, se valer a pena"""
+        with self._lock:
+            self._ensure_open()
+            self.flush()
+            with self._buffer_lock:
+                if not (force or (self.events >= COMPACT_MIN_EVENTS and self.events > COMPACT_RATIO * len(self.latest))):
+                    return False
+                data = self._reencode(self.latest)
+            # Eventos gravados a partir daqui ficam no buffer até o próximo
+            # flush, que espera o _lock: chegam depois do arquivo novo
+            self._write(data)
+            return True
+
+    # --- Troca pela pasta ---
+
+    @property
+    def folder(self):
+        self._ensure_open()
+        return self.state["folder"]
+
+    def set_folder(self, folder):
+        with self._lock:
+            self._ensure_open()
+            self.state["folder"] = folder
+            self.state["exported"] = None
+            self.state["peers"] = {}
+            self._save_state()
+
+    def _save_state(self):
+        path = os.path.join(self.root, "state.json")
+        with open(path + ".tmp", "w", encoding="utf-8") as f:
+            json.dump(self.state, f)
+        os.replace(path + ".tmp", path)
+
+    def _export(self, folder):
+        # Só os bytes novos; depois de uma compactação (época nova) vai o arquivo inteiro
+        target = os.path.join(folder, f"{self.device_id}.log")
+        exported = self.state["exported"]
+        offset = exported["offset"] if exported and exported["epoch"] == self.epoch and os.path.exists(target) else 0
+        with open(self.path, "rb") as f:
+            f.seek(offset)
+            data = f.read()
+        if offset == 0:
+            with open(target + ".tmp", "wb") as f:
+                f.write(data)
+            os.replace(target + ".tmp", target)
+        elif data:
+            with open(target, "ab") as f:
+                f.write(data)
+        self.state["exported"] = {"epoch": self.epoch, "offset": offset + len(data)}
+
+    def _import(self, folder):
+        """Eventos novos de todos os outros aparelhos desde a última troca"""
+        latest = {}
+        for name in sorted(os.listdir(folder)):
+            device, extension = os.path.splitext(name)
+            if extension != ".log" or device == self.device_id:
+                continue
+            path = os.path.join(folder, name)
+            epoch = _read_header(path)
+            if epoch is None:
+                continue
+            peer = self.state["peers"].get(device)
+            if not peer or peer["epoch"] != epoch:
+                # Aparelho novo ou log compactado: lê do começo
+                peer = {"epoch": epoch, "offset": HEADER_SIZE, "refs": [], "last_ms": 0}
+            with open(path, "rb") as f:
+                f.seek(peer["offset"])
+                data = f.read()
+            decoder = Decoder(peer["refs"], peer["last_ms"])
+            events, used = decoder.decode(data)
+            merge(events, latest)
+            peer.update(offset=peer["offset"] + used, refs=decoder.refs, last_ms=decoder.last_ms)
+            self.state["peers"][device] = peer
+        return latest
+
+    def exchange(self, apply):
+        """Envia o log local para a pasta e aplica os eventos alheios com apply({chave: (página, ts)}).
+
+        Custa o que mudou desde a última troca, não o tamanho da biblioteca.
+        Devolve o retorno de apply (None sem pasta configurada).
+        """
+        with self._lock:
+            self.compact()
+            folder = self.state["folder"]
+            if not folder or not os.path.isdir(folder):
+                return None
+            self._export(folder)
+            latest = self._import(folder)
+            self._save_state()
+        with self._buffer_lock:
+            # Só o que é mais novo que o último evento deste aparelho para o livro:
+            # uma ação local (zerar progresso, por exemplo) não é desfeita por um evento antigo
+            own = self.latest
+            latest = {
+                key: value for key, value in latest.items()
+                if key not in own or (value[1], value[0]) > (own[key][1], own[key][0])
+            }
+        return apply(latest) if latest else []
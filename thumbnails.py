@@ -0,0 +1,119 @@
+import os
+import queue
+import threading
+
+import perf
+from disk_cache import DiskCache
+from zipindex import MappedZip
+
+# --- Miniaturas de Capa ---
+# Geradas uma vez a partir da página 1, em dois tamanhos, e guardadas em disco
+# com o hash do conteúdo no nome. A home só lê arquivos JPEG prontos.
+
+# Largura em pixels de cada tamanho (os cards têm 120 px úteis; ~2x de densidade)
+THUMBNAIL_WIDTHS = {"normal": 240, "minimal": 160}
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png", ".webp", ".gif", ".bmp")
+# Threads que geram capas faltando; rolar uma pasta grande não abre um PDF por card de uma vez
+THUMBNAIL_WORKERS = 2
+
+
+def _first_page_image(pymupdf, path):
+    """Abre a página 1 como documento do PyMuPDF (PDF ou primeira imagem do CBZ)"""
+    if path.lower().endswith(".pdf"):
+        return pymupdf.open(path)
+    with MappedZip(path) as archive:
+        names = sorted(n for n in archive.namelist() if n.lower().endswith(IMAGE_EXTENSIONS))
+        if not names:
+            return None
+        data = archive.read(names[0])
+    return pymupdf.open(stream=data, filetype=os.path.splitext(names[0])[1][1:])
+
+
+def render_thumbnails(path):
+    """JPEGs da capa em todos os tamanhos: {"normal": bytes, "minimal": bytes}"""
+    import pymupdf
+
+    doc = _first_page_image(pymupdf, path)
+    if doc is None:
+        return {}
+    with doc:
+        if not doc.page_count:
+            return {}
+        page = doc[0]
+        thumbnails = {}
+        for size, width in THUMBNAIL_WIDTHS.items():
+            zoom = width / page.rect.width if page.rect.width else 1
+            pix = page.get_pixmap(matrix=pymupdf.Matrix(zoom, zoom), alpha=False)
+            thumbnails[size] = pix.tobytes("jpeg", jpg_quality=80)
+        return thumbnails
+
+
+class ThumbnailCache(DiskCache):
+    """Miniaturas endereçadas pelo conteúdo (`<hash>_<tamanho>.jpg`), limitadas em bytes.
+
+    Saber se uma capa existe é uma consulta em memória, sem tocar no disco nem no PDF.
+    """
+
+    def __init__(self, root, max_bytes=64 * 1024 * 1024):
+        super().__init__(root, max_bytes, ".jpg")
+        self._pending = {}  # hash em geração -> on_ready de cada card que está esperando
+        self._pending_lock = threading.Lock()
+        # Conteúdos que não deram capa (arquivo sumido, corrompido, CBZ sem imagens):
+        # não são tentados de novo a cada vez que o card aparece
+        self._failed = set()
+        self._queue = queue.Queue()
+        self._workers = []
+
+    def _name(self, content_hash, size):
+        return f"{content_hash}_{size}"
+
+    def lookup(self, content_hash, size):
+        """Caminho da miniatura pronta, ou None"""
+        path = self.path_of(self._name(content_hash, size))
+        perf.count("thumbnail.miss" if path is None else "thumbnail.hit")
+        return path
+
+    def put_many(self, content_hash, thumbnails):
+        self.write_many({self._name(content_hash, size): data for size, data in thumbnails.items()})
+
+    def request(self, content_hash, path, on_ready):
+        """Gera em segundo plano as miniaturas que faltam (ex.: removidas pelo limite).
+
+        Uma geração por conteúdo; todos os pedidos feitos enquanto ela roda (cards de
+        tamanhos diferentes) recebem o aviso quando as miniaturas ficam prontas. As
+        gerações vão para uma fila atendida por THUMBNAIL_WORKERS threads.
+        """
+        with self._pending_lock:
+            if content_hash in self._failed:
+                return
+            waiting = self._pending.get(content_hash)
+            if waiting is not None:
+                waiting.append(on_ready)
+                return
+            self._pending[content_hash] = [on_ready]
+            if len(self._workers) < THUMBNAIL_WORKERS:
+                worker = threading.Thread(target=self._loop, name="thumbnail", daemon=True)
+                self._workers.append(worker)
+                worker.start()
+        self._queue.put((content_hash, path))
+
+    def _loop(self):
+        while True:
+            content_hash, path = self._queue.get()
+            thumbnails = None
+            try:
+                thumbnails = render_thumbnails(path)
+                if thumbnails:
+                    self.put_many(content_hash, thumbnails)
+            except Exception:
+                thumbnails = None  # Arquivo sumiu ou corrompido: o card fica com as iniciais
+            with self._pending_lock:
+                callbacks = self._pending.pop(content_hash)
+                if not thumbnails:
+                    self._failed.add(content_hash)
+            if thumbnails:
+                for callback in callbacks:
+                    try:
+                        callback()
+                    except Exception:
+                        pass  # Um card que já saiu da tela não pode derrubar o worker
@@ -0,0 +1,133 @@
+import mmap
+import os
+import struct
+import threading
+import zipfile
+import zlib
+from collections import OrderedDict
+
+# --- Acesso Mapeado a CBZ ---
+# O arquivo é mapeado em memória (mmap) em vez de lido: abrir um omnibus de
+# 500 MB não carrega nada além do diretório central, e cada página lê só os
+# bytes da sua entrada. O diretório central de cada arquivo fica num cache
+# (caminho + tamanho + mtime), então reabrir um livro recente não o relê.
+
+# Índices de diretório central mantidos para reabertura (os livros mais recentes)
+INDEX_CACHE_SIZE = 16
+
+_EOCD = struct.Struct("<4s4H2LH")
+_CENTRAL = struct.Struct("<4s6H3L5H2L")
+_LOCAL = struct.Struct("<4s5H3L2H")
+_EOCD_SIGNATURE = b"PK\x05\x06"
+_CENTRAL_SIGNATURE = b"PK\x01\x02"
+_LOCAL_SIGNATURE = b"PK\x03\x04"
+_STORED = 0
+_DEFLATED = 8
+
+_indexes = OrderedDict()
+_indexes_lock = threading.Lock()
+
+
+def read_central_directory(data):
+    """{nome: (offset do cabeçalho local, tamanho comprimido, tamanho, método)}, ou None.
+
+    None quando o arquivo usa algo que este leitor não cobre (ZIP64, criptografia,
+    compressão além de stored/deflate): aí quem chamou usa o zipfile.
+    """
+    end = data.rfind(_EOCD_SIGNATURE, max(0, len(data) - _EOCD.size - 0xFFFF))
+    if end < 0:
+        raise zipfile.BadZipFile("Diretório central não encontrado")
+    _, _, _, _, total, _, position, _ = _EOCD.unpack_from(data, end)
+    if total == 0xFFFF or position == 0xFFFFFFFF:
+        return None  # ZIP64
+    entries = {}
+    for _ in range(total):
+        (signature, _, _, flags, method, _, _, _, compressed, size,
+         name_length, extra_length, comment_length, _, _, _, offset) = _CENTRAL.unpack_from(data, position)
+        if signature != _CENTRAL_SIGNATURE:
+            raise zipfile.BadZipFile("Entrada do diretório central corrompida")
+        if flags & 0x1 or method not in (_STORED, _DEFLATED) or 0xFFFFFFFF in (compressed, size, offset):
+            return None
+        start = position + _CENTRAL.size
+        name = bytes(data[start:start + name_length]).decode("utf-8" if flags & 0x800 else "cp437")
+        entries[name] = (offset, compressed, size, method)
+        position = start + name_length + extra_length + comment_length
+    return entries
+
+
+def _cached_index(key, data):
+    with _indexes_lock:
+        if key in _indexes:
+            _indexes.move_to_end(key)
+            return _indexes[key]
+    entries = read_central_directory(data)
+    with _indexes_lock:
+        _indexes[key] = entries
+        while len(_indexes) > INDEX_CACHE_SIZE:
+            _indexes.popitem(last=False)
+    return entries
+
+
+class MappedZip:
+    """Leitura de entradas de um ZIP/CBZ mapeado em memória, no lugar do zipfile.ZipFile"""
+
+    def __init__(self, path):
+        self._file = open(path, "rb")
+        try:
+            stat = os.fstat(self._file.fileno())
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError):
+            # Arquivo vazio não pode ser mapeado
+            self._file.close()
+            raise zipfile.BadZipFile(f"Arquivo inválido: {path}")
+        try:
+            self._entries = _cached_index((path, stat.st_size, stat.st_mtime_ns), self._map)
+        except Exception:
+            self._map.close()
+            self._file.close()
+            raise
+        # Formato que o índice não cobre: o zipfile resolve (lendo do mapa, não do disco)
+        self._zip = zipfile.ZipFile(self._map) if self._entries is None else None
+
+    def namelist(self):
+        return self._zip.namelist() if self._zip else list(self._entries)
+
+    def _data_range(self, name):
+        offset, compressed, size, method = self._entries[name]
+        signature, *_, name_length, extra_length = _LOCAL.unpack_from(self._map, offset)
+        if signature != _LOCAL_SIGNATURE:
+            raise zipfile.BadZipFile(f"Cabeçalho local corrompido: {name}")
+        start = offset + _LOCAL.size + name_length + extra_length
+        return start, compressed, size, method
+
+    def read(self, name, limit=None):
+        """Bytes da entrada; com `limit`, só os primeiros (ex.: cabeçalho da imagem)"""
+        if self._zip:
+            with self._zip.open(name) as entry:
+                return entry.read(limit if limit is not None else -1)
+        start, compressed, size, method = self._data_range(name)
+        if method == _STORED:
+            return self._map[start:start + (compressed if limit is None else min(limit, compressed))]
+        decompressor = zlib.decompressobj(-zlib.MAX_WBITS)
+        if limit is None:
+            return decompressor.decompress(self._map[start:start + compressed])
+        # Cabeçalho: descomprime aos poucos só até ter `limit` bytes
+        data = b""
+        position, end = start, start + compressed
+        while len(data) < limit and position < end:
+            chunk = self._map[position:min(end, position + limit)]
+            position += len(chunk)
+            data += decompressor.decompress(chunk, limit - len(data))
+        return data
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        if self._zip:
+            self._zip.close()
+        self._map.close()
+        self._file.close()